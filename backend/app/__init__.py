@@ -5,8 +5,11 @@ from flask_cors import CORS
 from flask import session
 from flask_socketio import SocketIO
 from flask_mail import Mail
+from sqlalchemy import inspect as sa_inspect
 
-db = SQLAlchemy()
+from .replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 socketio = SocketIO(cors_allowed_origins="*")
 mail = Mail()
@@ -16,6 +19,12 @@ def create_app(config_object='config.Config'):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_object)
 
+    from .logging_setup import configure_logging
+    configure_logging(app)
+
+    from .json_provider import init_json
+    init_json(app)
+
     # ensure instance path exists
     try:
         app.instance_path
@@ -26,65 +35,64 @@ def create_app(config_object='config.Config'):
     # Allow both Vite dev server (5173) and production (3000)
     CORS(app, supports_credentials=True, origins=["http://localhost:3000", "http://localhost:5173", "http://localhost:3001"])
 
+    # Import the API first: Socket.IO handlers declared before socketio.init_app
+    # are re-attached to every app's server, not just the first one created
+    from .api import api_bp
+
     db.init_app(app)
     migrate.init_app(app, db)
+    # registers migration_locations, which picks the baseline or the archived chain per database
+    from . import schema  # noqa: F401
     socketio.init_app(app)
     mail.init_app(app)
 
-    from .api import api_bp
+    from .auth import jwt
+    jwt.init_app(app)
+
     app.register_blueprint(api_bp, url_prefix='/api/v1')
 
-    # Skip demo data during tests
-    if app.config.get('TESTING'):
+    from .replicas import init_replicas
+    init_replicas(app, api_bp)
+
+    from .metrics import init_metrics
+    init_metrics(app, api_bp, mail, socketio)
+
+    from .dashboard import init_dashboard
+    init_dashboard(app, api_bp, socketio)
+
+    from .batch import init_batch
+    init_batch(socketio)
+
+    from .compression import init_compression
+    init_compression(app, api_bp)
+
+    from .commands import register_commands
+    register_commands(app)
+
+    # Demo accounts have well-known passwords: only seed them when explicitly asked to
+    if app.config.get('TESTING') or not app.config.get('SEED_DEMO_DATA'):
         return app
 
     # create demo users and providers
     with app.app_context():
+        log = app.logger
 
-        
         # Check if schema is ready (email column exists) before creating demo users
         try:
-            import sqlite3
-            conn = sqlite3.connect(os.path.join(app.instance_path, 'app.db'))
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(user)")
-            columns = [row[1] for row in cursor.fetchall()]
+            columns = [c['name'] for c in sa_inspect(db.engine).get_columns('user')]
             schema_ready = 'email' in columns
-            conn.close()
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"D","location":"app/__init__.py:60","message":"Schema readiness check","data":{"schema_ready":schema_ready,"has_email":schema_ready},"timestamp":int(__import__('time').time()*1000)})+'\n')
-            except: pass
-            # #endregion
         except Exception as e:
+            log.debug('schema check failed', extra={'event': 'init.schema_check', 'error': str(e)})
             schema_ready = False
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"D","location":"app/__init__.py:67","message":"Schema check failed","data":{"error":str(e)},"timestamp":int(__import__('time').time()*1000)})+'\n')
-            except: pass
-            # #endregion
-        
+
         if not schema_ready:
-            # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"E","location":"app/__init__.py:73","message":"Skipping demo user creation - schema not ready","data":{},"timestamp":int(__import__('time').time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            log.info('skipping demo user creation, schema not ready', extra={'event': 'init.demo_skipped'})
             return app
-        
+
         from .models import User
-        
-        # Demo user with email
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"B","location":"app/__init__.py:82","message":"Before User query","data":{"querying":"user_demo"},"timestamp":int(__import__('time').time()*1000)})+'\n')
-        except: pass
-        # #endregion
+
         try:
+            seed_method = app.config.get('PASSWORD_HASH_SEED_METHOD')
             # Demo users - all use same email
             demo_users = [
                 {'username': 'user_demo', 'password': 'demo123', 'name': 'Demo User'},
@@ -95,7 +103,7 @@ def create_app(config_object='config.Config'):
             for user_data in demo_users:
                 if not User.query.filter_by(username=user_data['username']).first():
                     user = User(username=user_data['username'])
-                    user.set_password(user_data['password'])
+                    user.set_password(user_data['password'], seed_method)
                     user.name = user_data['name']
                     user.email = 'aninda.sarkar11@gmail.com'  # All demo users use same email
                     db.session.add(user)
@@ -109,32 +117,31 @@ def create_app(config_object='config.Config'):
                 {'username': 'provider_fridge', 'password': 'demo123', 'name': 'Demo Fridge Repair', 'category': 'fridge repair'},
             ]
             
-            # Get the next provider unique ID
-            existing_providers = User.query.filter(User.provider_unique_id.isnot(None)).all()
-            next_id = len(existing_providers) + 1
-            
+            # Providers still missing an ID get consecutive ones from a single allocation
+            needs_id = []
             for provider_data in demo_providers:
                 existing_provider = User.query.filter_by(username=provider_data['username']).first()
                 if not existing_provider:
                     provider = User(username=provider_data['username'])
-                    provider.set_password(provider_data['password'])
+                    provider.set_password(provider_data['password'], seed_method)
                     provider.name = provider_data['name']
                     provider.role = 'provider'
                     provider.partner_category = provider_data['category']
                     provider.email = 'aninda.sarkar.arka@g.bracu.ac.bd'  # All demo providers use same email
-                    provider.provider_unique_id = f'PROV-{next_id:03d}'
-                    next_id += 1
                     db.session.add(provider)
+                    needs_id.append(provider)
                 elif existing_provider.role == 'provider' and not existing_provider.provider_unique_id:
-                    # Assign ID to existing providers that don't have one
-                    existing_provider.provider_unique_id = f'PROV-{next_id:03d}'
-                    next_id += 1
+                    needs_id.append(existing_provider)
+
+            from .provider_ids import allocate_provider_ids
+            for provider, provider_id in zip(needs_id, allocate_provider_ids(len(needs_id))):
+                provider.provider_unique_id = provider_id
             
             # Create admin user
             admin_user = User.query.filter_by(username='admin1').first()
             if not admin_user:
                 admin = User(username='admin1')
-                admin.set_password('admin123')
+                admin.set_password('admin123', seed_method)
                 admin.name = 'Admin User'
                 admin.role = 'admin'
                 admin.email = 'admin@servicehub.com'
@@ -142,30 +149,13 @@ def create_app(config_object='config.Config'):
             
             try:
                 db.session.commit()
-                print('[INIT] Demo users and providers created successfully')
-            except Exception as e:
+                log.info('demo users and providers created', extra={'event': 'init.demo_created'})
+            except Exception:
                 db.session.rollback()
-                # #region agent log
-                import json
-                import os
-                log_path = r'c:\Users\HAVOC\OneDrive\Desktop\cse471\.cursor\debug.log'
-                try:
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"C","location":"app/__init__.py:140","message":"Error during User query/creation","data":{"error":str(e),"error_type":type(e).__name__},"timestamp":int(__import__('time').time()*1000)})+'\n')
-                except: pass
-                # #endregion
-                print(f'[INIT] Error creating demo users: {e}')
+                log.error('error creating demo users', exc_info=True, extra={'event': 'init.demo_failed'})
         except Exception as e:
             # Handle schema mismatch errors gracefully (e.g., during migrations)
-            # #region agent log
-            import json
-            import os
-            log_path = r'c:\Users\HAVOC\OneDrive\Desktop\cse471\.cursor\debug.log'
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"pre-fix","hypothesisId":"F","location":"app/__init__.py:150","message":"Schema mismatch - skipping demo user creation","data":{"error":str(e),"error_type":type(e).__name__},"timestamp":int(__import__('time').time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            print(f'[INIT] Schema not ready for demo users (this is normal during migrations): {type(e).__name__}')
+            log.info('schema not ready for demo users (normal during migrations)',
+                     extra={'event': 'init.demo_skipped', 'error_type': type(e).__name__})
 
     return app
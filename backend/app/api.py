@@ -1,25 +1,57 @@
+import logging
 
-from flask import Blueprint, request, jsonify, current_app, session
+from flask import Blueprint, request, jsonify, current_app, session, Response, stream_with_context
 from flask_socketio import emit, join_room, leave_room
+from flask_jwt_extended import decode_token, get_jwt, verify_jwt_in_request
+from sqlalchemy.orm import joinedload
 from .models import User, Item, ServiceRequest, Notification, Complaint, Warning, ChatMessage
 from . import db, socketio, mail
+from .exports import (
+    EXPORT_FORMATS, stream_export, complaint_export_query,
+    warning_export_query, service_request_export_query,
+)
+from .provider_ids import allocate_provider_id
+from .matching import find_matching_providers
+from .notifications import notify_users
+from .subscriptions import invalidate_premium
+from .dispatch import enqueue, queue_query, reprioritize_pending
+from .request_lifecycle import schedule_new, record_rejection, close, open_to
+from .inbox import inbox_queries, jobs_query, push_remove, push_upsert
+from .dashboard import get_dashboard
+from .batch import parse_operations, run_batch
+from .ratelimit import check_rate_limit, too_many_requests
+from .idempotency import idempotent_call
+from .partitions import recent
+from .email_digest import deliver_email
+from .chat_writer import chat_writer, flush_chat
+from .near_duplicates import index_complaint, similar_to
+from .auth import (
+    get_token_user, issue_tokens, issue_access_token, revoke_token,
+    user_id_from_socket_auth,
+)
 
 
 api_bp = Blueprint('api', __name__)
+log = logging.getLogger(__name__)
 
 
 # SocketIO event handlers for real-time notifications
 @socketio.on('connect')
-def handle_connect():
-    """Handle client connection"""
+def handle_connect(auth=None):
+    """Handle client connection (cookie session, or {'token': ...} auth in JWT mode)"""
     user_id = session.get('user_id')
+    if not user_id and current_app.config.get('JWT_AUTH_ENABLED'):
+        user_id = user_id_from_socket_auth(auth)
+        if user_id:
+            # later events on this socket read the per-connection session
+            session['user_id'] = user_id
     if user_id:
         room = f'user_{user_id}'
         join_room(room)
-        print(f'[SOCKETIO] User {user_id} connected and joined room {room}')
+        log.info('socket connected', extra={'event': 'socket.connect', 'user_id': user_id, 'room': room})
         emit('connected', {'status': 'connected', 'user_id': user_id})
     else:
-        print('[SOCKETIO] Anonymous user connected (no session)')
+        log.info('anonymous socket connected', extra={'event': 'socket.connect', 'user_id': None})
         emit('error', {'msg': 'authentication required'})
 
 
@@ -30,10 +62,14 @@ def handle_disconnect():
     if user_id:
         room = f'user_{user_id}'
         leave_room(room)
-        print(f'[SOCKETIO] User {user_id} disconnected from room {room}')
+        log.info('socket disconnected', extra={'event': 'socket.disconnect', 'user_id': user_id, 'room': room})
 
 
 def get_current_user():
+    if current_app.config.get('JWT_AUTH_ENABLED'):
+        token_user = get_token_user()
+        if token_user is not None:
+            return token_user
     uid = session.get('user_id')
     if not uid:
         return None
@@ -50,6 +86,43 @@ def login_required(fn):
     return wrapper
 
 
+def rate_limited(fn):
+    """Charge one token to the current user's bucket for this endpoint (see app/ratelimit.py)."""
+    def wrapper(*args, **kwargs):
+        retry_after = check_rate_limit(fn.__name__, get_current_user().id)
+        if retry_after:
+            return too_many_requests(retry_after)
+        return fn(*args, **kwargs)
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+def idempotent(fn):
+    """Honour an Idempotency-Key header: retries replay the first response (see app/idempotency.py)."""
+    def wrapper(*args, **kwargs):
+        return idempotent_call(get_current_user().id, fn.__name__, fn, *args, **kwargs)
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+def list_response(model, *queries, eager=()):
+    """
+    Serialize the rows of `queries` (concatenated) with model.as_json, honouring an
+    optional ?fields=a,b,c sparse fieldset: only those columns are selected and only
+    the joins they need are made (`eager` are the loader options used for the full
+    representation).
+    """
+    serializer = model.serializer
+    try:
+        fields = serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    options = serializer.load_options(fields, default=eager)
+    rows = [row for query in queries for row in query.options(*options)]
+    serialize = serializer.fieldset(fields)
+    return jsonify([serialize(row) for row in rows]), 200
+
+
 @api_bp.route('/ping', methods=['GET'])
 def ping():
     return jsonify({'msg': 'pong'})
@@ -73,11 +146,10 @@ def register():
     new_user = User(username=username, role=role, name=name, email=email)
     new_user.set_password(password)
     
-    db.session.add(new_user)
     # Auto-assign Provider ID if role is provider
     if role == 'provider':
-        db.session.flush() # flush to get an ID
-        new_user.provider_unique_id = f"PV-{new_user.id:03d}"
+        new_user.provider_unique_id = allocate_provider_id()
+    db.session.add(new_user)
 
     db.session.commit()
 
@@ -126,16 +198,50 @@ def login():
     user = User.query.filter_by(username=username).first()
     if not user or not user.check_password(password):
         return jsonify({'msg': 'invalid credentials'}), 401
-    # set session
-    session['user_id'] = user.id
-    session['username'] = user.username
-    return jsonify({'msg': 'logged in', 'user': user.to_dict()})
+    # Transparently upgrade hashes made with other (older/cheaper) parameters
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+    payload = {'msg': 'logged in', 'user': user.to_dict()}
+    if current_app.config.get('JWT_AUTH_ENABLED'):
+        # stateless: the tokens are the credentials, no session cookie
+        payload.update(issue_tokens(user))
+    else:
+        session['user_id'] = user.id
+        session['username'] = user.username
+    return jsonify(payload)
+
+
+@api_bp.route('/auth/refresh', methods=['POST'])
+def refresh():
+    """
+    Exchange a refresh token (Authorization: Bearer <refresh_token>) for a new access token.
+    Claims are re-read from the database so role changes take effect.
+    """
+    if not current_app.config.get('JWT_AUTH_ENABLED'):
+        return jsonify({'msg': 'token auth disabled'}), 400
+    verify_jwt_in_request(refresh=True)
+    user = User.query.get(int(get_jwt()['sub']))
+    if not user:
+        return jsonify({'msg': 'authentication required'}), 401
+    return jsonify({'access_token': issue_access_token(user)})
 
 
 @api_bp.route('/auth/logout', methods=['POST'])
 def logout():
     session.pop('user_id', None)
     session.pop('username', None)
+    if current_app.config.get('JWT_AUTH_ENABLED'):
+        # revoke the presented token and, optionally, the refresh token in the body
+        if verify_jwt_in_request(optional=True, verify_type=False) is not None:
+            revoke_token(get_jwt())
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                revoke_token(decode_token(refresh_token))
+            except Exception:
+                pass
+        db.session.commit()
     return jsonify({'msg': 'logged out'})
 
 
@@ -147,6 +253,36 @@ def me():
     return jsonify({'user': user.to_dict()})
 
 
+@api_bp.route('/dashboard', methods=['GET'])
+@login_required
+def dashboard():
+    """
+    Everything a dashboard or the profile page needs on load, in one response:
+    { user, service_requests, notifications, complaints, warnings }. Each list is
+    what the matching endpoint returns (first page for a provider's requests).
+    """
+    return jsonify(get_dashboard(get_current_user())), 200
+
+
+@api_bp.route('/batch', methods=['POST'])
+@login_required
+def batch():
+    """
+    Run several API calls as the current user in one request and one transaction.
+    Expected JSON: { "operations": [{"method": "POST", "path": "/...", "body": {...}}, ...],
+                     "atomic": true }
+    Returns { "committed": bool, "results": [{"status": 200, "body": {...}}, ...] }.
+    """
+    data = request.get_json() or {}
+    try:
+        operations = parse_operations(data)
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    results, committed = run_batch(operations, get_current_user().id,
+                                   atomic=data.get('atomic', True) is not False)
+    return jsonify({'committed': committed, 'results': results}), 200
+
+
 @api_bp.route('/protected', methods=['GET'])
 @login_required
 def protected():
@@ -163,6 +299,7 @@ def get_profile():
 
 @api_bp.route('/subscribe', methods=['POST'])
 @login_required
+@idempotent
 def subscribe():
     """
     Simulate subscription purchase.
@@ -176,7 +313,9 @@ def subscribe():
     # 30 days subscription
     user.subscription_expiry = datetime.utcnow() + timedelta(days=30)
     
+    reprioritize_pending(user.id, premium=True)
     db.session.commit()
+    invalidate_premium(user.id)
     
     # Notify user
     notif_msg = f'Congratulations! You are now a Premium Member. Enjoy exclusive benefits!'
@@ -244,6 +383,16 @@ def update_profile():
             return jsonify({'msg': 'fee_max must be between 200 and 5000'}), 400
         user.fee_max = fee_max
 
+    # Email digest window (0 or empty sends each email right away)
+    if 'email_digest_minutes' in data:
+        try:
+            minutes = int(data.get('email_digest_minutes') or 0)
+        except (ValueError, TypeError):
+            return jsonify({'msg': 'email_digest_minutes must be a number'}), 400
+        if minutes < 0 or minutes > 24 * 60:
+            return jsonify({'msg': 'email_digest_minutes must be between 0 and 1440'}), 400
+        user.email_digest_minutes = minutes or None
+
     # If both fees present, ensure min <= max
     if user.fee_min is not None and user.fee_max is not None:
         if user.fee_min > user.fee_max:
@@ -252,6 +401,8 @@ def update_profile():
     # If partner fields filled, mark role as 'provider'
     if user.partner_category or user.nid or (user.partner_locations and user.partner_locations.strip()):
         user.role = 'provider'
+        if not user.provider_unique_id:
+            user.provider_unique_id = allocate_provider_id()
 
     db.session.commit()
     return jsonify(user.to_dict())
@@ -266,8 +417,7 @@ def public_profile(user_id):
 
 @api_bp.route('/items', methods=['GET'])
 def list_items():
-    items = Item.query.order_by(Item.created_at.desc()).all()
-    return jsonify([i.to_dict() for i in items])
+    return list_response(Item, Item.query.order_by(Item.created_at.desc()))
 
 
 @api_bp.route('/items/<int:item_id>', methods=['GET'])
@@ -319,6 +469,7 @@ def delete_item(item_id):
 
 @api_bp.route('/service_requests', methods=['POST'])
 @login_required
+@idempotent
 def create_service_request():
     """
     Create a new service request and notify all matching providers.
@@ -332,6 +483,13 @@ def create_service_request():
     if not category:
         return jsonify({'msg': 'category is required'}), 400
 
+    # Find all providers matching the category AND location; the request is charged
+    # against the user's rate limit by how many of them it will notify
+    matching_providers = find_matching_providers(user, category)
+    retry_after = check_rate_limit('create_service_request', user.id, cost=1 + len(matching_providers))
+    if retry_after:
+        return too_many_requests(retry_after)
+
     # Create service request without provider_id initially
     sr = ServiceRequest(
         user_id=user.id,
@@ -340,79 +498,28 @@ def create_service_request():
         description=description,
         status='pending'
     )
+    enqueue(sr, user)
+    schedule_new(sr)
     db.session.add(sr)
+    provider_ids = [provider.id for provider in matching_providers]
     db.session.commit()
+    # the commit expired the matched providers: reload them in one SELECT, not one per recipient
+    matching_providers = User.query.filter(User.id.in_(provider_ids)).all() if provider_ids else []
 
-    # Find all providers matching the category AND location
-    # User location must match one of the provider's service locations
-    # Provider locations are comma-separated string
-    
-    # Get all providers in category
-    providers_in_category = User.query.filter_by(role='provider', partner_category=category).all()
-    matching_providers = []
-    
-    user_location = user.location.strip().lower() if user.location else ''
-    
-    for prov in providers_in_category:
-        if not user_location:
-            # If user has no location, maybe show all? Or require location first? 
-            # For now, let's include all to avoid empty list, or strict?
-            # Strict: matching_providers = [] 
-            # Loose: matching_providers.append(prov)
-            # Going with Loose for now to allow testing without strict location
-            matching_providers.append(prov)
-            continue
-            
-        p_locs = [l.strip().lower() for l in (prov.partner_locations or '').split(',') if l.strip()]
-        
-        # Check partial match? or exact? 
-        # Simple string inclusion for now
-        if any(user_location in pl or pl in user_location for pl in p_locs):
-            matching_providers.append(prov)
-            
-    # Fallback: if no location match, maybe notify all in category? 
-    # User requirement: "by category and location"
-    # If no match, maybe empty list is correct.
-    if not matching_providers and not user_location:
-         matching_providers = providers_in_category 
+    # Notify all matching providers (one INSERT, one socket event each)
+    notif_msg = f'New service request #{sr.id} in category "{category}" from user {user.username}. Description: {description[:50]}...' if len(description) > 50 else f'New service request #{sr.id} in category "{category}" from user {user.username}. Description: {description}'
+    notify_users(provider_ids, notif_msg)
+    push_upsert(sr, provider_ids)
 
-    # Notify all matching providers
     for provider in matching_providers:
-        notif_msg = f'New service request #{sr.id} in category "{category}" from user {user.username}. Description: {description[:50]}...' if len(description) > 50 else f'New service request #{sr.id} in category "{category}" from user {user.username}. Description: {description}'
-        
-        # Create notification record
-        notification = Notification(recipient_id=provider.id, message=notif_msg)
-        db.session.add(notification)
-
-        # Emit real-time notification via SocketIO
-        socketio.emit('notification', {
-            'id': notification.id,
-            'message': notif_msg,
-            'is_read': False,
-            'created_at': notification.created_at.isoformat() if notification.created_at else None
-        }, room=f'user_{provider.id}')
-
-        # Send email if provider has a valid email
-        if provider.email and provider.email.strip():
-            try:
-                from flask_mail import Message
-                msg = Message(
-                    subject=f'New Service Request - {category}',
-                    recipients=[provider.email],
-                    body=f'Hello {provider.username},\n\n{notif_msg}\n\nPlease check your dashboard to accept or reject this request.\n\nBest regards,\nServiceHub Team',
-                    sender=current_app.config.get('MAIL_PROVIDER_SENDER')
-                )
-                mail.send(msg)
-                print(f'[EMAIL] ✓ Email sent successfully to provider {provider.username} ({provider.email})')
-            except Exception as e:
-                import traceback
-                error_details = traceback.format_exc()
-                print(f'[EMAIL] ✗ Failed to send email to provider {provider.username} ({provider.email})')
-                print(f'[EMAIL] Error: {str(e)}')
-                print(f'[EMAIL] Details: {error_details}')
-                print(f'[EMAIL] Config - Server: {current_app.config.get("MAIL_SERVER")}, Port: {current_app.config.get("MAIL_PORT")}, Username: {current_app.config.get("MAIL_USERNAME")}')
-        else:
-            print(f'[EMAIL] ⚠ Provider {provider.username} does not have an email address. Email notification will be sent when they add an email address.')
+        deliver_email(
+            provider,
+            f'New Service Request - {category}',
+            f'Hello {provider.username},\n\n{notif_msg}\n\nPlease check your dashboard to accept or reject this request.\n\nBest regards,\nServiceHub Team',
+            notif_msg,
+            current_app.config.get('MAIL_PROVIDER_SENDER'),
+            request_id=sr.id,
+        )
 
     db.session.commit()
 
@@ -440,9 +547,13 @@ def accept_service_request(request_id):
         return jsonify({'msg': 'request already processed'}), 400
 
     # Assign provider and accept
+    offered_to = open_to(sr)
     sr.provider_id = user.id
     sr.status = 'accepted'
+    close(sr)
     db.session.commit()
+    push_remove(sr, offered_to - {user.id})
+    push_upsert(sr, [user.id])
 
     # Notify the requesting user
     notif_msg = f'Your service request #{sr.id} ({sr.category}) has been accepted by provider {user.username}.'
@@ -460,25 +571,16 @@ def accept_service_request(request_id):
 
     # Email to user if email exists
     requester = User.query.get(sr.user_id)
-    if requester and requester.email and requester.email.strip():
-        try:
-            from flask_mail import Message
-            msg = Message(
-                subject='Service Request Accepted',
-                recipients=[requester.email],
-                body=f'Hello {requester.username},\n\n{notif_msg}\n\nProvider: {user.username}\nCategory: {sr.category}\n\nBest regards,\nServiceHub Team',
-                sender=current_app.config.get('MAIL_USER_SENDER')
-            )
-            mail.send(msg)
-            print(f'[EMAIL] ✓ Email sent successfully to user {requester.username} ({requester.email})')
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f'[EMAIL] ✗ Failed to send email to user {requester.username} ({requester.email})')
-            print(f'[EMAIL] Error: {str(e)}')
-            print(f'[EMAIL] Details: {error_details}')
-    else:
-        print(f'[EMAIL] ⚠ User {requester.username if requester else "Unknown"} does not have an email address. Email notification will be sent when they add an email address.')
+    if requester:
+        deliver_email(
+            requester,
+            'Service Request Accepted',
+            f'Hello {requester.username},\n\n{notif_msg}\n\nProvider: {user.username}\nCategory: {sr.category}\n\nBest regards,\nServiceHub Team',
+            notif_msg,
+            current_app.config.get('MAIL_USER_SENDER'),
+            request_id=sr.id,
+        )
+        db.session.commit()
 
     return jsonify(sr.to_dict()), 200
 
@@ -499,10 +601,15 @@ def reject_service_request(request_id):
     if sr.category != user.partner_category:
         return jsonify({'msg': 'category mismatch'}), 403
 
-    sr.status = 'rejected'
+    if sr.status != 'pending':
+        return jsonify({'msg': 'request already processed'}), 400
+
+    # Only this provider passes; the request stays open for the others
+    from datetime import datetime
+    record_rejection(sr, user, datetime.utcnow())
     db.session.commit()
 
-    notif_msg = f'Your service request #{sr.id} ({sr.category}) has been rejected by provider {user.username}.'
+    notif_msg = f'Your service request #{sr.id} ({sr.category}) was declined by provider {user.username}. It is still open to other providers.'
     notification = Notification(recipient_id=sr.user_id, message=notif_msg)
     db.session.add(notification)
     db.session.commit()
@@ -516,25 +623,16 @@ def reject_service_request(request_id):
     }, room=f'user_{sr.user_id}')
 
     requester = User.query.get(sr.user_id)
-    if requester and requester.email and requester.email.strip():
-        try:
-            from flask_mail import Message
-            msg = Message(
-                subject='Service Request Rejected',
-                recipients=[requester.email],
-                body=f'Hello {requester.username},\n\n{notif_msg}\n\nYou can create a new request or wait for other providers to respond.\n\nBest regards,\nServiceHub Team',
-                sender=current_app.config.get('MAIL_USER_SENDER')
-            )
-            mail.send(msg)
-            print(f'[EMAIL] ✓ Email sent successfully to user {requester.username} ({requester.email})')
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f'[EMAIL] ✗ Failed to send email to user {requester.username} ({requester.email})')
-            print(f'[EMAIL] Error: {str(e)}')
-            print(f'[EMAIL] Details: {error_details}')
-    else:
-        print(f'[EMAIL] ⚠ User {requester.username if requester else "Unknown"} does not have an email address. Email notification will be sent when they add an email address.')
+    if requester:
+        deliver_email(
+            requester,
+            'Service Request Rejected',
+            f'Hello {requester.username},\n\n{notif_msg}\n\nYou can create a new request or wait for other providers to respond.\n\nBest regards,\nServiceHub Team',
+            notif_msg,
+            current_app.config.get('MAIL_USER_SENDER'),
+            request_id=sr.id,
+        )
+        db.session.commit()
 
     return jsonify(sr.to_dict()), 200
 
@@ -544,15 +642,57 @@ def list_my_service_requests():
     """
     List service requests for the current user.
     - For regular users: requests they created.
-    - For providers: requests matching their category (pending, accepted, or rejected by them).
+    - For providers: their inbox - the head of the dispatch queue (pending requests in their
+      category and locations they have not declined), then their own accepted and completed
+      jobs, newest first. Further pages come from /service_requests/queue and
+      /service_requests/jobs; changes are pushed as `inbox_update` socket events.
     """
     user = get_current_user()
+    eager = [joinedload(ServiceRequest.provider)]
     if user.role == 'provider':
-        # Show all requests matching provider's category
-        requests = ServiceRequest.query.filter_by(category=user.partner_category).order_by(ServiceRequest.created_at.desc()).all()
-    else:
-        requests = ServiceRequest.query.filter_by(user_id=user.id).order_by(ServiceRequest.created_at.desc()).all()
-    return jsonify([r.to_dict() for r in requests]), 200
+        return list_response(ServiceRequest, *inbox_queries(user), eager=eager)
+    requests = ServiceRequest.query.filter_by(user_id=user.id)
+    return list_response(ServiceRequest, requests.order_by(ServiceRequest.created_at.desc()), eager=eager)
+
+
+@api_bp.route('/service_requests/queue', methods=['GET'])
+@login_required
+def service_request_queue():
+    """
+    Page through the provider's dispatch queue: pending requests in their category
+    and locations, premium first with aging. ?after=<request id>&limit=<n>
+    """
+    user = get_current_user()
+    if user.role != 'provider':
+        return jsonify({'msg': 'only providers have a dispatch queue'}), 403
+    limit = min(request.args.get('limit', current_app.config.get('DISPATCH_QUEUE_PAGE_SIZE', 50), type=int), 500)
+    after = None
+    if request.args.get('after'):
+        after = db.session.get(ServiceRequest, request.args.get('after', type=int) or 0)
+        if after is None or after.dispatch_at is None:
+            return jsonify({'msg': 'unknown cursor'}), 400
+    return list_response(ServiceRequest, queue_query(user, after).limit(limit),
+                         eager=[joinedload(ServiceRequest.provider)])
+
+
+@api_bp.route('/service_requests/jobs', methods=['GET'])
+@login_required
+def service_request_jobs():
+    """
+    Page through the provider's own accepted and completed requests, newest first.
+    ?before=<request id>&limit=<n>
+    """
+    user = get_current_user()
+    if user.role != 'provider':
+        return jsonify({'msg': 'only providers have jobs'}), 403
+    limit = min(request.args.get('limit', current_app.config.get('PROVIDER_JOBS_PAGE_SIZE', 50), type=int), 500)
+    before = None
+    if request.args.get('before'):
+        before = db.session.get(ServiceRequest, request.args.get('before', type=int) or 0)
+        if before is None or before.provider_id != user.id:
+            return jsonify({'msg': 'unknown cursor'}), 400
+    return list_response(ServiceRequest, jobs_query(user, before).limit(limit),
+                         eager=[joinedload(ServiceRequest.provider)])
 
 @api_bp.route('/service_requests/<int:request_id>/complete', methods=['POST'])
 @login_required
@@ -576,6 +716,7 @@ def complete_service_request(request_id):
     from datetime import datetime
     sr.completed_at = datetime.utcnow()
     db.session.commit()
+    push_upsert(sr, [user.id])
     
     # Notify user
     notif_msg = f'Service request #{sr.id} has been marked as completed by provider. Please rate the service.'
@@ -618,6 +759,7 @@ def rate_service_request(request_id):
     sr.rating = int(rating)
     sr.review = review
     db.session.commit()
+    push_upsert(sr, [sr.provider_id])
     
     # Update provider's average rating
     provider = User.query.get(sr.provider_id)
@@ -652,11 +794,16 @@ def get_service_request_messages(request_id):
     if sr.user_id != user.id and sr.provider_id != user.id:
         return jsonify({'msg': 'access denied'}), 403
         
-    messages = ChatMessage.query.filter_by(service_request_id=request_id).order_by(ChatMessage.created_at.asc()).all()
-    return jsonify([m.to_dict() for m in messages]), 200
+    flush_chat()
+    messages = (ChatMessage.query
+                .filter(ChatMessage.service_request_id == request_id, *recent(ChatMessage, sr.created_at))
+                .order_by(ChatMessage.created_at.asc()))
+    return list_response(ChatMessage, messages, eager=[joinedload(ChatMessage.sender)])
 
 @api_bp.route('/service_requests/<int:request_id>/messages', methods=['POST'])
 @login_required
+@idempotent
+@rate_limited
 def send_service_request_message(request_id):
     """
     Send a chat message for a service request.
@@ -680,16 +827,20 @@ def send_service_request_message(request_id):
     if not msg_text:
         return jsonify({'msg': 'message required'}), 400
         
-    chat_msg = ChatMessage(
-        service_request_id=request_id,
-        sender_id=user.id,
-        message=msg_text
-    )
-    db.session.add(chat_msg)
-    db.session.commit()
-    
+    writer = chat_writer()
+    if writer is not None:
+        payload = writer.submit(user, service_request_id=request_id, message=msg_text)
+    else:
+        chat_msg = ChatMessage(
+            service_request_id=request_id,
+            sender_id=user.id,
+            message=msg_text
+        )
+        db.session.add(chat_msg)
+        db.session.commit()
+        payload = chat_msg.to_dict()
+
     # SocketIO Emit
-    payload = chat_msg.to_dict()
     socketio.emit('new_message', payload, room=f'service_request_{request_id}')
     
     # Notify offline recipient? (Optional enhancement)
@@ -711,7 +862,7 @@ def on_join_service_request(data):
         # For perf, skipping db check here, assuming frontend handles access logic
         room = f'service_request_{request_id}'
         join_room(room)
-        print(f'[SOCKETIO] User {uid} joined room {room}')
+        log.info('joined room', extra={'event': 'socket.join', 'user_id': uid, 'room': room})
 
 @socketio.on('leave_service_request')
 def on_leave_service_request(data):
@@ -722,7 +873,7 @@ def on_leave_service_request(data):
     if request_id:
         room = f'service_request_{request_id}'
         leave_room(room)
-        print(f'[SOCKETIO] User {uid} left room {room}')
+        log.info('left room', extra={'event': 'socket.leave', 'user_id': uid, 'room': room})
 
 # -------------------------------------------------------------------------
 # Notification Endpoints
@@ -735,8 +886,9 @@ def get_notifications():
     Retrieve all notifications for the current user.
     """
     user = get_current_user()
-    notifs = Notification.query.filter_by(recipient_id=user.id).order_by(Notification.created_at.desc()).all()
-    return jsonify([n.to_dict() for n in notifs]), 200
+    notifs = (Notification.query.filter(Notification.recipient_id == user.id, *recent(Notification, user.created_at))
+              .order_by(Notification.created_at.desc()))
+    return list_response(Notification, notifs)
 
 @api_bp.route('/notifications/<int:notif_id>/mark_read', methods=['POST'])
 @login_required
@@ -745,7 +897,8 @@ def mark_notification_read(notif_id):
     Mark a notification as read.
     """
     user = get_current_user()
-    notif = Notification.query.filter_by(id=notif_id, recipient_id=user.id).first_or_404()
+    notif = Notification.query.filter(Notification.id == notif_id, Notification.recipient_id == user.id,
+                                      *recent(Notification, user.created_at)).first_or_404()
     notif.is_read = True
     db.session.commit()
     return jsonify({'msg': 'notification marked as read'}), 200
@@ -792,9 +945,6 @@ def test_email():
         }), 200
         
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        
         config_info = {
             'mail_server': current_app.config.get('MAIL_SERVER'),
             'mail_port': current_app.config.get('MAIL_PORT'),
@@ -806,9 +956,7 @@ def test_email():
             'error_type': type(e).__name__
         }
         
-        print(f'[EMAIL TEST] ✗ Failed to send test email')
-        print(f'[EMAIL TEST] Error: {str(e)}')
-        print(f'[EMAIL TEST] Details: {error_details}')
+        log.warning('test email failed', exc_info=True, extra={'event': 'email.test_failed', 'recipient_id': user.id})
         
         return jsonify({
             'msg': 'Failed to send test email',
@@ -824,6 +972,8 @@ def test_email():
 
 @api_bp.route('/complaints', methods=['POST'])
 @login_required
+@idempotent
+@rate_limited
 def create_complaint():
     """
     Create a new complaint.
@@ -871,6 +1021,7 @@ def create_complaint():
         status='pending'
     )
     db.session.add(complaint)
+    index_complaint(complaint)
     db.session.commit()
 
     return jsonify(complaint.to_dict()), 201
@@ -891,14 +1042,29 @@ def list_complaints():
         query = Complaint.query
         if status_filter:
             query = query.filter_by(status=status_filter)
-        complaints = query.order_by(Complaint.created_at.desc()).all()
     elif user.role == 'provider':
-        complaints = Complaint.query.filter_by(provider_id=user.id).order_by(Complaint.created_at.desc()).all()
+        query = Complaint.query.filter_by(provider_id=user.id)
     else:
-        complaints = Complaint.query.filter_by(user_id=user.id).order_by(Complaint.created_at.desc()).all()
-
-    return jsonify([c.to_dict() for c in complaints]), 200
+        query = Complaint.query.filter_by(user_id=user.id)
+    return list_response(Complaint, query.order_by(Complaint.created_at.desc()),
+                         eager=[joinedload(Complaint.user), joinedload(Complaint.provider)])
   
+@api_bp.route('/complaints/<int:complaint_id>/similar', methods=['GET'])
+@login_required
+def similar_complaints(complaint_id):
+    """
+    Near-duplicates of a complaint (admin only), most similar first, each with its
+    estimated `similarity`. Optional ?limit= (default 20, at most 100).
+    """
+    user = get_current_user()
+    if user.role != 'admin':
+        return jsonify({'msg': 'only admin can view similar complaints'}), 403
+
+    complaint = Complaint.query.get_or_404(complaint_id)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    return jsonify([{**c.to_dict(), 'similarity': round(score, 3)}
+                    for score, c in similar_to(complaint, limit=limit)]), 200
+
 @api_bp.route('/complaints/<int:complaint_id>/messages', methods=['GET'])
 @login_required
 def get_complaint_messages(complaint_id):
@@ -910,11 +1076,16 @@ def get_complaint_messages(complaint_id):
     if user.role != 'admin' and complaint.user_id != user.id:
         return jsonify({'msg': 'access denied'}), 403
         
-    messages = ChatMessage.query.filter_by(complaint_id=complaint_id).order_by(ChatMessage.created_at.asc()).all()
-    return jsonify([m.to_dict() for m in messages]), 200
+    flush_chat()
+    messages = (ChatMessage.query
+                .filter(ChatMessage.complaint_id == complaint_id, *recent(ChatMessage, complaint.created_at))
+                .order_by(ChatMessage.created_at.asc()))
+    return list_response(ChatMessage, messages, eager=[joinedload(ChatMessage.sender)])
 
 @api_bp.route('/complaints/<int:complaint_id>/messages', methods=['POST'])
 @login_required
+@idempotent
+@rate_limited
 def send_complaint_message(complaint_id):
     """Send a chat message"""
     user = get_current_user()
@@ -931,8 +1102,12 @@ def send_complaint_message(complaint_id):
     if not text.strip():
         return jsonify({'msg': 'message required'}), 400
         
-    msg = ChatMessage(complaint_id=complaint_id, sender_id=user.id, message=text)
-    db.session.add(msg)
+    writer = chat_writer()
+    if writer is not None:
+        msg_data = writer.submit(user, complaint_id=complaint_id, message=text)
+    else:
+        msg = ChatMessage(complaint_id=complaint_id, sender_id=user.id, message=text)
+        db.session.add(msg)
     
     # If first message by admin, likely changing status to progress if pending
     if user.role == 'admin' and complaint.status == 'pending':
@@ -941,7 +1116,8 @@ def send_complaint_message(complaint_id):
     db.session.commit()
     
     # Emit real-time message
-    msg_data = msg.to_dict()
+    if writer is None:
+        msg_data = msg.to_dict()
     socketio.emit('new_message', msg_data, room=f'complaint_{complaint_id}')
     
     # Notify offline participant
@@ -1102,8 +1278,59 @@ def list_warnings():
     if user.role != 'provider':
         return jsonify({'msg': 'only providers can view warnings'}), 403
 
-    warnings = Warning.query.filter_by(provider_id=user.id).order_by(Warning.created_at.desc()).all()
-    return jsonify([w.to_dict() for w in warnings]), 200
+    warnings = Warning.query.filter_by(provider_id=user.id).order_by(Warning.created_at.desc())
+    return list_response(Warning, warnings, eager=[
+        joinedload(Warning.complaint), joinedload(Warning.provider), joinedload(Warning.admin)])
+
+# -------------------------------------------------------------------------
+# Admin Export Endpoints (streamed CSV / NDJSON)
+# -------------------------------------------------------------------------
+
+def _export_response(name, stmt):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'msg': 'format must be csv or ndjson'}), 400
+    return Response(
+        stream_with_context(stream_export(stmt, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'}
+    )
+
+
+@api_bp.route('/admin/export/complaints', methods=['GET'])
+@login_required
+def export_complaints():
+    """
+    Stream every complaint as CSV or NDJSON.
+    Query params: format=csv|ndjson, status=<optional status filter>
+    """
+    user = get_current_user()
+    if user.role != 'admin':
+        return jsonify({'msg': 'admin only'}), 403
+    return _export_response('complaints', complaint_export_query(request.args.get('status')))
+
+
+@api_bp.route('/admin/export/warnings', methods=['GET'])
+@login_required
+def export_warnings():
+    """Stream every warning as CSV or NDJSON."""
+    user = get_current_user()
+    if user.role != 'admin':
+        return jsonify({'msg': 'admin only'}), 403
+    return _export_response('warnings', warning_export_query())
+
+
+@api_bp.route('/admin/export/service_requests', methods=['GET'])
+@login_required
+def export_service_requests():
+    """
+    Stream every service request as CSV or NDJSON.
+    Query params: format=csv|ndjson, status=<optional status filter>
+    """
+    user = get_current_user()
+    if user.role != 'admin':
+        return jsonify({'msg': 'admin only'}), 403
+    return _export_response('service_requests', service_request_export_query(request.args.get('status')))
 
 # -------------------------------------------------------------------------
 # SocketIO Events for Complaints (Real-time chat)
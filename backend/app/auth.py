@@ -0,0 +1,168 @@
+"""
+Optional stateless JWT authentication (enabled with ``JWT_AUTH_ENABLED``).
+
+Access tokens carry ``id``, ``role`` and ``partner_category`` claims, so role
+checks in handlers need no database hit; the full User row is only loaded if a
+handler touches any other attribute. Revoked token IDs live in the
+``revoked_token`` table and are mirrored in a per-process set that is reloaded
+at most every ``JWT_BLOCKLIST_CACHE_SECONDS``.
+
+Both claims authorize: ``role`` everywhere, ``partner_category`` for which
+requests a provider may accept or reject. Changing either through the ORM
+records the user's new values in ``user_role_change`` (kept for one
+access-token lifetime). That table is cached alongside the revocation list,
+and access tokens whose claims no longer match are rejected like revoked
+ones. So a demotion or a category change takes effect within the cache
+interval, not when the token expires. The client then refreshes, and the
+refresh reads the claims from the database. Changes made with raw SQL bypass
+this.
+"""
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, g
+from sqlalchemy import event
+from sqlalchemy.orm import attributes
+from flask_jwt_extended import (
+    JWTManager, create_access_token, create_refresh_token, decode_token,
+    get_jwt, verify_jwt_in_request,
+)
+
+from . import db
+from .models import User, RevokedToken, UserRoleChange
+from .replicas import RoutingSession
+
+jwt = JWTManager()
+
+TOKEN_CLAIMS = ('id', 'role', 'partner_category')
+# the claims that grant rights, tracked in user_role_change when they change
+AUTHORIZING_CLAIMS = ('role', 'partner_category')
+
+
+class TokenUser:
+    """Current user built from access-token claims; loads the User row lazily."""
+
+    def __init__(self, claims):
+        object.__setattr__(self, 'id', int(claims['sub']))
+        object.__setattr__(self, 'role', claims.get('role'))
+        object.__setattr__(self, 'partner_category', claims.get('partner_category'))
+        object.__setattr__(self, '_user', None)
+
+    def _load(self):
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self.id))
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+        if name in TOKEN_CLAIMS:
+            object.__setattr__(self, name, value)
+
+
+def token_claims(user):
+    return {'role': user.role, 'partner_category': user.partner_category}
+
+
+def issue_tokens(user):
+    identity = str(user.id)
+    return {
+        'access_token': create_access_token(identity=identity, additional_claims=token_claims(user)),
+        'refresh_token': create_refresh_token(identity=identity),
+    }
+
+
+def issue_access_token(user):
+    return create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+
+
+def _blocklist_cache():
+    return current_app.extensions.setdefault('token_blocklist', {'jtis': set(), 'claims': {}, 'loaded_at': None})
+
+
+def _blocklist():
+    """The per-process blocklist cache, reloaded when older than JWT_BLOCKLIST_CACHE_SECONDS."""
+    cache = _blocklist_cache()
+    ttl = current_app.config.get('JWT_BLOCKLIST_CACHE_SECONDS', 5)
+    now = time.monotonic()
+    if cache['loaded_at'] is None or now - cache['loaded_at'] > ttl:
+        utcnow = datetime.utcnow()
+        cache['jtis'] = set(db.session.execute(
+            db.select(RevokedToken.jti).where(RevokedToken.expires_at > utcnow)
+        ).scalars())
+        cache['claims'] = {row.user_id: (row.role, row.partner_category) for row in db.session.execute(
+            db.select(UserRoleChange.user_id, UserRoleChange.role, UserRoleChange.partner_category)
+            .where(UserRoleChange.expires_at > utcnow)
+        )}
+        cache['loaded_at'] = now
+    return cache
+
+
+def is_token_revoked(jti, fresh=False):
+    """Check the revocation list; `fresh` bypasses the per-process cache."""
+    if fresh:
+        return db.session.get(RevokedToken, jti) is not None
+    return jti in _blocklist()['jtis']
+
+
+def has_stale_claims(claims):
+    """True when the user's role or partner category changed after this access token was issued."""
+    current = _blocklist()['claims'].get(int(claims['sub']))
+    return current is not None and current != tuple(claims.get(name) for name in AUTHORIZING_CLAIMS)
+
+
+def revoke_token(claims):
+    """Add a decoded token to the revocation list (idempotent)."""
+    jti = claims['jti']
+    if db.session.get(RevokedToken, jti) is None:
+        expires_at = datetime.fromtimestamp(claims['exp'], tz=timezone.utc).replace(tzinfo=None)
+        db.session.add(RevokedToken(jti=jti, token_type=claims.get('type'), expires_at=expires_at))
+    _blocklist_cache()['jtis'].add(jti)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _record_claim_changes(session, flush_context, instances):
+    changed = [user for user in session.dirty if isinstance(user, User)
+               and any(attributes.get_history(user, name).deleted for name in AUTHORIZING_CLAIMS)]
+    if not changed:
+        return
+    expires_at = datetime.utcnow() + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    current = _blocklist_cache()['claims']
+    with session.no_autoflush:
+        for user in changed:
+            session.merge(UserRoleChange(user_id=user.id, role=user.role, partner_category=user.partner_category,
+                                         expires_at=expires_at))
+            current[user.id] = (user.role, user.partner_category)
+
+
+@jwt.token_in_blocklist_loader
+def _check_if_token_revoked(jwt_header, jwt_payload):
+    # refresh tokens are rare and long-lived: always consult the table
+    if jwt_payload.get('type') == 'refresh':
+        return is_token_revoked(jwt_payload['jti'], fresh=True)
+    return is_token_revoked(jwt_payload['jti']) or has_stale_claims(jwt_payload)
+
+
+def get_token_user():
+    """TokenUser for a valid bearer access token on this request, else None."""
+    if 'token_user' not in g:
+        g.token_user = None
+        if verify_jwt_in_request(optional=True) is not None:
+            g.token_user = TokenUser(get_jwt())
+    return g.token_user
+
+
+def user_id_from_socket_auth(auth):
+    """User id from the Socket.IO connect `auth` payload ({'token': <access token>}), else None."""
+    token = (auth or {}).get('token') if isinstance(auth, dict) else None
+    if not token:
+        return None
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return None
+    if claims.get('type') != 'access' or is_token_revoked(claims['jti']) or has_stale_claims(claims):
+        return None
+    return int(claims['sub'])
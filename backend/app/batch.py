@@ -0,0 +1,190 @@
+"""
+``POST /batch``: run several API calls in one request and one transaction.
+
+Body::
+
+    {"operations": [{"method": "POST", "path": "/service_requests/5/accept"},
+                    {"method": "PATCH", "path": "/complaints/3/status", "body": {"status": "resolved"}}],
+     "atomic": true}
+
+Each operation is dispatched to the existing view function in a nested
+request context carrying the caller's cookie and Authorization headers, so
+permissions, validation and side effects are exactly those of the single
+endpoints. All operations share one session on one connection transaction
+(``join_transaction_mode='create_savepoint'`` turns the handlers' own commits
+into savepoint releases, which do not expire loaded objects), so the current
+user is loaded once for the whole batch.
+
+* ``atomic`` (default): the first operation answering 4xx/5xx rolls the whole
+  batch back; the operations after it are not run (status 424).
+* ``"atomic": false``: every operation runs in its own SAVEPOINT; failed ones
+  are rolled back on their own and the rest are committed.
+
+Socket emits and immediate emails made by the handlers are held back until
+the transaction has committed, so nothing is announced for rolled-back work.
+Exact duplicate emits are dropped and successive ``inbox_update`` events for
+the same request and room collapse into the last one.
+"""
+import json
+import logging
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import HTTPException
+
+from . import db, socketio
+from .models import User
+
+log = logging.getLogger(__name__)
+
+FORWARDED_HEADERS = ('Cookie', 'Authorization')
+SKIPPED = {'status': 424, 'body': {'msg': 'not run: an earlier operation failed'}}
+
+
+def parse_operations(data):
+    """The list of operations in a /batch body; ValueError describes what is wrong."""
+    operations = (data or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('operations must be a non-empty list')
+    limit = current_app.config.get('BATCH_MAX_OPERATIONS', 100)
+    if len(operations) > limit:
+        raise ValueError(f'at most {limit} operations per batch')
+    for op in operations:
+        if not isinstance(op, dict) or not isinstance(op.get('path'), str) or not op['path'].startswith('/'):
+            raise ValueError('each operation needs a "path" starting with /')
+    return operations
+
+
+# --- transaction ------------------------------------------------------------
+
+def _connection():
+    conn = db.engine.connect()
+    if conn.dialect.name == 'sqlite':
+        # pysqlite defers BEGIN to the first write, so a leading SAVEPOINT would open the
+        # transaction itself and its RELEASE would commit it; issue BEGIN explicitly instead
+        conn.execution_options(isolation_level='AUTOCOMMIT')
+        event.listen(conn, 'begin', lambda c: c.exec_driver_sql('BEGIN'))
+    return conn
+
+
+def _dispatch(prefix, op, headers, batch_endpoint):
+    app = current_app._get_current_object()
+    with app.test_request_context(prefix + op['path'], method=str(op.get('method', 'GET')).upper(),
+                                  json=op.get('body'), headers=headers):
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            if request.endpoint == batch_endpoint:
+                return {'status': 400, 'body': {'msg': 'batches cannot be nested'}}
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            return {'status': e.code, 'body': {'msg': e.description}}
+        except Exception:
+            log.exception('batch operation failed', extra={'event': 'batch.failed', 'path': op['path']})
+            return {'status': 500, 'body': {'msg': 'internal error'}}
+        return {'status': response.status_code, 'body': response.get_json(silent=True)}
+
+
+def run_batch(operations, user_id, atomic=True):
+    """Run `operations` as user `user_id`; returns (results, committed)."""
+    prefix = request.path.rsplit('/', 1)[0]
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    batch_endpoint = request.endpoint
+
+    db.session.close()
+    g.pop('token_user', None)   # reloaded on the batch session by the first operation
+    outer = db.session.registry()
+    conn = _connection()
+    transaction = conn.begin()
+    # one transaction throughout, so savepoint releases need not expire what was loaded
+    # (the current user above all, which every handler looks up)
+    session = Session(bind=conn, join_transaction_mode='create_savepoint', expire_on_commit=False)
+    db.session.registry.set(session)
+    # the identity map only holds weak references; keep the user loaded between operations
+    g.batch_user = session.get(User, user_id)
+    session.commit()   # so each operation's savepoints nest inside its own
+    results, emits, after_commit, committed = [], [], [], False
+    try:
+        for op in operations:
+            g.batch_emits, g.batch_after_commit = [], []
+            savepoint = None if atomic else conn.begin_nested()
+            result = _dispatch(prefix, op, headers, batch_endpoint)
+            results.append(result)
+            if result['status'] < 400:
+                session.commit()
+                if savepoint is not None:
+                    savepoint.commit()
+                emits += g.batch_emits
+                after_commit += g.batch_after_commit
+                continue
+            session.rollback()
+            if atomic:
+                results += [SKIPPED] * (len(operations) - len(results))
+                break
+            savepoint.rollback()
+        else:
+            transaction.commit()
+            committed = True
+    finally:
+        g.pop('batch_emits', None)
+        g.pop('batch_after_commit', None)
+        g.pop('batch_user', None)
+        if transaction.is_active:
+            transaction.rollback()
+        session.close()
+        conn.close()
+        db.session.registry.set(outer)
+    if committed:
+        for args, kwargs in coalesce_emits(emits):
+            socketio.emit(*args, **kwargs)
+        for callback in after_commit:
+            callback()
+    return results, committed
+
+
+# --- socket emits -------------------------------------------------------------
+
+def coalesce_emits(emits):
+    """Drop repeated emits; keep only the last inbox_update per (room, request)."""
+    latest = {}
+    for args, kwargs in emits:
+        event_name = args[0]
+        payload = args[1] if len(args) > 1 else kwargs.get('data')
+        room = kwargs.get('room') or kwargs.get('to')
+        if event_name == 'inbox_update':
+            key = (event_name, room, payload.get('id') or payload['request']['id'])
+        else:
+            key = (event_name, room, json.dumps(payload, sort_keys=True, default=str))
+        latest.pop(key, None)
+        latest[key] = (args, kwargs)
+    return list(latest.values())
+
+
+def in_batch():
+    """True while an operation of POST /batch is running."""
+    return has_app_context() and g.get('batch_emits') is not None
+
+
+def after_batch_commit(callback):
+    """Call `callback` once the batch has committed; it is dropped if the operation is rolled back."""
+    g.batch_after_commit.append(callback)
+
+
+def _deferring(emit):
+    @wraps(emit)
+    def wrapper(*args, **kwargs):
+        if in_batch():
+            g.batch_emits.append((args, kwargs))
+            return None
+        return emit(*args, **kwargs)
+    wrapper.__deferred_in_batches__ = True
+    return wrapper
+
+
+def init_batch(socketio):
+    """Hold `socketio.emit` calls made inside a batch until it commits."""
+    # socketio is a module-level singleton shared by every app
+    if not getattr(socketio.emit, '__deferred_in_batches__', False):
+        socketio.emit = _deferring(socketio.emit)
@@ -0,0 +1,165 @@
+"""
+Bulk import of providers (and their listed services) from CSV or JSONL.
+
+Each batch costs one existence query, one multi-row INSERT for users and one
+for services. Password hashes are computed across a process pool since they
+dominate the per-row cost.
+"""
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from flask import current_app
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+from . import db
+from .models import User, Service
+from .provider_ids import allocate_provider_ids
+
+PROVIDER_FIELDS = ('name', 'email', 'location', 'nid', 'partner_category', 'fee_min', 'fee_max')
+SERVICE_FIELDS = ('title', 'category', 'description', 'price')
+
+
+def read_rows(path, fmt=None):
+    """Yield one dict per provider from a .csv or .jsonl file."""
+    fmt = fmt or ('jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _join_list(value):
+    if isinstance(value, list):
+        return ','.join(v.strip() for v in value if v and v.strip())
+    return value or None
+
+
+def _int_or_none(value):
+    return int(value) if value not in (None, '') else None
+
+
+def _fees(row):
+    """(fee_min, fee_max) of `row`, or None when either is not a whole number."""
+    try:
+        return _int_or_none(row.get('fee_min')), _int_or_none(row.get('fee_max'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _services_for(row, category):
+    """JSONL rows carry a `services` list; CSV rows may carry one service_* column set."""
+    services = row.get('services')
+    if services is None and row.get('service_title'):
+        services = [{f: row.get(f'service_{f}') for f in SERVICE_FIELDS}]
+    return [
+        {
+            'title': s['title'],
+            'category': s.get('category') or category,
+            'description': s.get('description') or None,
+            'price': s.get('price') or None,
+        }
+        for s in services or []
+        if s.get('title')
+    ]
+
+
+def hash_passwords(passwords, executor=None):
+    hasher = partial(generate_password_hash, method=current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt'))
+    if executor is None:
+        return [hasher(p) for p in passwords]
+    return list(executor.map(hasher, passwords, chunksize=16))
+
+
+def _import_batch(batch, executor, stats):
+    # batch-local duplicates: first row wins
+    by_username = {}
+    fees = {}
+    for row in batch:
+        username = (row.get('username') or '').strip()
+        row_fees = _fees(row)
+        if not username or not row.get('password') or not row.get('partner_category') or row_fees is None:
+            stats['invalid'] += 1
+        elif username in by_username:
+            stats['skipped'] += 1
+        else:
+            by_username[username] = row
+            fees[username] = row_fees
+
+    existing = set(db.session.execute(
+        select(User.username).where(User.username.in_(list(by_username)))
+    ).scalars())
+    stats['skipped'] += len(existing)
+    rows = [row for username, row in by_username.items() if username not in existing]
+    if not rows:
+        return
+
+    hashes = hash_passwords([row['password'] for row in rows], executor)
+    provider_ids = allocate_provider_ids(len(rows))
+    now = datetime.utcnow()
+
+    user_params = []
+    for row, password_hash, provider_id in zip(rows, hashes, provider_ids):
+        username = row['username'].strip()
+        params = {f: row.get(f) or None for f in PROVIDER_FIELDS}
+        params.update(
+            username=username,
+            password_hash=password_hash,
+            role='provider',
+            partner_locations=_join_list(row.get('partner_locations')),
+            fee_min=fees[username][0],
+            fee_max=fees[username][1],
+            provider_unique_id=provider_id,
+            created_at=now,
+        )
+        user_params.append(params)
+    db.session.execute(insert(User), user_params)
+
+    # map usernames back to ids with one query to attach services
+    ids = dict(db.session.execute(
+        select(User.username, User.id).where(User.username.in_([p['username'] for p in user_params]))
+    ).all())
+    service_params = [
+        dict(service, provider_id=ids[params['username']], created_at=now)
+        for row, params in zip(rows, user_params)
+        for service in _services_for(row, params['partner_category'])
+    ]
+    if service_params:
+        db.session.execute(insert(Service), service_params)
+
+    db.session.commit()
+    stats['imported'] += len(user_params)
+    stats['services'] += len(service_params)
+
+
+def import_providers(rows, batch_size=500, workers=None):
+    """
+    Import provider rows in batches. Returns a stats dict with counts,
+    elapsed seconds and rows per second.
+    """
+    stats = {'imported': 0, 'services': 0, 'skipped': 0, 'invalid': 0, 'rows': 0}
+    started = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            stats['rows'] += 1
+            if len(batch) >= batch_size:
+                _import_batch(batch, executor, stats)
+                batch = []
+        if batch:
+            _import_batch(batch, executor, stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
@@ -0,0 +1,280 @@
+"""
+Write-behind persistence for chat messages (``CHAT_WRITE_BEHIND``).
+
+By default the message endpoints commit each row before emitting it. In
+write-behind mode they hand the message to this process's ``ChatWriter``
+instead, which:
+
+* gives it its final id at once, from a block of ``CHAT_ID_BLOCK_SIZE`` ids
+  reserved in the database (the chat_message id sequence on PostgreSQL, an
+  ``id_counter`` row elsewhere). The emitted message already carries the id
+  it will have in the table, and ids increase in send order within a process;
+* appends it to a local journal and flushes that to the OS before the emit,
+  so a crashed process loses nothing. The journal is not fsynced: a host
+  crash or power loss can still lose what was not inserted yet, up to one
+  flush interval of messages;
+* inserts everything buffered every ``CHAT_FLUSH_INTERVAL_MS``, at most
+  ``CHAT_FLUSH_BATCH_SIZE`` rows per transaction. The interval bounds how far
+  the table lags behind the chat.
+
+Each process writes its own journal in ``CHAT_JOURNAL_DIR``, holding an
+exclusive flock on it. The journal is rotated at every flush and deleted
+once its rows are committed. A new writer first replays every journal that
+no live process holds. A row already in the table with the same id, sender
+and text is skipped, so a replay that overlaps a flush does no harm. A row
+whose id is taken by a different message cannot be written. It is appended
+to ``dead-letter/chat_message.jsonl`` under the journal directory and logged
+as an error, and the rest of the buffer goes on being written.
+
+Reading a chat flushes this process's buffer first, so a sender always reads
+back their own messages; other workers see them within the flush interval.
+Messages sent inside POST /batch are written synchronously, so they roll
+back with the batch. On SQLite those, and the rows of any worker running
+without write-behind, take their id from the same counter (``before_insert``
+below), inside their own transaction: an autoincrement id could fall in a
+block a writer has already reserved.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from flask import current_app
+from sqlalchemy import event, func, insert, select, text, update
+
+from . import db, socketio
+from .batch import in_batch
+from .models import ChatMessage, IdCounter
+
+log = logging.getLogger(__name__)
+
+CHAT_ID_COUNTER = 'chat_message_id'
+_create_lock = threading.Lock()
+
+
+def _take_ids(conn, count):
+    """The next `count` ids of the id_counter row, in `conn`'s transaction."""
+    counter = IdCounter.__table__
+    # start above rows written before the writer was enabled
+    floor = conn.execute(select(func.coalesce(func.max(ChatMessage.id), 0))).scalar()
+    end = conn.execute(
+        update(counter).where(counter.c.name == CHAT_ID_COUNTER)
+        .values(value=func.max(counter.c.value, floor) + count).returning(counter.c.value)
+    ).scalar()
+    if end is None:
+        # the UPDATE above already holds the write lock
+        end = floor + count
+        conn.execute(insert(counter).values(name=CHAT_ID_COUNTER, value=end))
+    return list(range(end - count + 1, end + 1))
+
+
+def reserve_ids(count):
+    """Reserve `count` chat_message ids in their own transaction."""
+    with db.engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            return conn.execute(
+                text("SELECT nextval(pg_get_serial_sequence('chat_message', 'id')) FROM generate_series(1, :n)"),
+                {'n': count},
+            ).scalars().all()
+        return _take_ids(conn, count)
+
+
+@event.listens_for(ChatMessage, 'before_insert')
+def _id_from_counter(mapper, connection, target):
+    # PostgreSQL hands out ids from the one sequence either way
+    if target.id is None and connection.dialect.name != 'postgresql':
+        target.id = _take_ids(connection, 1)[0]
+
+
+def insert_missing(rows, batch_size, conflicts):
+    """
+    Insert the rows whose id is not in chat_message yet; returns how many were inserted.
+    Rows whose id is taken by a different message are not inserted but appended to `conflicts`.
+    """
+    table = ChatMessage.__table__
+    inserted = 0
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        with db.engine.begin() as conn:
+            existing = {row.id: (row.sender_id, row.message) for row in conn.execute(
+                select(table.c.id, table.c.sender_id, table.c.message)
+                .where(table.c.id.in_([row['id'] for row in chunk]))
+            )}
+            missing = []
+            for row in chunk:
+                if row['id'] not in existing:
+                    missing.append(row)
+                elif existing[row['id']] != (row['sender_id'], row['message']):
+                    conflicts.append(row)
+            if missing:
+                conn.execute(insert(table), missing)
+        inserted += len(missing)
+    return inserted
+
+
+def _encode(row):
+    return (json.dumps({**row, 'created_at': row['created_at'].isoformat()}) + '\n').encode()
+
+
+def _decode(line):
+    row = json.loads(line)
+    row['created_at'] = datetime.fromisoformat(row['created_at'])
+    return row
+
+
+class ChatWriter:
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.journal_dir = Path(config.get('CHAT_JOURNAL_DIR') or Path(app.instance_path) / 'chat_journal')
+        self.interval = config.get('CHAT_FLUSH_INTERVAL_MS', 50) / 1000
+        self.batch_size = config.get('CHAT_FLUSH_BATCH_SIZE', 500)
+        self.block_size = config.get('CHAT_ID_BLOCK_SIZE', 100)
+        self._lock = threading.Lock()          # buffer, ids and the active journal
+        self._flush_lock = threading.Lock()    # one flush at a time
+        self._buffer = []
+        self._journal = None                   # (path, file) receiving new messages
+        self._segments = []                    # [((path, file), rows)] rotated out, not committed yet
+        self._ids = iter(())
+        self._task = None
+
+    # --- sending ----------------------------------------------------------
+
+    def _next_id(self):
+        message_id = next(self._ids, None)
+        if message_id is None:
+            self._ids = iter(reserve_ids(self.block_size))
+            message_id = next(self._ids)
+        return message_id
+
+    def _open_journal(self):
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        path = self.journal_dir / f'{os.getpid()}-{uuid.uuid4().hex}.jsonl'
+        journal = open(path, 'ab')
+        fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return path, journal
+
+    def submit(self, sender, **fields):
+        """Buffer a new message from `sender`; returns it serialized like ChatMessage.to_dict()."""
+        with self._lock:
+            row = {'id': self._next_id(), 'complaint_id': None, 'service_request_id': None,
+                   'sender_id': sender.id, 'created_at': datetime.utcnow(), **fields}
+            if self._journal is None:
+                self._journal = self._open_journal()
+            self._journal[1].write(_encode(row))
+            self._journal[1].flush()
+            self._buffer.append(row)
+        self.start()
+        return ChatMessage(**row, sender=sender).to_dict()
+
+    # --- persisting -------------------------------------------------------
+
+    def flush(self):
+        """Insert everything buffered so far; returns how many rows were written."""
+        with self._flush_lock:
+            with self._lock:
+                if self._buffer:
+                    self._segments.append((self._journal, self._buffer))
+                    self._journal, self._buffer = None, []
+                segments = list(self._segments)
+            if not segments:
+                return 0
+            # on failure the segments stay queued, with their journals, for the next flush
+            conflicts = []
+            written = insert_missing([row for _, rows in segments for row in rows], self.batch_size, conflicts)
+            self._dead_letter(conflicts)
+            del self._segments[:len(segments)]
+            for (path, journal), _ in segments:
+                journal.close()
+                path.unlink()
+            return written
+
+    def _dead_letter(self, rows):
+        """Set aside rows whose id another message took, where replay() will not pick them up."""
+        if not rows:
+            return
+        path = self.journal_dir / 'dead-letter' / 'chat_message.jsonl'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'ab') as dead_letter:
+            fcntl.flock(dead_letter, fcntl.LOCK_EX)
+            dead_letter.write(b''.join(_encode(row) for row in rows))
+        log.error('chat messages with conflicting ids set aside', extra={
+            'event': 'chat.dead_letter', 'ids': [row['id'] for row in rows], 'path': str(path)})
+
+    def replay(self):
+        """Insert rows from the journals of processes that died; returns how many were inserted."""
+        inserted = 0
+        for path in sorted(self.journal_dir.glob('*.jsonl')):
+            with open(path, 'rb') as journal:
+                try:
+                    fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue   # a live writer (possibly this one) still holds it
+                rows = []
+                for line in journal:
+                    try:
+                        rows.append(_decode(line))
+                    except ValueError:
+                        # torn last line from a crash mid-write: that message was never emitted
+                        log.warning('skipping unreadable journal line', extra={'event': 'chat.journal_skip',
+                                                                                 'journal': str(path)})
+                conflicts = []
+                inserted += insert_missing(rows, self.batch_size, conflicts)
+                self._dead_letter(conflicts)
+                path.unlink()
+        if inserted:
+            log.info('chat journal replayed', extra={'event': 'chat.replayed', 'count': inserted})
+        return inserted
+
+    def _flush_forever(self):
+        while True:
+            socketio.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    log.exception('chat flush failed', extra={'event': 'chat.flush_failed'})
+
+    def start(self):
+        """Start the background flusher (CHAT_FLUSH_INTERVAL_MS 0 leaves flushing to readers)."""
+        if self._task is None and self.interval > 0:
+            with _create_lock:
+                if self._task is None:
+                    self._task = socketio.start_background_task(self._flush_forever)
+
+
+def chat_writer():
+    """This process's ChatWriter, or None to write synchronously (write-behind off, or inside a batch)."""
+    app = current_app._get_current_object()
+    if not app.config.get('CHAT_WRITE_BEHIND') or in_batch():
+        return None
+    writer = app.extensions.get('chat_writer')
+    if writer is None:
+        with _create_lock:
+            writer = app.extensions.get('chat_writer')
+            if writer is None:
+                writer = ChatWriter(app)
+                writer.replay()
+                app.extensions['chat_writer'] = writer
+    return writer
+
+
+def flush_chat():
+    """Persist this process's buffered messages before a chat is read."""
+    writer = chat_writer()
+    if writer is not None:
+        writer.flush()
+
+
+def start_chat_writer(app):
+    """Replay leftover journals and start flushing at startup instead of on the first message."""
+    if not app.config.get('CHAT_WRITE_BEHIND'):
+        return None
+    with app.app_context():
+        writer = chat_writer()
+    writer.start()
+    return writer
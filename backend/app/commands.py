@@ -0,0 +1,106 @@
+"""
+Flask CLI commands (``flask <command>``).
+"""
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('import-providers')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='Input format (default: from file extension).')
+@click.option('--batch-size', default=500, show_default=True, help='Rows per INSERT batch.')
+@click.option('--workers', default=None, type=int,
+              help='Password hashing processes (default: CPU count, 1 disables the pool).')
+@with_appcontext
+def import_providers_command(path, fmt, batch_size, workers):
+    """Bulk import providers and their services from CSV or JSONL."""
+    from .bulk_import import read_rows, import_providers
+
+    stats = import_providers(read_rows(path, fmt), batch_size=batch_size, workers=workers)
+    click.echo(
+        f"Imported {stats['imported']} providers ({stats['services']} services), "
+        f"skipped {stats['skipped']} existing, {stats['invalid']} invalid "
+        f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+@click.command('expire-subscriptions')
+@click.option('--batch-size', default=None, type=int, help='Users per UPDATE (default: PREMIUM_SWEEP_BATCH_SIZE).')
+@click.option('--max-batches', default=None, type=int, help='Batches per run (default: PREMIUM_SWEEP_MAX_BATCHES).')
+@with_appcontext
+def expire_subscriptions_command(batch_size, max_batches):
+    """Downgrade users whose premium subscription has lapsed (for cron)."""
+    from .subscriptions import expire_subscriptions
+
+    expired = expire_subscriptions(batch_size=batch_size, max_batches=max_batches)
+    click.echo(f'Expired {expired} subscriptions')
+
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys_command():
+    """Delete stored Idempotency-Key responses past their TTL (for cron)."""
+    from .idempotency import purge_expired
+
+    click.echo(f'Purged {purge_expired()} idempotency records')
+
+
+@click.command('send-email-digests')
+@with_appcontext
+def send_email_digests_command():
+    """Send the email digests that are due (the background sender does this every EMAIL_DIGEST_INTERVAL)."""
+    from .email_digest import send_digests
+
+    click.echo(f'Sent {send_digests()} email digests')
+
+
+@click.command('maintain-partitions')
+@click.option('--ahead', default=None, type=int, help='Months to create ahead (default: PARTITION_MONTHS_AHEAD).')
+@with_appcontext
+def maintain_partitions_command(ahead):
+    """Create upcoming monthly partitions and detach expired ones (for cron)."""
+    from .partitions import maintain_partitions
+
+    for table, (created, detached) in maintain_partitions(ahead=ahead).items():
+        click.echo(f"{table}: created {', '.join(created) or 'none'}; detached {', '.join(detached) or 'none'}")
+
+
+@click.command('index-complaints')
+@click.option('--batch-size', default=500, show_default=True, help='Complaints per transaction.')
+@with_appcontext
+def index_complaints_command(batch_size):
+    """Add complaints filed before near-duplicate detection to its index, oldest first."""
+    from .near_duplicates import index_complaints
+
+    click.echo(f'Indexed {index_complaints(batch_size=batch_size)} complaints')
+
+
+@click.command('load-schema')
+@with_appcontext
+def load_schema_command():
+    """Create the head schema in an empty database (SQLite: from the snapshot, in one step)."""
+    from .schema import provision_schema
+
+    provision_schema()
+    click.echo('Schema created')
+
+
+@click.command('dump-schema')
+def dump_schema_command():
+    """Regenerate migrations/schema.sqlite.sql after adding a revision."""
+    from .schema import SNAPSHOT_PATH, build_snapshot
+
+    SNAPSHOT_PATH.write_text(build_snapshot())
+    click.echo(f'Wrote {SNAPSHOT_PATH}')
+
+
+def register_commands(app):
+    app.cli.add_command(import_providers_command)
+    app.cli.add_command(expire_subscriptions_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(send_email_digests_command)
+    app.cli.add_command(maintain_partitions_command)
+    app.cli.add_command(index_complaints_command)
+    app.cli.add_command(load_schema_command)
+    app.cli.add_command(dump_schema_command)
@@ -0,0 +1,65 @@
+"""
+Response compression for the API blueprint.
+
+Buffered responses of at least ``COMPRESS_MIN_SIZE`` bytes with a
+compressible mimetype are brotli- (when the ``brotli`` package is installed)
+or gzip-encoded according to the client's Accept-Encoding. Streamed
+responses (the CSV/NDJSON exports) are left alone.
+"""
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html',
+}
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def compress_response(response):
+    config = current_app.config
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.content_length or 0) < config['COMPRESS_MIN_SIZE']:
+        return response
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(response.get_data(), encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    etag, _ = response.get_etag()
+    if etag:
+        # a different representation than the uncompressed body
+        response.set_etag(f'{etag}-{encoding}', weak=True)
+    return response
+
+
+def init_compression(app, blueprint):
+    """Compress `blueprint` responses (unless COMPRESS_ENABLED is false)."""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    app.after_request_funcs.setdefault(blueprint.name, []).append(compress_response)
@@ -0,0 +1,133 @@
+"""
+``GET /dashboard``: everything the dashboards and the profile page load on
+mount - the user, their service requests, notifications, complaints and (for
+providers) warnings - in one response.
+
+The user row is loaded once and each list is a single query with the joins
+its serializer needs, all on the request's one session. The JSON-ready
+payload is cached per user for ``DASHBOARD_CACHE_SECONDS``. It is dropped
+whenever something is emitted to the user's ``user_<id>`` socket room (the
+same events that make clients refresh) and after every successful write the
+user makes through the API, so a cached dashboard is never older than the
+last change the user could have been told about. Payloads built from a read
+replica are served but not cached. The cache is per process; the TTL bounds
+what other workers may serve.
+"""
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request, session
+from sqlalchemy.orm import joinedload
+
+from .inbox import inbox_queries
+from .models import ServiceRequest, Notification, Complaint, Warning
+from .partitions import recent
+
+
+def _cache():
+    return current_app.extensions.setdefault('dashboard_cache', {})
+
+
+def invalidate_dashboard(*user_ids):
+    cache = _cache()
+    for user_id in user_ids:
+        cache.pop(user_id, None)
+
+
+def _rows(model, *queries, eager=()):
+    serialize = model.serializer.as_json
+    return [serialize(row) for query in queries for row in query.options(*eager)]
+
+
+def _service_requests(user):
+    eager = [joinedload(ServiceRequest.provider)]
+    if user.role == 'provider':
+        return _rows(ServiceRequest, *inbox_queries(user), eager=eager)
+    requests = ServiceRequest.query.filter_by(user_id=user.id).order_by(ServiceRequest.created_at.desc())
+    return _rows(ServiceRequest, requests, eager=eager)
+
+
+def _complaints(user):
+    if user.role == 'admin':
+        query = Complaint.query
+    elif user.role == 'provider':
+        query = Complaint.query.filter_by(provider_id=user.id)
+    else:
+        query = Complaint.query.filter_by(user_id=user.id)
+    return _rows(Complaint, query.order_by(Complaint.created_at.desc()),
+                 eager=[joinedload(Complaint.user), joinedload(Complaint.provider)])
+
+
+def _warnings(user):
+    if user.role != 'provider':
+        return []
+    warnings = Warning.query.filter_by(provider_id=user.id).order_by(Warning.created_at.desc())
+    return _rows(Warning, warnings, eager=[
+        joinedload(Warning.complaint), joinedload(Warning.provider), joinedload(Warning.admin)])
+
+
+def build_dashboard(user):
+    notifications = (Notification.query
+                     .filter(Notification.recipient_id == user.id, *recent(Notification, user.created_at))
+                     .order_by(Notification.created_at.desc()))
+    return {
+        'user': user.as_json(),
+        'service_requests': _service_requests(user),
+        'notifications': _rows(Notification, notifications),
+        'complaints': _complaints(user),
+        'warnings': _warnings(user),
+    }
+
+
+def get_dashboard(user):
+    """
+    The dashboard payload for `user`, from the cache while it is fresh. Payloads read
+    from a replica are not cached: the lag they may carry would outlive the invalidation.
+    """
+    cache = _cache()
+    ttl = current_app.config.get('DASHBOARD_CACHE_SECONDS', 30)
+    entry = cache.get(user.id)
+    if entry is None or time.monotonic() - entry[1] > ttl:
+        if g.get('db_replica') is not None:
+            return build_dashboard(user)
+        entry = cache[user.id] = (build_dashboard(user), time.monotonic())
+    return entry[0]
+
+
+# --- invalidation -----------------------------------------------------------
+
+def _user_room_id(room):
+    if isinstance(room, str) and room.startswith('user_'):
+        try:
+            return int(room[len('user_'):])
+        except ValueError:
+            return None
+    return None
+
+
+def _invalidating(emit):
+    @wraps(emit)
+    def wrapper(*args, **kwargs):
+        user_id = _user_room_id(kwargs.get('room') or kwargs.get('to'))
+        if user_id is not None and has_app_context():
+            invalidate_dashboard(user_id)
+        return emit(*args, **kwargs)
+    wrapper.__invalidates_dashboard__ = True
+    return wrapper
+
+
+def _invalidate_after_write(response):
+    if request.method != 'GET' and response.status_code < 400:
+        token_user = g.get('token_user')
+        user_id = token_user.id if token_user is not None else session.get('user_id')
+        if user_id:
+            invalidate_dashboard(user_id)
+    return response
+
+
+def init_dashboard(app, blueprint, socketio):
+    """Hook dashboard cache invalidation into `socketio.emit` and `blueprint` writes."""
+    app.after_request_funcs.setdefault(blueprint.name, []).append(_invalidate_after_write)
+    # socketio is a module-level singleton shared by every app
+    if not getattr(socketio.emit, '__invalidates_dashboard__', False):
+        socketio.emit = _invalidating(socketio.emit)
@@ -0,0 +1,90 @@
+"""
+Priority dispatch queue for pending service requests.
+
+Each request gets a ``dispatch_at`` timestamp when it is created: its
+``created_at``, moved ``DISPATCH_PREMIUM_BOOST_MINUTES`` earlier when the
+requester has an active premium subscription. Providers see pending requests
+of their (category, location) in ``dispatch_at`` order, so premium requests
+come first while a free request that has waited longer than the boost still
+overtakes newer premium ones (aging without any periodic re-ranking). The
+ordering is static, which lets the ``(category, status, dispatch_at)`` index
+serve the queue directly.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, func, literal, or_, select, update
+
+from . import db
+from .matching import provider_locations
+from .models import ServiceRequest, ServiceRequestRejection
+from .subscriptions import is_premium_active
+
+
+def premium_boost():
+    return timedelta(minutes=current_app.config.get('DISPATCH_PREMIUM_BOOST_MINUTES', 120))
+
+
+def normalize_location(location):
+    return (location or '').strip().lower()
+
+
+def enqueue(sr, user):
+    """Set the queue fields of a new request from its requester."""
+    sr.created_at = sr.created_at or datetime.utcnow()
+    sr.location = normalize_location(user.location)
+    sr.is_priority = is_premium_active(user)
+    sr.dispatch_at = sr.created_at - premium_boost() if sr.is_priority else sr.created_at
+
+
+def reprioritize_pending(user_id, premium):
+    """Re-rank a user's pending requests after their subscription changes."""
+    boost = premium_boost() if premium else timedelta()
+    # computed here rather than in SQL: datetime arithmetic differs per dialect
+    rows = db.session.execute(
+        select(ServiceRequest.id, ServiceRequest.created_at)
+        .where(ServiceRequest.user_id == user_id, ServiceRequest.status == 'pending')
+    ).all()
+    if rows:
+        db.session.execute(update(ServiceRequest), [
+            {'id': request_id, 'is_priority': premium, 'dispatch_at': created_at - boost}
+            for request_id, created_at in rows
+        ])
+
+
+def _like_literal(column, escape='/'):
+    """`column` escaped for use as a LIKE pattern that matches its value literally."""
+    for char in (escape, '%', '_'):
+        column = func.replace(column, char, escape + char)
+    return column
+
+
+def location_filter(provider):
+    """
+    SQL twin of matching.location_matches: requests without a location, or whose
+    offer was widened to the whole category, match everyone.
+    """
+    clauses = [ServiceRequest.location == '', ServiceRequest.location.is_(None), ServiceRequest.escalation_level > 0]
+    for location in provider_locations(provider):
+        # both sides are user input: the stored location is a pattern here, so escape it too
+        clauses += [ServiceRequest.location.contains(location, autoescape=True),
+                    literal(location).contains(_like_literal(ServiceRequest.location), escape='/')]
+    return or_(*clauses)
+
+
+def queue_query(provider, after=None):
+    """Pending requests for `provider`, highest priority first (`after`: keyset cursor request)."""
+    declined = select(ServiceRequestRejection.service_request_id).where(
+        ServiceRequestRejection.provider_id == provider.id)
+    query = ServiceRequest.query.filter(
+        ServiceRequest.category == provider.partner_category,
+        ServiceRequest.status == 'pending',
+        location_filter(provider),
+        ServiceRequest.id.not_in(declined),
+    )
+    if after is not None:
+        query = query.filter(or_(
+            ServiceRequest.dispatch_at > after.dispatch_at,
+            and_(ServiceRequest.dispatch_at == after.dispatch_at, ServiceRequest.id > after.id),
+        ))
+    return query.order_by(ServiceRequest.dispatch_at, ServiceRequest.id)
@@ -0,0 +1,159 @@
+"""
+Email delivery with optional per-user digests.
+
+Users who set ``email_digest_minutes`` do not get one email per event. Each
+email becomes a ``pending_email`` row, due ``email_digest_minutes`` after it
+was queued. Once the oldest pending row for a recipient is due, the sender
+mails them a single summary of everything pending. A busy provider therefore
+gets at most one email per window instead of one per new request. Queued
+rows are added to the caller's session, so a fan-out to hundreds of
+providers is one batched INSERT in the request's transaction.
+
+``send_digests`` handles up to ``EMAIL_DIGEST_BATCH_SIZE`` due recipients
+per batch: one query for their rows, one for the users, and every digest
+sent over a single SMTP connection. The rows are locked with SKIP LOCKED,
+so concurrent senders on PostgreSQL split the work instead of sending twice.
+Rows are deleted only once their digest has gone out, and a failed send is
+retried on the next pass. It runs every ``EMAIL_DIGEST_INTERVAL`` seconds in
+the background and as ``flask send-email-digests``.
+"""
+import logging
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import delete, func, select
+
+from . import db, mail, socketio
+from .batch import after_batch_commit, in_batch
+from .models import PendingEmail, User
+
+log = logging.getLogger(__name__)
+
+
+def _has_email(user):
+    return bool(user.email and user.email.strip())
+
+
+def _send(message, fields):
+    try:
+        mail.send(message)
+        log.info('email sent', extra={'event': 'email.sent', **fields})
+    except Exception:
+        log.warning('email send failed', exc_info=True, extra={'event': 'email.failed', **fields})
+
+
+def deliver_email(recipient, subject, body, summary, sender, **log_fields):
+    """
+    Email `recipient` now, or queue `summary` for their digest.
+
+    Queued rows are added to the session; the caller commits. Inside POST /batch the
+    email is sent once the batch has committed.
+    """
+    fields = {'recipient_id': recipient.id, **log_fields}
+    if not _has_email(recipient):
+        log.debug('recipient has no email address', extra={'event': 'email.skipped', **fields})
+        return
+    if recipient.email_digest_minutes:
+        now = datetime.utcnow()
+        db.session.add(PendingEmail(recipient_id=recipient.id, subject=subject, message=summary, created_at=now,
+                                    send_after=now + timedelta(minutes=recipient.email_digest_minutes)))
+        log.debug('email queued for digest', extra={'event': 'email.queued', **fields})
+        return
+    message = Message(subject=subject, recipients=[recipient.email], body=body, sender=sender)
+    if in_batch():
+        after_batch_commit(lambda: _send(message, fields))
+        return
+    _send(message, fields)
+
+
+def digest_message(user, pending):
+    config = current_app.config
+    count = len(pending)
+    lines = '\n'.join(f'- {p.subject}: {p.message}' for p in pending)
+    return Message(
+        subject=f"ServiceHub: {count} new update{'s' if count != 1 else ''}",
+        recipients=[user.email],
+        body=(f'Hello {user.username},\n\nHere is what happened since {pending[0].created_at:%Y-%m-%d %H:%M} UTC:'
+              f'\n\n{lines}\n\nPlease check your dashboard for details.\n\nBest regards,\nServiceHub Team'),
+        sender=config.get('MAIL_PROVIDER_SENDER' if user.role == 'provider' else 'MAIL_USER_SENDER'),
+    )
+
+
+def _send_batch(recipient_ids):
+    """Mail the digests for `recipient_ids` over one connection; returns (sent, failed recipient ids)."""
+    pending = db.session.execute(
+        select(PendingEmail).where(PendingEmail.recipient_id.in_(recipient_ids))
+        .order_by(PendingEmail.recipient_id, PendingEmail.id).with_for_update(skip_locked=True)
+    ).scalars().all()
+    users = {u.id: u for u in User.query.filter(User.id.in_(recipient_ids))}
+    done, failed, sent = [], [], 0
+    with mail.connect() as connection:
+        for recipient_id, rows in groupby(pending, key=lambda p: p.recipient_id):
+            rows = list(rows)
+            user = users.get(recipient_id)
+            if user is not None and _has_email(user):
+                try:
+                    connection.send(digest_message(user, rows))
+                    sent += 1
+                except Exception:
+                    log.warning('digest send failed', exc_info=True,
+                                extra={'event': 'email.digest_failed', 'recipient_id': recipient_id})
+                    failed.append(recipient_id)
+                    continue
+            # without an address there is nobody to send to: drop the rows
+            done.extend(p.id for p in rows)
+    if done:
+        db.session.execute(delete(PendingEmail).where(PendingEmail.id.in_(done)))
+    db.session.commit()
+    return sent, failed
+
+
+def send_digests(now=None, batch_size=None, max_batches=None):
+    """Send every digest that is due; returns how many were sent."""
+    config = current_app.config
+    now = now or datetime.utcnow()
+    batch_size = batch_size or config.get('EMAIL_DIGEST_BATCH_SIZE', 500)
+    max_batches = max_batches or config.get('EMAIL_DIGEST_MAX_BATCHES', 20)
+
+    sent, failed = 0, []
+    for _ in range(max_batches):
+        # recipients whose send failed are retried on the next run, not in this one
+        due = db.session.execute(
+            select(PendingEmail.recipient_id).where(PendingEmail.recipient_id.not_in(failed))
+            .group_by(PendingEmail.recipient_id)
+            .having(func.min(PendingEmail.send_after) <= now).limit(batch_size)
+        ).scalars().all()
+        if not due:
+            break
+        batch_sent, batch_failed = _send_batch(due)
+        sent += batch_sent
+        failed.extend(batch_failed)
+        if len(due) < batch_size:
+            break
+
+    if sent:
+        log.info('email digests sent', extra={'event': 'email.digests_sent', 'count': sent})
+    return sent
+
+
+def start_digest_sender(app):
+    """Run send_digests every EMAIL_DIGEST_INTERVAL seconds in a background task."""
+    interval = app.config.get('EMAIL_DIGEST_INTERVAL')
+    if not interval:
+        return None
+
+    def send_forever():
+        while True:
+            with app.app_context():
+                try:
+                    send_digests()
+                except Exception:
+                    db.session.rollback()
+                    log.exception('email digest run failed', extra={'event': 'email.digest_run_failed'})
+                finally:
+                    db.session.remove()
+            socketio.sleep(interval)
+
+    return socketio.start_background_task(send_forever)
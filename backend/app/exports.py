@@ -0,0 +1,161 @@
+"""
+Streaming export helpers for admin data dumps.
+
+Rows are read through a server-side cursor (``stream_results`` + ``yield_per``)
+and written out one partition at a time, so memory use stays bounded no
+matter how many rows the table holds.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from . import db
+from .models import User, ServiceRequest, Complaint, Warning
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched from the cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+
+def complaint_export_query(status=None):
+    """Flat select matching Complaint.to_dict() without lazy loads."""
+    reporter = aliased(User)
+    provider = aliased(User)
+    stmt = (
+        select(
+            Complaint.id,
+            Complaint.user_id,
+            reporter.username.label('user_username'),
+            Complaint.provider_id,
+            provider.username.label('provider_username'),
+            provider.provider_unique_id.label('provider_unique_id'),
+            Complaint.service_request_id,
+            Complaint.title,
+            Complaint.description,
+            Complaint.status,
+            Complaint.admin_response,
+            Complaint.created_at,
+            Complaint.updated_at,
+        )
+        .outerjoin(reporter, Complaint.user_id == reporter.id)
+        .outerjoin(provider, Complaint.provider_id == provider.id)
+        .order_by(Complaint.id)
+    )
+    if status:
+        stmt = stmt.where(Complaint.status == status)
+    return stmt
+
+
+def warning_export_query():
+    """Flat select matching Warning.to_dict() without lazy loads."""
+    provider = aliased(User)
+    admin = aliased(User)
+    return (
+        select(
+            Warning.id,
+            Warning.complaint_id,
+            Complaint.title.label('complaint_title'),
+            Warning.provider_id,
+            provider.username.label('provider_username'),
+            Warning.admin_id,
+            admin.username.label('admin_username'),
+            Warning.message,
+            Warning.created_at,
+        )
+        .outerjoin(Complaint, Warning.complaint_id == Complaint.id)
+        .outerjoin(provider, Warning.provider_id == provider.id)
+        .outerjoin(admin, Warning.admin_id == admin.id)
+        .order_by(Warning.id)
+    )
+
+
+def service_request_export_query(status=None):
+    """Flat select matching ServiceRequest.to_dict() without lazy loads."""
+    provider = aliased(User)
+    stmt = (
+        select(
+            ServiceRequest.id,
+            ServiceRequest.user_id,
+            ServiceRequest.provider_id,
+            provider.provider_unique_id.label('provider_unique_id'),
+            ServiceRequest.category,
+            ServiceRequest.description,
+            ServiceRequest.status,
+            ServiceRequest.rating,
+            ServiceRequest.review,
+            ServiceRequest.completed_at,
+            ServiceRequest.created_at,
+        )
+        .outerjoin(provider, ServiceRequest.provider_id == provider.id)
+        .order_by(ServiceRequest.id)
+    )
+    if status:
+        stmt = stmt.where(ServiceRequest.status == status)
+    return stmt
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _stream_partitions(stmt, batch_size):
+    result = db.session.execute(
+        stmt.execution_options(stream_results=True, yield_per=batch_size)
+    )
+    try:
+        yield result.keys()
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def stream_csv(stmt, batch_size=EXPORT_BATCH_SIZE):
+    """Yield CSV text chunks (header first, then one chunk per partition)."""
+    parts = _stream_partitions(stmt, batch_size)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(list(next(parts)))
+    for partition in parts:
+        writer.writerows([_csv_value(v) for v in row] for row in partition)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    # header only, when the query returned nothing
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def stream_ndjson(stmt, batch_size=EXPORT_BATCH_SIZE):
+    """Yield newline-delimited JSON chunks, one chunk per partition."""
+    parts = _stream_partitions(stmt, batch_size)
+    keys = list(next(parts))
+    for partition in parts:
+        yield ''.join(
+            json.dumps(dict(zip(keys, (_json_value(v) for v in row)))) + '\n'
+            for row in partition
+        )
+
+
+def stream_export(stmt, fmt, batch_size=EXPORT_BATCH_SIZE):
+    if fmt == 'ndjson':
+        return stream_ndjson(stmt, batch_size)
+    return stream_csv(stmt, batch_size)
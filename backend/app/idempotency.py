@@ -0,0 +1,224 @@
+"""
+``Idempotency-Key`` support for mutating endpoints.
+
+A client that retries a POST sends the same ``Idempotency-Key`` header; the
+first request does the work and its response is stored, later ones get the
+stored response replayed (with ``Idempotent-Replayed: true``) instead of
+creating rows and fanning out again. Keys are scoped to the user and the
+endpoint. Reusing a key with a different request body is refused with 422.
+
+Records live in ``idempotency_record`` for ``IDEMPOTENCY_TTL_SECONDS`` (shared
+by every worker), with an LRU of ``IDEMPOTENCY_CACHE_SIZE`` finished
+responses per process in front. The first request claims its key by
+inserting a ``pending`` row. A concurrent duplicate finds that row and polls
+it for up to ``IDEMPOTENCY_WAIT_SECONDS``; it then replays the response, or
+answers 409 if the first request is still running. Server errors (5xx),
+409 and 429 are not stored, so the request can be retried. A claim is held
+for ``IDEMPOTENCY_CLAIM_SECONDS``, well beyond any request's run time
+(fan-out included); only a claim whose owner died is that old, and it is
+then taken over. A request stores its response, or releases its claim, only
+while the claim is still its own.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import Response, current_app, jsonify, request
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db, socketio
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 100
+# answers that say "not now" rather than "done": the same key may be retried
+RETRYABLE_STATUSES = (409, 429)
+
+
+class ResponseCache:
+    """Small thread-safe LRU of finished responses: scope -> (fingerprint, status, body, mimetype, expires_at)."""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope, now):
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is None or entry[4] <= now:
+                self._entries.pop(scope, None)
+                return None
+            self._entries.move_to_end(scope)
+            return entry
+
+    def put(self, scope, entry):
+        with self._lock:
+            self._entries[scope] = entry
+            self._entries.move_to_end(scope)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+def _cache():
+    cache = current_app.extensions.get('idempotency_cache')
+    if cache is None:
+        cache = current_app.extensions['idempotency_cache'] = ResponseCache(
+            current_app.config.get('IDEMPOTENCY_CACHE_SIZE', 1024))
+    return cache
+
+
+def _fingerprint():
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _replay(entry):
+    _, status, body, mimetype, _ = entry
+    response = Response(body, status=status, mimetype=mimetype)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _mismatch():
+    return jsonify({'msg': f'{HEADER} was already used for a different request'}), 422
+
+
+def _entry(record):
+    return (record.fingerprint, record.response_status, record.response_body,
+            record.response_mimetype, record.expires_at)
+
+
+def _claim(scope, fingerprint, now, hold):
+    """Insert our pending record; the existing record if the key is taken, else None."""
+    try:
+        db.session.add(IdempotencyRecord(key=scope, fingerprint=fingerprint, status='pending', created_at=now,
+                                         expires_at=now + hold))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+    record = db.session.execute(select(IdempotencyRecord).where(IdempotencyRecord.key == scope)).scalar_one_or_none()
+    if record is None:
+        # purged in between
+        return _claim(scope, fingerprint, now, hold)
+    if record.expires_at <= now:
+        # finished long ago, or claimed by a request that never completed: take it over
+        taken = db.session.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key == scope, IdempotencyRecord.expires_at == record.expires_at)
+            .values(fingerprint=fingerprint, status='pending', created_at=now, expires_at=now + hold,
+                    response_status=None, response_body=None, response_mimetype=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if taken:
+            return None
+        db.session.expire(record)
+    return record
+
+
+def _wait_for(scope, wait):
+    """Poll a pending record until it is finished; its cache entry, or None on timeout/abandonment."""
+    deadline = time.monotonic() + wait.total_seconds()
+    delay = 0.02
+    while time.monotonic() < deadline:
+        socketio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+        db.session.rollback()   # see commits made since the last poll
+        record = db.session.execute(select(IdempotencyRecord).where(IdempotencyRecord.key == scope)).scalar_one_or_none()
+        if record is None:
+            return None
+        if record.status == 'done':
+            return _entry(record)
+    return None
+
+
+def _owned(scope, claimed_at):
+    # a takeover rewrites created_at, so the claim time identifies the owner
+    return (IdempotencyRecord.key == scope, IdempotencyRecord.status == 'pending',
+            IdempotencyRecord.created_at == claimed_at)
+
+
+def _store(scope, claimed_at, fingerprint, response, ttl):
+    """Record the response if the claim is still ours; its cache entry, or None if it was taken over."""
+    entry = (fingerprint, response.status_code, response.get_data(), response.mimetype, datetime.utcnow() + ttl)
+    stored = db.session.execute(
+        update(IdempotencyRecord).where(*_owned(scope, claimed_at))
+        .values(status='done', response_status=entry[1], response_body=entry[2], response_mimetype=entry[3],
+                expires_at=entry[4])
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return entry if stored else None
+
+
+def _release(scope, claimed_at):
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyRecord).where(*_owned(scope, claimed_at)))
+    db.session.commit()
+
+
+def idempotent_call(user_id, endpoint, view, *args, **kwargs):
+    """Run `view` once per Idempotency-Key (requests without the header just run it)."""
+    key = request.headers.get(HEADER)
+    if not key:
+        return view(*args, **kwargs)
+    if len(key) > MAX_KEY_LENGTH:
+        return jsonify({'msg': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+    config = current_app.config
+    scope = f'{user_id}:{endpoint}:{key}'
+    fingerprint = _fingerprint()
+    now = datetime.utcnow()
+    cache = _cache()
+    entry = cache.get(scope, now)
+    if entry is None:
+        wait = timedelta(seconds=config.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+        record = _claim(scope, fingerprint, now, timedelta(seconds=config.get('IDEMPOTENCY_CLAIM_SECONDS', 900)))
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                return _mismatch()
+            entry = _entry(record) if record.status == 'done' else _wait_for(scope, wait)
+            if entry is None:
+                response = jsonify({'msg': 'a request with this Idempotency-Key is still in progress'})
+                response.status_code = 409
+                response.headers['Retry-After'] = str(max(1, int(wait.total_seconds())))
+                return response
+            cache.put(scope, entry)
+    if entry is not None:
+        return _mismatch() if entry[0] != fingerprint else _replay(entry)
+
+    try:
+        response = current_app.make_response(view(*args, **kwargs))
+    except Exception:
+        _release(scope, now)
+        raise
+    if response.status_code in RETRYABLE_STATUSES or response.status_code >= 500 or response.is_streamed:
+        _release(scope, now)
+        return response
+    ttl = timedelta(seconds=config.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+    entry = _store(scope, now, fingerprint, response, ttl)
+    if entry is not None:
+        cache.put(scope, entry)
+    return response
+
+
+def purge_expired(now=None, batch_size=1000):
+    """Delete finished records past their TTL; returns how many were removed."""
+    now = now or datetime.utcnow()
+    removed = 0
+    while True:
+        keys = db.session.execute(
+            select(IdempotencyRecord.key).where(IdempotencyRecord.expires_at <= now).limit(batch_size)
+        ).scalars().all()
+        if not keys:
+            return removed
+        db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key.in_(keys),
+                                                           IdempotencyRecord.expires_at <= now))
+        db.session.commit()
+        removed += len(keys)
@@ -0,0 +1,61 @@
+"""
+Provider inbox: actionable pending requests plus the provider's own jobs.
+
+The inbox has two keyset-paginated halves, each served by a composite index:
+
+* the dispatch queue (``dispatch.queue_query``) - pending requests of the
+  provider's category and locations that they have not declined, on
+  ``(category, status, dispatch_at)``;
+* the provider's own accepted and completed jobs, newest first, on
+  ``(provider_id, created_at, id)``.
+
+Requests accepted by other providers never show up in either half. Instead of
+making clients reload the list, every change is pushed to the affected
+providers' ``user_<id>`` rooms as an ``inbox_update`` event:
+``{'op': 'upsert', 'request': {...}}`` or ``{'op': 'remove', 'id': <id>}``.
+"""
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from . import socketio
+from .dispatch import queue_query
+from .models import ServiceRequest
+
+JOB_STATUSES = ('accepted', 'completed')
+
+
+def jobs_query(provider, before=None):
+    """The provider's accepted/completed requests, newest first (`before`: keyset cursor request)."""
+    query = ServiceRequest.query.filter(
+        ServiceRequest.provider_id == provider.id,
+        ServiceRequest.status.in_(JOB_STATUSES),
+    )
+    if before is not None:
+        query = query.filter(or_(
+            ServiceRequest.created_at < before.created_at,
+            and_(ServiceRequest.created_at == before.created_at, ServiceRequest.id < before.id),
+        ))
+    return query.order_by(ServiceRequest.created_at.desc(), ServiceRequest.id.desc())
+
+
+def inbox_queries(provider):
+    """First page of each inbox half: the dispatch queue head, then the newest jobs."""
+    config = current_app.config
+    return (queue_query(provider).limit(config.get('DISPATCH_QUEUE_PAGE_SIZE', 50)),
+            jobs_query(provider).limit(config.get('PROVIDER_JOBS_PAGE_SIZE', 50)))
+
+
+def push_upsert(sr, provider_ids):
+    """Add or refresh `sr` in the inboxes of `provider_ids`."""
+    if not provider_ids:
+        return
+    payload = {'op': 'upsert', 'request': sr.to_dict()}
+    for provider_id in set(provider_ids):
+        socketio.emit('inbox_update', payload, room=f'user_{provider_id}')
+
+
+def push_remove(sr, provider_ids):
+    """Drop `sr` from the inboxes of `provider_ids`."""
+    payload = {'op': 'remove', 'id': sr.id}
+    for provider_id in set(provider_ids):
+        socketio.emit('inbox_update', payload, room=f'user_{provider_id}')
@@ -0,0 +1,66 @@
+"""
+Flask JSON providers.
+
+``JSON_PROVIDER`` selects the encoder used by ``jsonify``/``request.get_json``:
+'orjson', 'stdlib', or 'auto' (orjson when it is installed). Both write
+datetimes as ISO 8601, matching the strings produced by the models' to_dict(),
+so ``as_json()`` output can hand them datetimes directly.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Flask's stdlib provider, with ISO 8601 dates instead of HTTP dates."""
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider; falls back to stdlib json for dumps() options orjson lacks."""
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=self.option),
+                                        mimetype='application/json')
+
+
+def init_json(app):
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    use_orjson = choice == 'orjson' or (choice == 'auto' and orjson is not None)
+    app.json = OrjsonProvider(app) if use_orjson else IsoJSONProvider(app)
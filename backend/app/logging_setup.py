@@ -0,0 +1,131 @@
+"""
+Structured application logging.
+
+Everything under the ``app`` logger goes through a QueueHandler, so request
+threads only enqueue records; a background QueueListener formats them (JSON
+lines by default) and writes to stdout. High-volume events can be sampled via
+``LOG_SAMPLE_RATES`` ({event: fraction kept}); pass the event name as
+``extra={'event': ...}`` along with any other structured fields.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = {k: v for k, v in vars(record).items() if k not in _RESERVED and not k.startswith('_')}
+        if fields:
+            line += ' ' + ' '.join(f'{k}={v}' for k, v in fields.items())
+        return line
+
+
+class EventSampler(logging.Filter):
+    """Keep a fixed fraction of records per `event` (deterministic: every 1/rate-th record)."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        rate = self.rates.get(event)
+        if rate is None or rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        with self.lock:
+            n = self.counts.get(event, 0) + 1
+            self.counts[event] = n
+        return int(n * rate) != int((n - 1) * rate)
+
+
+class _PreparedQueueHandler(QueueHandler):
+    """Resolve message args and tracebacks in the caller, but leave formatting to the listener."""
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(app):
+    """(Re)configure the `app` logger hierarchy from LOG_LEVEL, LOG_FORMAT and LOG_SAMPLE_RATES."""
+    global _listener
+    _stop_listener()
+
+    formatter = TextFormatter() if app.config.get('LOG_FORMAT') == 'text' else JsonFormatter()
+    stream = logging.StreamHandler(app.config.get('LOG_STREAM') or sys.stdout)
+    stream.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    handler = _PreparedQueueHandler(log_queue)
+    handler.addFilter(EventSampler(app.config.get('LOG_SAMPLE_RATES')))
+
+    # app.logger is the 'app' logger, parent of every module logger in the package
+    logger = logging.getLogger('app')
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def flush_logs():
+    """Drain queued records (used on shutdown and in tests)."""
+    global _listener
+    if _listener is not None:
+        handlers = _listener.handlers
+        log_queue = _listener.queue
+        _listener.stop()
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+
+atexit.register(_stop_listener)
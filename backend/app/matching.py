@@ -0,0 +1,30 @@
+"""
+Provider matching for new service requests: same category, and the user's
+location overlapping one of the provider's partner locations.
+"""
+from .models import User
+
+
+def provider_locations(provider):
+    return [l.strip().lower() for l in (provider.partner_locations or '').split(',') if l.strip()]
+
+
+def location_matches(user_location, locations):
+    # Simple string inclusion either way ("Dhanmondi" matches "dhanmondi 27")
+    return any(user_location in pl or pl in user_location for pl in locations)
+
+
+def filter_by_location(user_location, providers):
+    """
+    Providers serving `user_location`. A user without a location matches
+    every provider in the category, to allow testing without strict locations.
+    """
+    user_location = user_location.strip().lower() if user_location else ''
+    if not user_location:
+        return list(providers)
+    return [p for p in providers if location_matches(user_location, provider_locations(p))]
+
+
+def find_matching_providers(user, category):
+    providers_in_category = User.query.filter_by(role='provider', partner_category=category).all()
+    return filter_by_location(user.location, providers_in_category)
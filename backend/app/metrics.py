@@ -0,0 +1,201 @@
+"""
+Per-request latency and SQL instrumentation for the API blueprint.
+
+For every ``api_bp`` request we record wall time, SQL statement count and SQL
+time (via SQLAlchemy cursor events), plus time spent in ``mail.send`` and
+``socketio.emit``. Aggregates are kept as Prometheus-style histograms in
+``app.extensions['metrics']`` and served as text from ``GET /metrics``.
+Statements slower than ``SLOW_QUERY_SECONDS`` are logged when it is set.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_log = logging.getLogger('app.sql.slow')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, labelnames
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {value}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self.series = {}
+
+    def observe(self, labels, value):
+        counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self.series[labels] = (counts, total + value)
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, (counts, total) in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, ("le", bound))} {count}'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, ("le", "+Inf"))} {counts[-1]}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {total}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {counts[-1]}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        route = ('endpoint', 'method')
+        self.requests = Counter('http_requests_total', 'API requests handled.', route + ('status',))
+        self.latency = Histogram('http_request_duration_seconds', 'API request wall time.', route)
+        self.sql_statements = Histogram('http_request_sql_statements', 'SQL statements per API request.',
+                                        route, COUNT_BUCKETS)
+        self.sql_seconds = Histogram('http_request_sql_seconds', 'SQL time per API request.', route)
+        self.mail_seconds = Histogram('http_request_mail_seconds', 'mail.send time per API request.', route)
+        self.emit_seconds = Histogram('http_request_emit_seconds', 'socketio.emit time per API request.', route)
+        self.slow_queries = Counter('sql_slow_queries_total', 'Statements slower than SLOW_QUERY_SECONDS.')
+
+    def record(self, sample, status):
+        route = (sample['endpoint'], sample['method'])
+        with self.lock:
+            self.requests.inc(route + (str(status),))
+            self.latency.observe(route, sample['wall'])
+            self.sql_statements.observe(route, sample['sql_count'])
+            self.sql_seconds.observe(route, sample['sql_seconds'])
+            if sample['mail_seconds']:
+                self.mail_seconds.observe(route, sample['mail_seconds'])
+            if sample['emit_seconds']:
+                self.emit_seconds.observe(route, sample['emit_seconds'])
+
+    def render(self):
+        with self.lock:
+            metrics = (self.requests, self.latency, self.sql_statements, self.sql_seconds,
+                       self.mail_seconds, self.emit_seconds, self.slow_queries)
+            lines = [line for m in metrics for line in m.render()]
+        return '\n'.join(lines) + '\n'
+
+
+def _current_sample():
+    if has_request_context():
+        return g.get('metrics_sample')
+    return None
+
+
+# --- SQLAlchemy hooks (registered once, for every engine) -------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    sample = _current_sample()
+    if sample is None:
+        return
+    sample['sql_count'] += 1
+    sample['sql_seconds'] += elapsed
+    threshold = current_app.config.get('SLOW_QUERY_SECONDS')
+    if threshold and elapsed >= threshold:
+        registry = current_app.extensions['metrics']
+        with registry.lock:
+            registry.slow_queries.inc(())
+        slow_query_log.warning('slow query %.3fs on %s: %s', elapsed, sample['endpoint'], ' '.join(statement.split()),
+                               extra={'event': 'sql.slow', 'duration': elapsed, 'endpoint': sample['endpoint']})
+
+
+def _timed(fn, key):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        sample = _current_sample()
+        if sample is None:
+            return fn(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sample[key] += time.perf_counter() - started
+    wrapper.__wrapped_for_metrics__ = True
+    return wrapper
+
+
+def _install_hooks(mail, socketio):
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    # extension objects are module-level singletons shared by every app
+    if not getattr(mail.send, '__wrapped_for_metrics__', False):
+        mail.send = _timed(mail.send, 'mail_seconds')
+    if not getattr(socketio.emit, '__wrapped_for_metrics__', False):
+        socketio.emit = _timed(socketio.emit, 'emit_seconds')
+
+
+# --- Flask wiring -----------------------------------------------------------
+
+def _start_request():
+    g.metrics_sample = {
+        'endpoint': request.endpoint or 'unknown',
+        'method': request.method,
+        'started': time.perf_counter(),
+        'sql_count': 0,
+        'sql_seconds': 0.0,
+        'mail_seconds': 0.0,
+        'emit_seconds': 0.0,
+    }
+
+
+def _finish_request(response):
+    sample = g.pop('metrics_sample', None)
+    if sample is not None:
+        sample['wall'] = time.perf_counter() - sample['started']
+        current_app.extensions['metrics'].record(sample, response.status_code)
+    return response
+
+
+def metrics_endpoint():
+    return Response(current_app.extensions['metrics'].render(),
+                    mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app, blueprint, mail, socketio):
+    """Instrument `blueprint` and expose GET /metrics (unless METRICS_ENABLED is false)."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.extensions['metrics'] = MetricsRegistry()
+    _install_hooks(mail, socketio)
+    app.before_request_funcs.setdefault(blueprint.name, []).append(_start_request)
+    app.after_request_funcs.setdefault(blueprint.name, []).append(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
@@ -1,6 +1,7 @@
 from . import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from .passwords import hash_password, verify_password, needs_rehash
+from .serializers import Serializer, CsvField, DateTimeField, Related
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -26,44 +27,31 @@ class User(db.Model):
     
     # Premium Membership fields
     is_premium = db.Column(db.Boolean, default=False)
-    subscription_expiry = db.Column(db.DateTime, nullable=True)
+    subscription_expiry = db.Column(db.DateTime, nullable=True, index=True)
 
     # Rating fields
     rating_average = db.Column(db.Float, default=0.0)
     rating_count = db.Column(db.Integer, default=0)
 
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+    # Email digest window in minutes (see app/email_digest.py); None sends each email right away
+    email_digest_minutes = db.Column(db.Integer, nullable=True)
+
+    def set_password(self, password, method=None):
+        self.password_hash = hash_password(password, method)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-    def to_dict(self):
-        skills = self.skills.split(',') if self.skills else []
-        partner_locations = self.partner_locations.split(',') if self.partner_locations else []
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'name': self.name,
-            'created_at': self.created_at.isoformat(),
-            'role': self.role,
-            'location': self.location,
-            'skills': skills,
-            'service_area': self.service_area,
-            'profile_photo': self.profile_photo,
-            'nid': self.nid,
-            'partner_category': self.partner_category,
-            'partner_locations': partner_locations,
-            'fee_min': self.fee_min,
-            'fee_max': self.fee_max,
-            'provider_unique_id': self.provider_unique_id,
-            'is_premium': self.is_premium,
-            'is_premium': self.is_premium,
-            'subscription_expiry': self.subscription_expiry.isoformat() if self.subscription_expiry else None,
-            'rating_average': self.rating_average,
-            'rating_count': self.rating_count,
-        }
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
+
+    serializer = Serializer(
+        'id', 'username', 'email', 'name', DateTimeField('created_at'), 'role', 'location',
+        CsvField('skills'), 'service_area', 'profile_photo', 'nid', 'partner_category',
+        CsvField('partner_locations'), 'fee_min', 'fee_max', 'provider_unique_id', 'is_premium',
+        DateTimeField('subscription_expiry'), 'rating_average', 'rating_count', 'email_digest_minutes',
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
 
 class ServiceRequest(db.Model):
     __tablename__ = 'service_request'
@@ -77,24 +65,29 @@ class ServiceRequest(db.Model):
     review = db.Column(db.Text, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Dispatch queue (see app/dispatch.py): requester location, premium flag and queue position
+    location = db.Column(db.String(200), nullable=True)
+    is_priority = db.Column(db.Boolean, default=False)
+    dispatch_at = db.Column(db.DateTime, nullable=True)
+    # Lifecycle scheduler (see app/request_lifecycle.py): 0 = location-matched providers, 1 = whole category
+    escalation_level = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    next_action_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_service_request_dispatch', 'category', 'status', 'dispatch_at'),
+        db.Index('ix_service_request_next_action', 'status', 'next_action_at'),
+        db.Index('ix_service_request_provider_jobs', 'provider_id', 'created_at', 'id'),
+    )
 
     user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('service_requests', lazy=True))
     provider = db.relationship('User', foreign_keys=[provider_id], backref=db.backref('assigned_requests', lazy=True))
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'provider_id': self.provider_id,
-            'provider_unique_id': self.provider.provider_unique_id if self.provider else None,
-            'category': self.category,
-            'description': self.description,
-            'status': self.status,
-            'rating': self.rating,
-            'review': self.review,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'created_at': self.created_at.isoformat()
-        }
+    serializer = Serializer(
+        'id', 'user_id', 'provider_id', Related('provider_unique_id', 'provider', 'provider_unique_id'),
+        'category', 'description', 'status', 'rating', 'review',
+        DateTimeField('completed_at'), DateTimeField('created_at'), 'is_priority',
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
 
 class Notification(db.Model):
     __tablename__ = 'notification'
@@ -106,14 +99,15 @@ class Notification(db.Model):
 
     recipient = db.relationship('User', backref=db.backref('notifications', lazy=True))
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'recipient_id': self.recipient_id,
-            'message': self.message,
-            'is_read': self.is_read,
-            'created_at': self.created_at.isoformat()
-        }
+    # Partitioned by month on created_at (app/partitions.py); reads are bounded by it
+    __table_args__ = (
+        db.Index('ix_notification_recipient_created', 'recipient_id', 'created_at'),
+    )
+
+    serializer = Serializer(
+        'id', 'recipient_id', 'message', 'is_read', DateTimeField('created_at'),
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
 
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -121,13 +115,8 @@ class Item(db.Model):
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'created_at': self.created_at.isoformat()
-        }
+    serializer = Serializer('id', 'title', 'description', DateTimeField('created_at'))
+    to_dict, as_json = serializer.to_dict, serializer.as_json
 
 
 class Service(db.Model):
@@ -141,18 +130,13 @@ class Service(db.Model):
 
     provider = db.relationship('User', backref=db.backref('services', lazy=True))
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'provider_id': self.provider_id,
-            'provider_username': self.provider.username if self.provider else None,
-            'provider_unique_id': self.provider.provider_unique_id if self.provider else None,
-            'title': self.title,
-            'category': self.category,
-            'description': self.description,
-            'price': self.price,
-            'created_at': self.created_at.isoformat()
-        }
+    serializer = Serializer(
+        'id', 'provider_id',
+        Related('provider_username', 'provider', 'username'),
+        Related('provider_unique_id', 'provider', 'provider_unique_id'),
+        'title', 'category', 'description', 'price', DateTimeField('created_at'),
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
 
 
 class Complaint(db.Model):
@@ -167,27 +151,31 @@ class Complaint(db.Model):
     admin_response = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Near-duplicate detection (app/near_duplicates.py): MinHash signature of title + description,
+    # and the earliest complaint of its near-duplicate cluster (its own id if it started one)
+    minhash = db.Column(db.LargeBinary, nullable=True)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('complaint.id', name='fk_complaint_cluster'),
+                           nullable=True, index=True)
 
     user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('complaints', lazy=True))
     provider = db.relationship('User', foreign_keys=[provider_id], backref=db.backref('complaints_against', lazy=True))
     service_request = db.relationship('ServiceRequest', backref=db.backref('complaints', lazy=True))
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'user_username': self.user.username if self.user else None,
-            'provider_id': self.provider_id,
-            'provider_username': self.provider.username if self.provider else None,
-            'provider_unique_id': self.provider.provider_unique_id if self.provider else None,
-            'service_request_id': self.service_request_id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'admin_response': self.admin_response,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    serializer = Serializer(
+        'id', 'user_id', Related('user_username', 'user', 'username'), 'provider_id',
+        Related('provider_username', 'provider', 'username'),
+        Related('provider_unique_id', 'provider', 'provider_unique_id'),
+        'service_request_id', 'title', 'description', 'status', 'admin_response', 'cluster_id',
+        DateTimeField('created_at'), DateTimeField('updated_at'),
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
+
+
+class ComplaintBucket(db.Model):
+    """LSH index of complaint signatures: one row per band bucket (see app/near_duplicates.py)."""
+    __tablename__ = 'complaint_lsh_bucket'
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    complaint_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), primary_key=True, autoincrement=False)
 
 
 class Warning(db.Model):
@@ -203,18 +191,12 @@ class Warning(db.Model):
     provider = db.relationship('User', foreign_keys=[provider_id], backref=db.backref('warnings_received', lazy=True))
     admin = db.relationship('User', foreign_keys=[admin_id])
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'complaint_id': self.complaint_id,
-            'complaint_title': self.complaint.title if self.complaint else None,
-            'provider_id': self.provider_id,
-            'provider_username': self.provider.username if self.provider else None,
-            'admin_id': self.admin_id,
-            'admin_username': self.admin.username if self.admin else None,
-            'message': self.message,
-            'created_at': self.created_at.isoformat()
-        }
+    serializer = Serializer(
+        'id', 'complaint_id', Related('complaint_title', 'complaint', 'title'), 'provider_id',
+        Related('provider_username', 'provider', 'username'), 'admin_id',
+        Related('admin_username', 'admin', 'username'), 'message', DateTimeField('created_at'),
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_message'
@@ -229,14 +211,103 @@ class ChatMessage(db.Model):
     service_request = db.relationship('ServiceRequest', backref=db.backref('messages', lazy=True, cascade="all, delete-orphan"))
     sender = db.relationship('User', foreign_keys=[sender_id])
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'complaint_id': self.complaint_id,
-            'service_request_id': self.service_request_id,
-            'sender_id': self.sender_id,
-            'sender_username': self.sender.username if self.sender else 'Unknown',
-            'sender_role': self.sender.role if self.sender else 'unknown',
-            'message': self.message,
-            'created_at': self.created_at.isoformat()
-        }
+    # Partitioned by month on created_at (app/partitions.py); reads are bounded by it
+    __table_args__ = (
+        db.Index('ix_chat_message_service_request_created', 'service_request_id', 'created_at'),
+        db.Index('ix_chat_message_complaint_created', 'complaint_id', 'created_at'),
+    )
+
+    serializer = Serializer(
+        'id', 'complaint_id', 'service_request_id', 'sender_id',
+        Related('sender_username', 'sender', 'username', default='Unknown'),
+        Related('sender_role', 'sender', 'role', default='unknown'),
+        'message', DateTimeField('created_at'),
+    )
+    to_dict, as_json = serializer.to_dict, serializer.as_json
+
+
+class ServiceRequestRejection(db.Model):
+    """A provider declining a pending request; the request stays open for the others."""
+    __tablename__ = 'service_request_rejection'
+    service_request_id = db.Column(db.Integer, db.ForeignKey('service_request.id'), primary_key=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SchedulerLease(db.Model):
+    """Time-limited leadership for background loops that must run on a single worker."""
+    __tablename__ = 'scheduler_lease'
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class RateLimitBucket(db.Model):
+    """Token bucket state shared by every worker (RATE_LIMIT_BACKEND='database')."""
+    __tablename__ = 'rate_limit_bucket'
+    key = db.Column(db.String(150), primary_key=True)  # <endpoint>:<user id>
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)  # unix time of the last charge
+
+
+class ReplicaWriteStamp(db.Model):
+    """When each user last wrote through the API, for read-your-writes (see app/replicas.py)."""
+    __tablename__ = 'replica_write_stamp'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    wrote_at = db.Column(db.Float, nullable=False)  # unix time
+
+
+class IdempotencyRecord(db.Model):
+    """Responses stored for Idempotency-Key retries (see app/idempotency.py)."""
+    __tablename__ = 'idempotency_record'
+    key = db.Column(db.String(250), primary_key=True)  # <user id>:<endpoint>:<client key>
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    status = db.Column(db.String(10), nullable=False)  # pending, done
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class PendingEmail(db.Model):
+    """An email held back for the recipient's next digest (see app/email_digest.py)."""
+    __tablename__ = 'pending_email'
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    send_after = db.Column(db.DateTime, nullable=False)  # end of the window this email opened or joined
+
+
+class IdCounter(db.Model):
+    """Named counters for databases without native sequences (SQLite)."""
+    __tablename__ = 'id_counter'
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RevokedToken(db.Model):
+    """JWT IDs revoked before expiry (logout / refresh-token revocation)."""
+    __tablename__ = 'revoked_token'
+    jti = db.Column(db.String(36), primary_key=True)
+    token_type = db.Column(db.String(10), nullable=True)  # access or refresh
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class UserRoleChange(db.Model):
+    """
+    Current role and partner category of users who changed either within the last access-token
+    lifetime; access tokens carrying other claims are rejected (see app/auth.py).
+    """
+    __tablename__ = 'user_role_change'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    role = db.Column(db.String(20), nullable=False)
+    partner_category = db.Column(db.String(100), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+# Native sequence used for provider IDs on PostgreSQL; ignored elsewhere
+provider_unique_id_seq = db.Sequence('provider_unique_id_seq', metadata=db.metadata)
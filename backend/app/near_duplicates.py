@@ -0,0 +1,172 @@
+"""
+Near-duplicate complaints: MinHash signatures with an LSH index.
+
+A complaint's title and description are normalized to lowercase words and
+cut into character 4-grams (shingles). A MinHash signature of
+``NUM_HASHES`` values summarizes the shingle set (``Complaint.minhash``).
+The fraction of positions at which two signatures agree estimates the
+Jaccard similarity of the two sets. Signatures use one-permutation hashing:
+each shingle is hashed once into one of the ``NUM_HASHES`` bins, which keeps
+signing a single pass over the shingles in pure Python. Empty bins borrow
+from the next filled one (rotation densification), so every position can be
+compared.
+
+For the index, the signature is cut into ``BANDS`` bands of ``ROWS`` values.
+Each band hashes to one ``complaint_lsh_bucket`` row. Two complaints that
+agree on a whole band share that bucket. Finding candidates is therefore one
+primary-key probe per band, whatever the number of complaints. With 16 bands
+of 4, a pair at similarity 0.5 becomes a candidate about 64% of the time, at
+0.7 about 99% and at 0.8 over 99.9%. Candidates are then scored with their
+stored signatures against ``COMPLAINT_SIMILARITY_THRESHOLD``. A lookup reads
+at most ``COMPLAINT_SIMILAR_CANDIDATES`` entries per bucket, the newest
+ones, and scores at most that many candidates, those sharing the most
+bands. Its cost is therefore bounded even for buckets that text common to
+many complaints has filled.
+
+`index_complaint` runs in the transaction that creates the complaint and
+assigns its cluster: the cluster of its most similar earlier complaint about
+the same provider, or a new cluster led by itself. Clusters only grow.
+``flask index-complaints`` backfills complaints filed before the index
+existed, oldest first. Changing the constants below invalidates every stored
+signature: empty complaint_lsh_bucket, reset minhash and cluster_id, and run
+the backfill again.
+"""
+import re
+import struct
+import zlib
+from hashlib import blake2b
+
+from flask import current_app
+from sqlalchemy import func, select, union_all
+
+from . import db
+from .models import Complaint, ComplaintBucket
+
+SHINGLE_SIZE = 4
+BIN_BITS = 6
+NUM_HASHES = 1 << BIN_BITS
+BANDS, ROWS = 16, 4
+
+_MASK64 = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15       # odd 64-bit multiplier spreading crc32 into the high bits
+_ROTATION = 0x9E3779B1          # added per step when an empty bin borrows a value
+_EMPTY = 1 << 32                # above every 32-bit value
+_SIGNATURE = struct.Struct(f'<{NUM_HASHES}I')
+_BAND = struct.Struct(f'<B{ROWS}I')
+
+
+def shingles(text):
+    """Character 4-grams of `text` after lowercasing and collapsing it to words."""
+    normalized = ' '.join(re.findall(r'\w+', (text or '').lower()))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """MinHash signature of `text` (a tuple of NUM_HASHES ints), or None when it has no words."""
+    bins = [_EMPTY] * NUM_HASHES
+    for shingle in shingles(text):
+        h = (zlib.crc32(shingle.encode()) * _MIX) & _MASK64
+        index, value = h >> (64 - BIN_BITS), (h >> 16) & 0xFFFFFFFF
+        if value < bins[index]:
+            bins[index] = value
+    if all(value == _EMPTY for value in bins):
+        return None
+    filled = list(bins)
+    for index, value in enumerate(bins):
+        step = 0
+        while value == _EMPTY:
+            step += 1
+            value = bins[(index + step) % NUM_HASHES]
+        filled[index] = (value + step * _ROTATION) & 0xFFFFFFFF
+    return tuple(filled)
+
+
+def complaint_signature(complaint):
+    return signature(f'{complaint.title}\n{complaint.description}')
+
+
+def encode(sig):
+    return _SIGNATURE.pack(*sig)
+
+
+def decode(data):
+    return _SIGNATURE.unpack(data)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind signatures `a` and `b`."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def buckets(sig):
+    """The BANDS bucket keys of `sig` (signed 64-bit, for a BIGINT column)."""
+    return [
+        int.from_bytes(blake2b(_BAND.pack(band, *sig[band * ROWS:(band + 1) * ROWS]), digest_size=8).digest(),
+                       'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def find_similar(sig, exclude_id=None, threshold=None, limit=None):
+    """[(similarity, Complaint)] of the indexed complaints at least `threshold` similar to `sig`, best first."""
+    config = current_app.config
+    threshold = config.get('COMPLAINT_SIMILARITY_THRESHOLD', 0.5) if threshold is None else threshold
+    candidates = config.get('COMPLAINT_SIMILAR_CANDIDATES', 200)
+    # the newest entries of each bucket only, read backwards along the primary key: text common
+    # to many complaints can fill a bucket, and the lookup must not grow with it
+    per_bucket = [
+        select(ComplaintBucket.complaint_id).where(ComplaintBucket.bucket == key)
+        .order_by(ComplaintBucket.complaint_id.desc()).limit(candidates).subquery()
+        for key in buckets(sig)
+    ]
+    hits = union_all(*(select(sub.c.complaint_id) for sub in per_bucket)).subquery()
+    shared = func.count().label('shared')
+    query = (select(hits.c.complaint_id, shared).group_by(hits.c.complaint_id)
+             .order_by(shared.desc(), hits.c.complaint_id.desc()).limit(candidates))
+    if exclude_id is not None:
+        query = query.where(hits.c.complaint_id != exclude_id)
+    candidate_ids = db.session.execute(query).scalars().all()
+    if not candidate_ids:
+        return []
+    scored = [(similarity(sig, decode(c.minhash)), c)
+              for c in Complaint.query.filter(Complaint.id.in_(candidate_ids))]
+    scored = sorted((pair for pair in scored if pair[0] >= threshold), key=lambda pair: (-pair[0], -pair[1].id))
+    return scored[:limit] if limit else scored
+
+
+def similar_to(complaint, limit=None):
+    """Near-duplicates of `complaint`, best first (signing it on the fly if it is not indexed yet)."""
+    sig = decode(complaint.minhash) if complaint.minhash else complaint_signature(complaint)
+    if sig is None:
+        return []
+    return find_similar(sig, exclude_id=complaint.id, limit=limit)
+
+
+def index_complaint(complaint):
+    """Sign `complaint`, add it to the LSH index and to a cluster; the caller commits."""
+    if complaint.id is None:
+        db.session.flush()
+    sig = complaint_signature(complaint)
+    match = None
+    if sig is not None:
+        match = next((c for _, c in find_similar(sig, exclude_id=complaint.id)
+                      if c.provider_id == complaint.provider_id and c.cluster_id is not None), None)
+        complaint.minhash = encode(sig)
+        db.session.add_all(ComplaintBucket(bucket=key, complaint_id=complaint.id) for key in buckets(sig))
+    complaint.cluster_id = match.cluster_id if match is not None else complaint.id
+
+
+def index_complaints(batch_size=500):
+    """Index every complaint not indexed yet, oldest first; returns how many were indexed."""
+    indexed = 0
+    while True:
+        batch = (Complaint.query.filter(Complaint.cluster_id.is_(None))
+                 .order_by(Complaint.id).limit(batch_size).all())
+        if not batch:
+            return indexed
+        for complaint in batch:
+            index_complaint(complaint)
+        db.session.commit()
+        indexed += len(batch)
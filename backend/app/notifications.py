@@ -0,0 +1,58 @@
+"""
+Bulk notification path: one multi-row INSERT for many recipients, then a
+Socket.IO ``notification`` event to each recipient's room.
+
+The events wait for the session to commit: a client that refetches on
+``notification`` must find the row (and its refetch re-caches the
+dashboard). They are dropped if the transaction rolls back instead.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from . import db, socketio
+from .models import Notification
+
+PENDING_KEY = 'pending_notifications'
+
+
+@event.listens_for(Session, 'after_commit')
+def _emit_committed(session):
+    for payload in session.info.pop(PENDING_KEY, ()):
+        socketio.emit('notification', payload, room=f"user_{payload['recipient_id']}")
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _drop_rolled_back(session, transaction):
+    # after_commit has already taken the payloads of a commit
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+def notify_many(messages):
+    """
+    Store and push notifications for ``[(recipient_id, message), ...]``.
+
+    Rows are inserted in the current transaction (the caller commits) and
+    returned as dicts shaped like ``Notification.to_dict()``; the socket events
+    follow the commit.
+    """
+    if not messages:
+        return []
+    now = datetime.utcnow()
+    rows = db.session.execute(
+        insert(Notification).returning(Notification.id, Notification.recipient_id, sort_by_parameter_order=True),
+        [{'recipient_id': rid, 'message': msg, 'is_read': False, 'created_at': now} for rid, msg in messages],
+    ).all()
+    created = now.isoformat()
+    payloads = [{'id': notification_id, 'recipient_id': recipient_id, 'message': message,
+                 'is_read': False, 'created_at': created}
+                for (notification_id, recipient_id), (_, message) in zip(rows, messages)]
+    db.session().info.setdefault(PENDING_KEY, []).extend(payloads)
+    return payloads
+
+
+def notify_users(recipient_ids, message):
+    """Same message to every recipient."""
+    return notify_many([(rid, message) for rid in recipient_ids])
@@ -0,0 +1,139 @@
+"""
+Monthly partitions for ``notification`` and ``chat_message``.
+
+Both tables are append-mostly and read by recent time ranges. On PostgreSQL
+they are range-partitioned by ``created_at``, one partition per month named
+``<table>_pYYYYMM`` plus a ``<table>_default`` catch-all (migration
+``c4e8a2f6b0d9``). ``flask maintain-partitions`` (for cron)
+creates partitions ``PARTITION_MONTHS_AHEAD`` months ahead, so the default
+partition stays empty. It also detaches the partitions that fall entirely
+before ``PARTITION_RETENTION_MONTHS``. A detached partition remains as a
+standalone table that can be archived or dropped.
+
+SQLite has no partitioning, and the ORM maps each model to a single table.
+There the live rows stay in that one table, indexed on (owner, created_at).
+Detaching a month moves its rows into a ``<table>_pYYYYMM`` table, which is
+what a detached PostgreSQL partition looks like. Pre-creating is a no-op.
+
+Queries bound ``created_at`` from below with ``recent()``, using the parent
+row's creation time and the retention cutoff. PostgreSQL then prunes the
+partitions that cannot match, and SQLite uses the index range.
+"""
+import logging
+import re
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import column, delete, func, insert, select, text
+from sqlalchemy import table as sa_table
+
+from . import db
+
+log = logging.getLogger(__name__)
+
+TABLES = ('notification', 'chat_message')
+
+
+def month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def _partition_month(table, name):
+    match = re.fullmatch(rf'{re.escape(table)}_p(\d{{4}})(\d{{2}})', name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def retention_start(table, now=None):
+    """First month still attached for `table`, or None when every month is kept."""
+    months = current_app.config.get('PARTITION_RETENTION_MONTHS', {}).get(table) or 0
+    if months <= 0:
+        return None
+    return add_months(month_start(now or datetime.utcnow()), -months)
+
+
+def recent(model, since=None):
+    """Filter clauses bounding `model.created_at` from below: rows are never older than `since` or the cutoff."""
+    bounds = [b for b in (since, retention_start(model.__tablename__)) if b is not None]
+    return [model.created_at >= max(bounds)] if bounds else []
+
+
+# --- maintenance ------------------------------------------------------------
+
+def _postgres_partitions(conn, table):
+    return conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+    ), {'table': table}).scalars().all()
+
+
+def _maintain_postgres(conn, table, months, cutoff):
+    created, detached = [], []
+    attached = set(_postgres_partitions(conn, table))
+    for month in months:
+        name = partition_name(table, month)
+        if name not in attached:
+            conn.exec_driver_sql(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+            )
+            created.append(name)
+    if cutoff is not None:
+        for name in sorted(attached):
+            month = _partition_month(table, name)
+            if month is not None and add_months(month, 1) <= cutoff:
+                conn.exec_driver_sql(f'ALTER TABLE {table} DETACH PARTITION {name}')
+                detached.append(name)
+    return created, detached
+
+
+def _maintain_sqlite(conn, table, cutoff):
+    detached = []
+    if cutoff is None:
+        return [], detached
+    live = db.metadata.tables[table]
+    oldest = conn.execute(select(func.min(live.c.created_at)).where(live.c.created_at < cutoff)).scalar()
+    if oldest is None:
+        return [], detached
+    month = month_start(oldest)
+    while month < cutoff:
+        name = partition_name(table, month)
+        in_month = (live.c.created_at >= month, live.c.created_at < add_months(month, 1))
+        conn.exec_driver_sql(f'CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM {table} WHERE 0')
+        archive = sa_table(name, *[column(c.name) for c in live.c])
+        moved = conn.execute(insert(archive).from_select(list(live.c.keys()), select(live).where(*in_month))).rowcount
+        conn.execute(delete(live).where(*in_month))
+        if moved:
+            detached.append(name)
+        month = add_months(month, 1)
+    return [], detached
+
+
+def maintain_partitions(now=None, ahead=None):
+    """Create upcoming monthly partitions and detach expired ones; {table: (created, detached)}."""
+    now = now or datetime.utcnow()
+    ahead = current_app.config.get('PARTITION_MONTHS_AHEAD', 3) if ahead is None else ahead
+    current = month_start(now)
+    months = [add_months(current, n) for n in range(ahead + 1)]
+    result = {}
+    with db.engine.begin() as conn:
+        for table in TABLES:
+            cutoff = retention_start(table, now)
+            if conn.dialect.name == 'postgresql':
+                result[table] = _maintain_postgres(conn, table, months, cutoff)
+            else:
+                result[table] = _maintain_sqlite(conn, table, cutoff)
+            created, detached = result[table]
+            if created or detached:
+                log.info('partitions maintained', extra={'event': 'db.partitions', 'table': table,
+                                                         'created_partitions': created,
+                                                         'detached_partitions': detached})
+    return result
@@ -0,0 +1,62 @@
+"""
+Password hashing with per-environment parameters.
+
+The method string comes from ``PASSWORD_HASH_METHOD`` (any Werkzeug method,
+e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``). Hashes created with
+different parameters still verify, and `needs_rehash` tells the login path
+when to upgrade them. Under eventlet/gevent the hash work runs in a bounded
+native thread pool so it does not stall the event loop.
+"""
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from . import socketio
+
+_gevent_pool = None
+_eventlet_pool_sized = False
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """Fully-qualified method as stored in hashes ('scrypt' -> 'scrypt:32768:8:1')."""
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
+
+def _configured_method(method=None):
+    return method or current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+
+def _offload(fn, *args):
+    """Run CPU-bound hashing outside the event loop when running on green threads."""
+    global _gevent_pool, _eventlet_pool_sized
+    mode = socketio.async_mode
+    if mode == 'eventlet':
+        from eventlet import tpool
+        if not _eventlet_pool_sized:
+            tpool.set_num_threads(current_app.config.get('PASSWORD_HASH_THREADS', 4))
+            _eventlet_pool_sized = True
+        return tpool.execute(fn, *args)
+    if mode in ('gevent', 'gevent_uwsgi'):
+        if _gevent_pool is None:
+            from gevent.threadpool import ThreadPool
+            _gevent_pool = ThreadPool(maxsize=current_app.config.get('PASSWORD_HASH_THREADS', 4))
+        return _gevent_pool.apply(fn, args)
+    # threading mode: already on a real request thread
+    return fn(*args)
+
+
+def hash_password(password, method=None):
+    return _offload(generate_password_hash, password, _configured_method(method))
+
+
+def verify_password(pwhash, password):
+    return _offload(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash, method=None):
+    """True when `pwhash` was made with parameters other than the configured ones."""
+    if not pwhash or '$' not in pwhash:
+        return True
+    return pwhash.split('$', 1)[0] != _method_prefix(_configured_method(method))
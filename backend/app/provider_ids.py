@@ -0,0 +1,84 @@
+"""
+Provider unique ID allocation (PROV-001, PROV-002, ...).
+
+Every code path that hands out provider IDs (registration, profile upgrade,
+bulk import, demo seeding) goes through `allocate_provider_ids`. Numbers come
+from a native sequence on PostgreSQL and from a row in the `id_counter` table
+elsewhere; the counter UPDATE takes the write lock, so concurrent
+registrations are serialized until the allocating transaction commits.
+IDs are unique either way, but only the counter is gapless: a sequence
+does not give back the numbers of rolled-back transactions.
+"""
+from sqlalchemy import func, select, text, update
+
+from . import db
+from .models import User, IdCounter, provider_unique_id_seq
+
+PROVIDER_ID_PREFIX = 'PROV'
+PROVIDER_ID_COUNTER = 'provider_unique_id'
+
+
+def format_provider_id(n):
+    return f'{PROVIDER_ID_PREFIX}-{n:03d}'
+
+
+def parse_provider_number(provider_unique_id):
+    """Numeric suffix of a PROV-/PV- style ID, or None."""
+    if not provider_unique_id or '-' not in provider_unique_id:
+        return None
+    try:
+        return int(provider_unique_id.rsplit('-', 1)[1])
+    except ValueError:
+        return None
+
+
+def _last_provider_number():
+    """Highest numeric suffix in use, found with one indexed lookup instead of a full scan."""
+    pattern = f'{PROVIDER_ID_PREFIX}-%'
+    last = db.session.execute(
+        select(User.provider_unique_id)
+        .where(User.provider_unique_id.like(pattern))
+        # zero padding stops at 3 digits, so compare by length first
+        .order_by(func.length(User.provider_unique_id).desc(), User.provider_unique_id.desc())
+        .limit(1)
+    ).scalar()
+    return parse_provider_number(last) or 0
+
+
+def _next_numbers_from_sequence(count):
+    return list(db.session.execute(
+        text(f'SELECT nextval(\'{provider_unique_id_seq.name}\') FROM generate_series(1, :n)'),
+        {'n': count}
+    ).scalars())
+
+
+def _next_numbers_from_counter(count):
+    bump = (
+        update(IdCounter)
+        .where(IdCounter.name == PROVIDER_ID_COUNTER)
+        .values(value=IdCounter.value + count)
+        .returning(IdCounter.value)
+    )
+    end = db.session.execute(bump).scalar()
+    if end is None:
+        # First allocation on a database built with create_all: the UPDATE above
+        # already holds the write lock, so seeding from existing IDs is race free.
+        end = _last_provider_number() + count
+        db.session.add(IdCounter(name=PROVIDER_ID_COUNTER, value=end))
+        db.session.flush()
+    return list(range(end - count + 1, end + 1))
+
+
+def allocate_provider_ids(count):
+    """Reserve `count` provider IDs in the current transaction."""
+    if count <= 0:
+        return []
+    if db.session.get_bind().dialect.name == 'postgresql':
+        numbers = _next_numbers_from_sequence(count)
+    else:
+        numbers = _next_numbers_from_counter(count)
+    return [format_provider_id(n) for n in numbers]
+
+
+def allocate_provider_id():
+    return allocate_provider_ids(1)[0]
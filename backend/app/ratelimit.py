@@ -0,0 +1,124 @@
+"""
+Token-bucket rate limiting per user and endpoint.
+
+Each (endpoint, user) pair has a bucket of ``capacity`` tokens that refills
+continuously, from empty to full in ``per_seconds`` (``RATE_LIMITS``). A call
+takes ``cost`` tokens or is refused with 429 and ``Retry-After``. Most
+endpoints cost 1; creating a service request costs 1 + the number of
+providers the matcher says it will notify, since that is the work it fans
+out into (notification rows, socket emits, emails). A cost above the
+capacity is capped, so such a request needs a full bucket.
+
+Two backends (``RATE_LIMIT_BACKEND``):
+
+* ``memory`` - buckets in a dict per process; exact with a single worker.
+* ``database`` - buckets in ``rate_limit_bucket``, shared by every worker and
+  updated with a compare-and-set UPDATE on the previous state. The bucket
+  state is committed on the request's session.
+"""
+import math
+import threading
+import time
+
+from flask import current_app, jsonify
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models import RateLimitBucket
+
+# Forget memory buckets that have refilled completely once there are this many
+MEMORY_PRUNE_THRESHOLD = 10_000
+
+
+def _refill(tokens, updated_at, now, capacity, rate):
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class MemoryBuckets:
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, capacity, rate, now):
+        """Take `cost` tokens; seconds until they would be available if there are not enough, else 0."""
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = _refill(tokens, updated_at, now, capacity, rate)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            if not wait:
+                tokens -= cost
+            if len(self._buckets) >= MEMORY_PRUNE_THRESHOLD:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return wait
+
+    def _prune(self, now):
+        # a missing bucket is a full one
+        for key in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+
+class DatabaseBuckets:
+    def __init__(self, retries=3):
+        self.retries = retries
+
+    def take(self, key, cost, capacity, rate, now):
+        """Same as MemoryBuckets.take, with the bucket in rate_limit_bucket."""
+        for _ in range(self.retries):
+            row = db.session.execute(
+                select(RateLimitBucket.tokens, RateLimitBucket.updated_at).where(RateLimitBucket.key == key)
+            ).first()
+            if row is None:
+                try:
+                    db.session.add(RateLimitBucket(key=key, tokens=capacity - cost, updated_at=now))
+                    db.session.commit()
+                    return 0.0
+                except IntegrityError:
+                    # another worker created it first
+                    db.session.rollback()
+                    continue
+            tokens = _refill(row.tokens, row.updated_at, now, capacity, rate)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            taken = db.session.execute(
+                update(RateLimitBucket)
+                .where(RateLimitBucket.key == key, RateLimitBucket.tokens == row.tokens,
+                       RateLimitBucket.updated_at == row.updated_at)
+                .values(tokens=tokens - cost, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if taken:
+                return 0.0
+        # lost every race: someone else is spending this bucket right now
+        return 1.0
+
+
+def _backend():
+    backends = current_app.extensions.setdefault('rate_limit_backends', {})
+    name = current_app.config.get('RATE_LIMIT_BACKEND', 'memory')
+    if name not in backends:
+        if name not in ('memory', 'database'):
+            raise ValueError(f'unknown RATE_LIMIT_BACKEND {name!r}')
+        backends[name] = MemoryBuckets() if name == 'memory' else DatabaseBuckets()
+    return backends[name]
+
+
+def check_rate_limit(endpoint, user_id, cost=1, now=None):
+    """Charge `cost` to the user's bucket for `endpoint`; seconds to wait if refused, else 0."""
+    config = current_app.config
+    limit = config.get('RATE_LIMITS', {}).get(endpoint)
+    if limit is None or not config.get('RATE_LIMIT_ENABLED', True):
+        return 0.0
+    capacity, per_seconds = limit
+    return _backend().take(f'{endpoint}:{user_id}', min(cost, capacity), capacity, capacity / per_seconds,
+                           time.time() if now is None else now)
+
+
+def too_many_requests(retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({'msg': 'rate limit exceeded, try again later', 'retry_after': seconds})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
@@ -0,0 +1,186 @@
+"""
+Read replicas for GET requests.
+
+``SQLALCHEMY_REPLICA_URIS`` lists databases that replicate the primary, each
+with its own engine (``SQLALCHEMY_ENGINE_OPTIONS`` apply). During a GET/HEAD
+request on the API blueprint the session sends its reads to one of them,
+round-robin. Flushes and INSERT/UPDATE/DELETE
+statements always go to the primary, as does everything outside a request
+(background tasks, CLI commands, socket handlers).
+
+Read-your-writes: a successful write by a signed-in user (cookie session or
+bearer token) stamps their row in ``replica_write_stamp`` on the primary. For
+``REPLICA_STICKY_SECONDS`` after that, their reads stay on the primary, so a
+replica that has not caught up yet cannot hide what they just did. The stamp
+is shared by every worker; checking it costs one primary-key lookup on the
+primary per GET, and nothing when no replica is configured.
+
+Health: each replica is checked at most every ``REPLICA_CHECK_SECONDS`` with
+a query against the ``user`` table, which also catches a replica without the
+schema. On PostgreSQL a replica more than ``REPLICA_MAX_LAG_SECONDS`` behind
+is treated as down. A replica that drops a connection mid-request is marked
+down until the next check. With no healthy replica, reads use the primary.
+"""
+import itertools
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.dml import UpdateBase
+
+log = logging.getLogger(__name__)
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Seconds a replica has been replaying behind the primary (0 when it has replayed everything it received)
+PG_LAG_QUERY = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class RoutingSession(Session):
+    """Session that reads from the request's replica, if one was picked."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = g.get('db_replica') if has_app_context() else None
+        if replica is not None and bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaPool:
+    """The replica engines, their health, and round-robin selection."""
+
+    def __init__(self, engines, check_seconds=10, max_lag_seconds=5):
+        self.engines = engines
+        self.check_seconds = check_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.healthy = {engine: True for engine in engines}
+        self.checked_at = None
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def pick(self):
+        """A healthy replica engine, or None when reads should use the primary."""
+        if self.checked_at is None or time.monotonic() - self.checked_at >= self.check_seconds:
+            self.check()
+        candidates = [engine for engine in self.engines if self.healthy[engine]]
+        if not candidates:
+            return None
+        return candidates[next(self._turn) % len(candidates)]
+
+    def check(self):
+        with self._lock:
+            # another thread may have checked while we waited for the lock
+            if self.checked_at is not None and time.monotonic() - self.checked_at < self.check_seconds:
+                return
+            for engine in self.engines:
+                self._set(engine, self._probe(engine))
+            self.checked_at = time.monotonic()
+
+    def _probe(self, engine):
+        from .models import User
+        try:
+            with engine.connect() as conn:
+                conn.execute(select(User.id).limit(1))
+                if engine.dialect.name == 'postgresql':
+                    lag = conn.exec_driver_sql(PG_LAG_QUERY).scalar()
+                    # NULL when the server is not in recovery, i.e. not a replica at all
+                    return lag is not None and float(lag) <= self.max_lag_seconds
+            return True
+        except Exception as e:
+            log.debug('replica check failed', extra={'event': 'db.replica_check_failed',
+                                                     'replica': engine.url.render_as_string(), 'error': str(e)})
+            return False
+
+    def mark_down(self, engine):
+        self._set(engine, False)
+
+    def _set(self, engine, healthy):
+        if self.healthy[engine] != healthy:
+            log.warning('replica health changed', extra={'event': 'db.replica_health', 'healthy': healthy,
+                                                         'replica': engine.url.render_as_string()})
+        self.healthy[engine] = healthy
+
+
+def _pool():
+    return current_app.extensions.get('replicas')
+
+
+def _current_user_id():
+    """The signed-in user's id (bearer token or cookie session), without loading the row."""
+    if current_app.config.get('JWT_AUTH_ENABLED'):
+        from .auth import get_token_user
+        token_user = get_token_user()
+        if token_user is not None:
+            return token_user.id
+    return session.get('user_id')
+
+
+def recently_wrote(user_id):
+    """Whether `user_id` wrote within REPLICA_STICKY_SECONDS (read on the primary)."""
+    from . import db
+    from .models import ReplicaWriteStamp
+    if not user_id:
+        return False
+    with db.engine.connect() as conn:
+        wrote_at = conn.execute(
+            select(ReplicaWriteStamp.wrote_at).where(ReplicaWriteStamp.user_id == user_id)
+        ).scalar()
+    return wrote_at is not None and time.time() - wrote_at < current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+
+def stamp_write(user_id, now=None):
+    """Record that `user_id` just wrote, so their reads stay on the primary for a while."""
+    from . import db
+    from .models import ReplicaWriteStamp
+    now = time.time() if now is None else now
+    # its own transaction: whatever the request's session holds is not ours to commit
+    try:
+        with db.engine.begin() as conn:
+            stamped = conn.execute(
+                update(ReplicaWriteStamp).where(ReplicaWriteStamp.user_id == user_id).values(wrote_at=now)
+            ).rowcount
+            if not stamped:
+                conn.execute(insert(ReplicaWriteStamp).values(user_id=user_id, wrote_at=now))
+    except IntegrityError:
+        # a concurrent request of the same user stamped it first, just as recently
+        pass
+
+
+def _route_reads():
+    pool = _pool()
+    if pool is not None and request.method in READ_METHODS and not recently_wrote(_current_user_id()):
+        g.db_replica = pool.pick()
+
+
+def _stamp_writes(response):
+    if request.method not in READ_METHODS + ('OPTIONS',) and response.status_code < 400:
+        user_id = _current_user_id()
+        if user_id:
+            stamp_write(user_id)
+    return response
+
+
+def init_replicas(app, blueprint):
+    """Route `blueprint`'s reads to ``SQLALCHEMY_REPLICA_URIS``, if any are configured."""
+    uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not uris:
+        return
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    engines = [create_engine(uri, **options) for uri in uris]
+    pool = app.extensions['replicas'] = ReplicaPool(
+        engines,
+        check_seconds=app.config.get('REPLICA_CHECK_SECONDS', 10),
+        max_lag_seconds=app.config.get('REPLICA_MAX_LAG_SECONDS', 5),
+    )
+    for engine in engines:
+        event.listen(engine, 'handle_error', lambda context, engine=engine:
+                     pool.mark_down(engine) if context.is_disconnect else None)
+    app.before_request_funcs.setdefault(blueprint.name, []).append(_route_reads)
+    app.after_request_funcs.setdefault(blueprint.name, []).append(_stamp_writes)
@@ -0,0 +1,128 @@
+"""
+Lifecycle of pending service requests: per-provider rejections, timed
+escalation and expiry.
+
+A new request is offered to providers of its category whose locations match
+the requester (escalation level 0). Rejections are recorded per provider and
+only hide the request from that provider. ``next_action_at`` says when the
+scheduler should look at the request again:
+
+* ``REQUEST_ESCALATE_MINUTES`` after creation (or as soon as every offered
+  provider has declined) the offer widens to the whole category and the
+  providers not yet notified get a notification (level 1);
+* ``REQUEST_EXPIRE_MINUTES`` after creation, or once nobody is left to offer
+  it to, the request is marked ``expired`` and the requester is told.
+
+Each step pushes the matching ``inbox_update`` deltas (see app/inbox.py).
+
+Every function takes ``now`` explicitly, so tests can drive them with a fake
+clock.
+"""
+import logging
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from . import db
+from .matching import filter_by_location
+from .inbox import push_remove, push_upsert
+from .models import User, ServiceRequest, ServiceRequestRejection
+from .notifications import notify_users
+
+log = logging.getLogger(__name__)
+
+
+def escalate_after():
+    return timedelta(minutes=current_app.config.get('REQUEST_ESCALATE_MINUTES', 30))
+
+
+def expire_after():
+    return timedelta(minutes=current_app.config.get('REQUEST_EXPIRE_MINUTES', 24 * 60))
+
+
+def schedule_new(sr):
+    sr.escalation_level = 0
+    sr.next_action_at = min(sr.created_at + escalate_after(), sr.created_at + expire_after())
+
+
+def offered_providers(sr, level=None):
+    """Providers the request is offered to at `level` (default: its current level)."""
+    level = sr.escalation_level if level is None else level
+    providers = User.query.filter_by(role='provider', partner_category=sr.category).all()
+    return providers if level > 0 else filter_by_location(sr.location, providers)
+
+
+def rejected_by(sr):
+    return set(db.session.execute(
+        select(ServiceRequestRejection.provider_id).where(ServiceRequestRejection.service_request_id == sr.id)
+    ).scalars())
+
+
+def open_to(sr):
+    """Ids of the providers `sr` is currently offered to and who have not declined it."""
+    return {p.id for p in offered_providers(sr)} - rejected_by(sr)
+
+
+def record_rejection(sr, provider, now):
+    """Hide `sr` from `provider`; bring the next step forward once every offered provider declined."""
+    if db.session.get(ServiceRequestRejection, (sr.id, provider.id)) is None:
+        db.session.add(ServiceRequestRejection(service_request_id=sr.id, provider_id=provider.id, created_at=now))
+        db.session.flush()
+    push_remove(sr, [provider.id])
+    if not open_to(sr):
+        sr.next_action_at = now
+
+
+def close(sr):
+    """The request left the pending state; nothing left to schedule."""
+    sr.next_action_at = None
+
+
+def _expire(sr, reason):
+    push_remove(sr, open_to(sr))
+    sr.status = 'expired'
+    sr.next_action_at = None
+    notify_users([sr.user_id], f'Your service request #{sr.id} ({sr.category}) expired: {reason}. '
+                               f'You can create a new request at any time.')
+    log.info('service request expired', extra={'event': 'request.expired', 'request_id': sr.id, 'reason': reason})
+
+
+def _widen(sr):
+    already_offered = {p.id for p in offered_providers(sr, level=0)}
+    sr.escalation_level = 1
+    remaining = open_to(sr)
+    if not remaining:
+        _expire(sr, 'every provider declined it')
+        return
+    newly_offered = sorted(remaining - already_offered)
+    push_upsert(sr, newly_offered)
+    notify_users(newly_offered, f'Service request #{sr.id} in "{sr.category}" is still looking for a provider '
+                                f'and is now open to providers in all locations.')
+    sr.next_action_at = sr.created_at + expire_after()
+    log.info('service request escalated', extra={'event': 'request.escalated', 'request_id': sr.id,
+                                                  'notified': len(newly_offered)})
+
+
+def process_request(sr, now):
+    """Run the next lifecycle step for one due request."""
+    if now >= sr.created_at + expire_after():
+        _expire(sr, 'no provider accepted it in time')
+    elif sr.escalation_level == 0:
+        _widen(sr)
+    elif not open_to(sr):
+        _expire(sr, 'every provider declined it')
+    else:
+        sr.next_action_at = sr.created_at + expire_after()
+
+
+def process_due_requests(now, batch_size=None):
+    """Process pending requests whose next_action_at has passed; returns how many were handled."""
+    batch_size = batch_size or current_app.config.get('SCHEDULER_BATCH_SIZE', 200)
+    due = ServiceRequest.query.filter(
+        ServiceRequest.status == 'pending', ServiceRequest.next_action_at <= now,
+    ).order_by(ServiceRequest.next_action_at).limit(batch_size).with_for_update(skip_locked=True).all()
+    for sr in due:
+        process_request(sr, now)
+    db.session.commit()
+    return len(due)
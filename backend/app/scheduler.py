@@ -0,0 +1,101 @@
+"""
+Leader-elected background loop for the request lifecycle.
+
+Every worker may start the loop, but each tick first takes (or renews) the
+``request_scheduler`` row in ``scheduler_lease`` with a single conditional
+UPDATE; only the current holder processes due requests. A holder that dies
+simply stops renewing and another worker takes over once the lease has
+expired (``SCHEDULER_LEASE_SECONDS``). The clock and sleep functions are
+injectable for tests.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db, socketio
+from .models import SchedulerLease
+from .request_lifecycle import process_due_requests
+
+log = logging.getLogger(__name__)
+
+LEASE_NAME = 'request_scheduler'
+
+
+def default_holder():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def acquire_lease(name, holder, now, ttl):
+    """Take or renew lease `name` for `holder` until now + ttl; True if we hold it."""
+    expires_at = now + ttl
+    taken = db.session.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name,
+               or_(SchedulerLease.holder == holder, SchedulerLease.expires_at <= now))
+        .values(holder=holder, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not taken:
+        if db.session.get(SchedulerLease, name) is not None:
+            db.session.rollback()
+            return False
+        try:
+            db.session.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+            db.session.flush()
+        except IntegrityError:
+            # another worker created it first
+            db.session.rollback()
+            return False
+    db.session.commit()
+    return True
+
+
+class RequestScheduler:
+    def __init__(self, app, clock=datetime.utcnow, sleep=None, holder=None):
+        self.app = app
+        self.clock = clock
+        self.sleep = sleep or socketio.sleep
+        self.holder = holder or default_holder()
+
+    def tick(self):
+        """One scheduling round; returns the number of requests processed (None when not leader)."""
+        with self.app.app_context():
+            config = current_app.config
+            try:
+                now = self.clock()
+                ttl = timedelta(seconds=config.get('SCHEDULER_LEASE_SECONDS', 90))
+                if not acquire_lease(LEASE_NAME, self.holder, now, ttl):
+                    return None
+                processed = total = process_due_requests(now)
+                # drain a backlog in batches, but keep each round bounded
+                for _ in range(config.get('SCHEDULER_MAX_BATCHES', 10) - 1):
+                    if processed < config.get('SCHEDULER_BATCH_SIZE', 200):
+                        break
+                    processed = process_due_requests(now)
+                    total += processed
+                return total
+            except Exception:
+                db.session.rollback()
+                log.exception('scheduler tick failed', extra={'event': 'scheduler.failed'})
+                return 0
+            finally:
+                db.session.remove()
+
+    def run_forever(self):
+        interval = self.app.config.get('SCHEDULER_INTERVAL', 30)
+        while True:
+            self.tick()
+            self.sleep(interval)
+
+
+def start_request_scheduler(app):
+    """Start the scheduler as a background task (SCHEDULER_INTERVAL 0 disables it)."""
+    if not app.config.get('SCHEDULER_INTERVAL'):
+        return None
+    return socketio.start_background_task(RequestScheduler(app).run_forever)
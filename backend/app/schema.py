@@ -0,0 +1,128 @@
+"""
+Pre-built schema snapshot for provisioning SQLite databases in one step.
+
+``migrations/schema.sqlite.sql`` is the dump of an empty SQLite database
+upgraded to the head revision: every table and index plus the
+``alembic_version`` and seed rows. ``load_snapshot`` runs it as a single
+script, which takes a few milliseconds instead of a migration run. Tests
+and ephemeral environments (``flask load-schema``) use it. The result is
+stamped at head, so later ``flask db upgrade`` runs carry on from there.
+Other databases are provisioned with the migrations.
+
+The snapshot must be regenerated with ``flask dump-schema`` whenever a
+revision is added; ``tests/test_schema.py`` fails until it is.
+
+The revisions live in three directories: ``baseline`` (the squashed chain in
+one revision), ``archive`` (the chain it replaced, ending on the baseline's
+id) and ``versions`` (everything after). ``migration_locations`` hands
+alembic the baseline, or the archive for a database still stamped at one of
+the archived revisions.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from alembic.script import ScriptDirectory
+from flask import has_app_context
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from . import db, migrate
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+SNAPSHOT_PATH = MIGRATIONS_DIR / 'schema.sqlite.sql'
+BASELINE_DIR = MIGRATIONS_DIR / 'baseline'
+ARCHIVE_DIR = MIGRATIONS_DIR / 'archive'
+VERSIONS_DIR = MIGRATIONS_DIR / 'versions'
+
+
+def _revisions(location):
+    script = ScriptDirectory(str(MIGRATIONS_DIR), version_locations=[str(location)])
+    return {rev.revision for rev in script.walk_revisions()}
+
+
+def stamped_revision(engine=None):
+    """The revision `engine`'s database is stamped at, or None (no alembic_version yet)."""
+    try:
+        with (engine or db.engine).connect() as conn:
+            return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+    except DBAPIError:
+        return None
+
+
+@migrate.configure
+def migration_locations(config):
+    """Use the archived chain instead of the baseline for databases stamped at an archived revision."""
+    first = BASELINE_DIR
+    if has_app_context() and stamped_revision() in _revisions(ARCHIVE_DIR) - _revisions(BASELINE_DIR):
+        first = ARCHIVE_DIR
+    config.set_main_option('path_separator', 'os')
+    config.set_main_option('version_locations', os.pathsep.join([str(first), str(VERSIONS_DIR)]))
+    return config
+
+
+def describe_schema(engine):
+    """Tables, columns, keys and indexes of `engine`'s database, in a comparable form."""
+    insp = inspect(engine)
+    schema = {}
+    for table in insp.get_table_names():
+        schema[table] = {
+            'columns': sorted((c['name'], str(c['type']), c['nullable']) for c in insp.get_columns(table)),
+            'primary_key': insp.get_pk_constraint(table)['constrained_columns'],
+            'foreign_keys': sorted((tuple(fk['constrained_columns']), fk['referred_table'],
+                                    tuple(fk['referred_columns'])) for fk in insp.get_foreign_keys(table)),
+            'indexes': sorted((ix['name'], tuple(ix['column_names']), bool(ix['unique']))
+                              for ix in insp.get_indexes(table)),
+            'unique': sorted(tuple(u['column_names']) for u in insp.get_unique_constraints(table)),
+        }
+    return schema
+
+
+def dump_snapshot(engine):
+    """SQL script recreating `engine`'s SQLite database, schema and rows."""
+    connection = engine.raw_connection()
+    try:
+        return '\n'.join(connection.driver_connection.iterdump()) + '\n'
+    finally:
+        connection.close()
+
+
+def build_snapshot():
+    """Upgrade a scratch SQLite database to head and return its dump."""
+    from flask_migrate import upgrade
+    from config import Config
+    from . import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = type('SnapshotConfig', (Config,), {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/snapshot.db',
+            'SQLALCHEMY_REPLICA_URIS': [],
+        })
+        app = create_app(config)
+        with app.app_context():
+            upgrade(directory=str(MIGRATIONS_DIR))
+            snapshot = dump_snapshot(db.engine)
+            db.engine.dispose()
+    return snapshot
+
+
+def load_snapshot(engine=None):
+    """Create the head schema in the current app's empty SQLite database in one script."""
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite':
+        raise ValueError(f'schema snapshots are SQLite only, not {engine.dialect.name}')
+    connection = engine.raw_connection()
+    try:
+        connection.driver_connection.executescript(SNAPSHOT_PATH.read_text())
+    finally:
+        connection.close()
+
+
+def provision_schema():
+    """Bring an empty database to head: the snapshot on SQLite, the migrations elsewhere."""
+    if db.engine.dialect.name == 'sqlite':
+        load_snapshot()
+    else:
+        from flask_migrate import upgrade
+        upgrade(directory=str(MIGRATIONS_DIR))
@@ -0,0 +1,158 @@
+"""
+Precompiled model serializers.
+
+Each model declares its output fields once in a ``Serializer``, which generates
+plain functions from that spec that read loaded column values straight out
+of the instance ``__dict__`` instead of going through the instrumented
+attributes one by one. Two variants are produced:
+
+* ``to_dict`` - the historical output (ISO 8601 strings, lists), safe for
+  Socket.IO payloads and anything else that uses the stdlib ``json`` module.
+* ``as_json`` - for HTTP responses: datetimes are left as ``datetime`` for the
+  JSON provider to encode natively, comma-separated columns become cached
+  tuples rather than fresh lists.
+
+If a column is expired or deferred the generated code falls back to regular
+attribute access, so the lazy-loading behaviour is unchanged.
+"""
+from functools import lru_cache
+
+
+class Field:
+    """A column copied as-is (`key` defaults to the attribute name)."""
+    kind = 'column'
+
+    def __init__(self, attr, key=None):
+        self.attr = attr
+        self.key = key or attr
+
+
+class DateTimeField(Field):
+    kind = 'datetime'
+
+
+class CsvField(Field):
+    """Comma-separated text column, serialized as a list."""
+    kind = 'csv'
+
+
+class Related:
+    """``obj.<relation>.<attr>`` or `default` when the relation is empty."""
+    kind = 'related'
+
+    def __init__(self, key, relation, attr, default=None):
+        self.key = key
+        self.relation = relation
+        self.attr = attr
+        self.default = default
+
+
+# Compiled sparse-fieldset variants kept per model (least recently used are dropped)
+FIELDSET_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=4096)
+def split_csv(value):
+    return tuple(value.split(',')) if value else ()
+
+
+def _field(spec):
+    return Field(spec) if isinstance(spec, str) else spec
+
+
+def _source(fields, name, native):
+    columns = [f for f in fields if f.kind != 'related']
+    relations = list(dict.fromkeys(f.relation for f in fields if f.kind == 'related'))
+
+    lines = [f'def _{name}(obj, d):']
+    for i, relation in enumerate(relations):
+        lines.append(f'    r{i} = obj.{relation}')
+    lines.append('    return {')
+    for f in fields:
+        if f.kind == 'related':
+            var = f'r{relations.index(f.relation)}'
+            value = f'({var}.{f.attr} if {var} is not None else {f.default!r})'
+        elif f.kind == 'datetime' and not native:
+            value = f"(d[{f.attr!r}].isoformat() if d[{f.attr!r}] is not None else None)"
+        elif f.kind == 'csv':
+            value = f'split_csv(d[{f.attr!r}])' if native else f'list(split_csv(d[{f.attr!r}]))'
+        else:
+            value = f'd[{f.attr!r}]'
+        lines.append(f'        {f.key!r}: {value},')
+    lines.append('    }')
+    # Unloaded (expired, deferred or never-set) columns are read the slow way,
+    # without writing anything into the instance state
+    attrs = tuple(f.attr for f in columns)
+    lines += [f'def {name}(obj):',
+              '    try:',
+              f'        return _{name}(obj, obj.__dict__)',
+              '    except KeyError:',
+              f'        return _{name}(obj, {{a: getattr(obj, a) for a in {attrs!r}}})']
+    return '\n'.join(lines)
+
+
+def _compile(fields, name, native):
+    namespace = {'split_csv': split_csv}
+    exec(compile(_source(fields, name, native), f'<serializer {name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+class Serializer:
+    """
+    Field spec for one model, with its compiled ``to_dict``/``as_json``.
+
+    ``fieldset(fields)`` returns an ``as_json`` variant limited to a sparse
+    fieldset (``?fields=`` on list endpoints), and ``load_options(fields)``
+    the matching ``load_only``/``joinedload`` options, so columns and joins
+    nobody asked for are never selected.
+    """
+
+    def __init__(self, *specs):
+        self.fields = [_field(s) for s in specs]
+        self.keys = {f.key: f for f in self.fields}
+        self.to_dict = _compile(self.fields, 'to_dict', False)
+        self.as_json = _compile(self.fields, 'as_json', True)
+        self._fieldset = lru_cache(maxsize=FIELDSET_CACHE_SIZE)(self._compile_fieldset)
+        self.model = None
+
+    def __set_name__(self, owner, name):
+        self.model = owner
+
+    def parse_fields(self, value):
+        """
+        Tuple of requested keys from a comma-separated string, in spec order (None = all);
+        ValueError on unknown keys. Spec order makes every spelling of a fieldset one cache key.
+        """
+        if not value:
+            return None
+        requested = {k.strip() for k in value.split(',') if k.strip()}
+        unknown = sorted(requested - self.keys.keys())
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+        return tuple(k for k in self.keys if k in requested) or None
+
+    def fieldset(self, keys=None):
+        if keys is None:
+            return self.as_json
+        return self._fieldset(keys)
+
+    def _compile_fieldset(self, keys):
+        return _compile([self.keys[k] for k in keys], 'as_json', True)
+
+    def load_options(self, keys=None, default=()):
+        """Loader options for `keys`; `default` (the endpoint's usual eager loads) when all fields are wanted."""
+        if keys is None:
+            return list(default)
+        from sqlalchemy.orm import joinedload, load_only
+
+        fields = [self.keys[k] for k in keys]
+        relations = dict.fromkeys(f.relation for f in fields if f.kind == 'related')
+        columns = [getattr(self.model, f.attr) for f in fields if f.kind != 'related']
+        options = []
+        for name in relations:
+            relationship = getattr(self.model, name)
+            # many-to-one joins need the foreign key on the parent row
+            columns += [getattr(self.model, c.key) for c in relationship.property.local_columns]
+            options.append(joinedload(relationship))
+        options.insert(0, load_only(*dict.fromkeys(columns)))
+        return options
@@ -0,0 +1,109 @@
+"""
+Premium subscriptions: entitlement checks and the expiry sweeper.
+
+``is_premium_active`` answers from a per-process cache of each user's
+``(is_premium, subscription_expiry)``, so it stays correct as time passes and
+only needs a refresh after ``PREMIUM_CACHE_SECONDS`` or an explicit
+invalidation (subscribe, sweep). The sweeper walks the
+``subscription_expiry`` index in batches of ``PREMIUM_SWEEP_BATCH_SIZE``,
+flips ``is_premium`` off with one guarded UPDATE per batch and notifies the
+affected users through the bulk notification path. It stops after
+``PREMIUM_SWEEP_MAX_BATCHES`` batches per run; the remainder is picked up
+on the next run.
+"""
+import logging
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from . import db, socketio
+from .models import User
+from .notifications import notify_users
+
+log = logging.getLogger(__name__)
+
+EXPIRY_MESSAGE = 'Your Premium Membership has expired. Renew any time to keep your benefits.'
+
+
+def _entitlement_cache():
+    return current_app.extensions.setdefault('premium_cache', {})
+
+
+def invalidate_premium(*user_ids):
+    cache = _entitlement_cache()
+    for user_id in user_ids:
+        cache.pop(user_id, None)
+
+
+def is_premium_active(user, now=None):
+    """True while `user` (a User, TokenUser or id) has an unexpired premium subscription."""
+    user_id = user if isinstance(user, int) else user.id
+    cache = _entitlement_cache()
+    ttl = current_app.config.get('PREMIUM_CACHE_SECONDS', 60)
+    entry = cache.get(user_id)
+    if entry is None or time.monotonic() - entry[2] > ttl:
+        row = db.session.execute(
+            select(User.is_premium, User.subscription_expiry).where(User.id == user_id)
+        ).first()
+        is_premium, expiry = row if row else (False, None)
+        entry = cache[user_id] = (bool(is_premium), expiry, time.monotonic())
+    is_premium, expiry, _ = entry
+    # no end date means an open-ended subscription
+    return is_premium and (expiry is None or expiry > (now or datetime.utcnow()))
+
+
+def expire_subscriptions(now=None, batch_size=None, max_batches=None):
+    """Expire lapsed subscriptions; returns how many users were downgraded."""
+    config = current_app.config
+    now = now or datetime.utcnow()
+    batch_size = batch_size or config.get('PREMIUM_SWEEP_BATCH_SIZE', 500)
+    max_batches = max_batches or config.get('PREMIUM_SWEEP_MAX_BATCHES', 20)
+    lapsed = (User.is_premium.is_(True), User.subscription_expiry <= now)
+
+    expired = 0
+    for _ in range(max_batches):
+        # SKIP LOCKED lets several workers sweep at once on PostgreSQL
+        ids = db.session.execute(
+            select(User.id).where(*lapsed).order_by(User.subscription_expiry)
+            .limit(batch_size).with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            break
+        # re-check the condition in case a renewal landed in between
+        downgraded = db.session.execute(
+            update(User).where(User.id.in_(ids), *lapsed).values(is_premium=False)
+            .returning(User.id)
+        ).scalars().all()
+        notify_users(downgraded, EXPIRY_MESSAGE)
+        db.session.commit()
+        invalidate_premium(*downgraded)
+        expired += len(downgraded)
+        if len(ids) < batch_size:
+            break
+
+    if expired:
+        log.info('subscriptions expired', extra={'event': 'premium.expired', 'count': expired})
+    return expired
+
+
+def start_subscription_sweeper(app):
+    """Run expire_subscriptions every PREMIUM_SWEEP_INTERVAL seconds in a background task."""
+    interval = app.config.get('PREMIUM_SWEEP_INTERVAL')
+    if not interval:
+        return None
+
+    def sweep_forever():
+        while True:
+            with app.app_context():
+                try:
+                    expire_subscriptions()
+                except Exception:
+                    db.session.rollback()
+                    log.exception('subscription sweep failed', extra={'event': 'premium.sweep_failed'})
+                finally:
+                    db.session.remove()
+            socketio.sleep(interval)
+
+    return socketio.start_background_task(sweep_forever)
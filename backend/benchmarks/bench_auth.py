@@ -0,0 +1,71 @@
+"""
+Authenticated request throughput: cookie session vs JWT bearer tokens.
+
+In session mode every request loads the User row; in JWT mode role checks
+read the token claims. Reports requests per second for an endpoint that only
+does a role check and for one that also queries.
+
+    python -m benchmarks.bench_auth --requests 2000
+"""
+import argparse
+import time
+
+from app import create_app, db
+from app.models import User
+from config import Config
+
+ENDPOINTS = {
+    'role check only': '/api/v1/user/past-providers',
+    'role check + query': '/api/v1/warnings',
+}
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    JWT_AUTH_ENABLED = True
+
+
+def build_app():
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        p = User(username='bench_provider', role='provider', partner_category='plumber', provider_unique_id='PROV-001')
+        p.set_password('pw')
+        db.session.add(p)
+        db.session.commit()
+    return app
+
+
+def measure(client, path, requests, headers=None):
+    started = time.perf_counter()
+    for _ in range(requests):
+        res = client.get(path, headers=headers)
+        assert res.status_code == 200, res.status_code
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = build_app()
+    session_client = app.test_client()
+    res = session_client.post('/api/v1/auth/login', json={'username': 'bench_provider', 'password': 'pw'})
+    headers = {'Authorization': f"Bearer {res.get_json()['access_token']}"}
+    # login issues no session cookie in JWT mode; give the session client one directly
+    with session_client.session_transaction() as sess:
+        sess['user_id'] = res.get_json()['user']['id']
+    token_client = app.test_client()
+
+    print(f"{'endpoint':22s} {'session req/s':>14s} {'jwt req/s':>12s} {'speedup':>8s}")
+    for name, path in ENDPOINTS.items():
+        session_rate = measure(session_client, path, args.requests)
+        jwt_rate = measure(token_client, path, args.requests, headers=headers)
+        print(f'{name:22s} {session_rate:14.1f} {jwt_rate:12.1f} {jwt_rate / session_rate:7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
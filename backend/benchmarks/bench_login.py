@@ -0,0 +1,69 @@
+"""
+Login throughput benchmark.
+
+Runs concurrent POST /auth/login calls against an in-memory database for each
+hashing profile and reports logins per second.
+
+    python -m benchmarks.bench_login --users 20 --threads 8 --rounds 5
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app, db
+from app.models import User
+from config import Config
+
+PROFILES = {
+    'scrypt (default)': 'scrypt',
+    'pbkdf2 600k': 'pbkdf2:sha256:600000',
+    'pbkdf2 1k (tests/seeding)': 'pbkdf2:sha256:1000',
+}
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+def run_profile(method, users, threads, rounds):
+    config = type('Config', (BenchConfig,), {'PASSWORD_HASH_METHOD': method})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        for i in range(users):
+            u = User(username=f'bench_{i}')
+            u.set_password('bench-pw')
+            db.session.add(u)
+        db.session.commit()
+
+    def login(i):
+        client = app.test_client()
+        res = client.post('/api/v1/auth/login', json={'username': f'bench_{i % users}', 'password': 'bench-pw'})
+        assert res.status_code == 200
+
+    total = users * rounds
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(login, range(total)))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.drop_all()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    for name, method in PROFILES.items():
+        rate = run_profile(method, args.users, args.threads, args.rounds)
+        print(f'{name:28s} {rate:10.1f} logins/s')
+
+
+if __name__ == '__main__':
+    main()
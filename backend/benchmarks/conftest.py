@@ -0,0 +1,38 @@
+import os
+
+import pytest
+from app import create_app, db
+from config import Config
+
+from benchmarks.seed import seed, BENCH_HASH_METHOD
+
+# Multiplier for the synthetic data set used by the micro-benchmarks
+BENCH_SCALE = int(os.environ.get('BENCH_SCALE', 1))
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or 'sqlite:///:memory:'
+    PASSWORD_HASH_METHOD = BENCH_HASH_METHOD
+    METRICS_ENABLED = False
+    LOG_LEVEL = 'WARNING'
+
+
+@pytest.fixture(scope='session')
+def bench_app():
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(users=200 * BENCH_SCALE, providers=100 * BENCH_SCALE, requests=2000 * BENCH_SCALE,
+             notifications_per_user=10, complaints=500 * BENCH_SCALE)
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def bench_ctx(bench_app):
+    with bench_app.app_context():
+        yield bench_app
+        db.session.rollback()
@@ -0,0 +1,313 @@
+"""
+Asyncio-driven load test for the API.
+
+Seeds synthetic users/providers/requests, then runs concurrent virtual users
+through weighted flows (register+login, service request fan-out,
+accept/complete/rate, chat, notification polling) and reports throughput and
+p50/p95/p99 per operation. Requests go through the in-process Flask test
+client by default, or over HTTP to a running server with --base-url.
+
+    python -m benchmarks.load --users 500 --providers 100 --concurrency 16 --duration 30
+    python -m benchmarks.load --database-url postgresql://localhost/sheba_bench --check-baseline
+
+Baselines are stored per database dialect in benchmarks/baselines/ with
+--save-baseline; --check-baseline exits non-zero when an operation's p95
+or the overall throughput regresses by more than --tolerance.
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+
+from app import create_app, db
+from config import Config
+
+from benchmarks.seed import seed, CATEGORIES, PASSWORD, BENCH_HASH_METHOD
+
+BASELINE_DIR = Path(__file__).resolve().parent / 'baselines'
+
+FLOW_WEIGHTS = {
+    'register_login': 1,
+    'service_request_fanout': 3,
+    'accept_complete_rate': 2,
+    'chat': 2,
+    'notifications_poll': 6,
+}
+
+
+# --- clients ----------------------------------------------------------------
+
+class InProcessClient:
+    """Flask test client with the (status, json) interface used by the flows."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        res = self.client.open('/api/v1' + path, method=method, json=body)
+        return res.status_code, res.get_json(silent=True)
+
+
+class HttpClient:
+    """Cookie-keeping urllib client for a live server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with self.opener.open(req, timeout=30) as res:
+                return res.status, json.loads(res.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+
+# --- recording --------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, name, method, path, body=None, expect=(200, 201)):
+        started = time.perf_counter()
+        status, data = await asyncio.to_thread(client.request, method, path, body)
+        self.latencies[name].append(time.perf_counter() - started)
+        if status not in expect:
+            self.errors[name] += 1
+        return status, data
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(recorder, elapsed):
+    ops = {}
+    for name, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        ops[name] = {
+            'count': len(values),
+            'errors': recorder.errors.get(name, 0),
+            'throughput': len(values) / elapsed,
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+        }
+    total = sum(o['count'] for o in ops.values())
+    return {'elapsed': elapsed, 'requests': total, 'throughput': total / elapsed, 'operations': ops}
+
+
+def print_summary(summary):
+    print(f"{'operation':38s} {'count':>7s} {'err':>5s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for name, o in summary['operations'].items():
+        print(f"{name:38s} {o['count']:7d} {o['errors']:5d} {o['throughput']:8.1f} "
+              f"{o['p50'] * 1000:8.1f} {o['p95'] * 1000:8.1f} {o['p99'] * 1000:8.1f}")
+    print(f"total: {summary['requests']} requests in {summary['elapsed']:.1f}s "
+          f"({summary['throughput']:.1f} req/s)")
+
+
+# --- flows ------------------------------------------------------------------
+
+class Flows:
+    def __init__(self, make_client, recorder, scale, rng):
+        self.make_client = make_client
+        self.rec = recorder
+        self.scale = scale
+        self.rng = rng
+        self.counter = 0
+
+    async def login(self, client, username):
+        await self.rec.call(client, 'POST /auth/login', 'POST', '/auth/login',
+                            {'username': username, 'password': PASSWORD})
+
+    def random_user(self):
+        return f"user_{self.rng.randrange(self.scale['users'])}"
+
+    def provider_for(self, category):
+        # seed assigns categories round-robin
+        index = CATEGORIES.index(category)
+        picks = range(index, self.scale['providers'], len(CATEGORIES))
+        return f'provider_{self.rng.choice(picks)}'
+
+    async def register_login(self):
+        self.counter += 1
+        username = f'load_{id(self)}_{self.counter}_{self.rng.randrange(10 ** 9)}'
+        client = self.make_client()
+        await self.rec.call(client, 'POST /auth/register', 'POST', '/auth/register',
+                            {'username': username, 'password': PASSWORD, 'name': 'Load Test'})
+        await self.login(client, username)
+
+    async def create_request(self, client, category):
+        status, data = await self.rec.call(client, 'POST /service_requests', 'POST', '/service_requests',
+                                           {'category': category, 'description': 'load test request'})
+        return data['id'] if status == 201 and data else None
+
+    async def service_request_fanout(self):
+        client = self.make_client()
+        await self.login(client, self.random_user())
+        await self.create_request(client, self.rng.choice(CATEGORIES))
+
+    async def _accepted_request(self):
+        user, provider = self.make_client(), self.make_client()
+        category = self.rng.choice(CATEGORIES)
+        await self.login(user, self.random_user())
+        request_id = await self.create_request(user, category)
+        await self.login(provider, self.provider_for(category))
+        if request_id:
+            await self.rec.call(provider, 'POST /service_requests/<id>/accept', 'POST',
+                                f'/service_requests/{request_id}/accept')
+        return user, provider, request_id
+
+    async def accept_complete_rate(self):
+        user, provider, request_id = await self._accepted_request()
+        if not request_id:
+            return
+        await self.rec.call(provider, 'POST /service_requests/<id>/complete', 'POST',
+                            f'/service_requests/{request_id}/complete')
+        await self.rec.call(user, 'POST /service_requests/<id>/rate', 'POST',
+                            f'/service_requests/{request_id}/rate', {'rating': self.rng.randint(1, 5)})
+
+    async def chat(self):
+        user, provider, request_id = await self._accepted_request()
+        if not request_id:
+            return
+        for i in range(3):
+            for client in (user, provider):
+                await self.rec.call(client, 'POST /service_requests/<id>/messages', 'POST',
+                                    f'/service_requests/{request_id}/messages', {'message': f'hello {i}'})
+        await self.rec.call(user, 'GET /service_requests/<id>/messages', 'GET',
+                            f'/service_requests/{request_id}/messages')
+
+    async def notifications_poll(self):
+        client = self.make_client()
+        username = self.random_user() if self.rng.random() < 0.5 else \
+            f"provider_{self.rng.randrange(self.scale['providers'])}"
+        await self.login(client, username)
+        for _ in range(5):
+            await self.rec.call(client, 'GET /notifications', 'GET', '/notifications')
+
+
+async def virtual_user(flows, deadline, weights):
+    names, cum = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        flow = flows.rng.choices(names, weights=cum)[0]
+        await getattr(flows, flow)()
+
+
+async def run_load(make_client, scale, concurrency, duration, seed_value):
+    recorder = Recorder()
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        virtual_user(Flows(make_client, recorder, scale, random.Random(seed_value + i)), deadline, FLOW_WEIGHTS)
+        for i in range(concurrency)
+    ])
+    return summarize(recorder, time.perf_counter() - started)
+
+
+# --- baselines --------------------------------------------------------------
+
+def baseline_path(dialect):
+    return BASELINE_DIR / f'load_{dialect}.json'
+
+
+def check_baseline(summary, baseline, tolerance):
+    """List of human-readable regressions (empty when within tolerance)."""
+    problems = []
+    if summary['throughput'] < baseline['throughput'] * (1 - tolerance):
+        problems.append(f"throughput {summary['throughput']:.1f} < baseline {baseline['throughput']:.1f}")
+    for name, base in baseline['operations'].items():
+        current = summary['operations'].get(name)
+        if current and current['p95'] > base['p95'] * (1 + tolerance):
+            problems.append(f"{name} p95 {current['p95'] * 1000:.1f}ms > baseline {base['p95'] * 1000:.1f}ms")
+    return problems
+
+
+class LoadConfig(Config):
+    TESTING = True
+    PASSWORD_HASH_METHOD = BENCH_HASH_METHOD
+    METRICS_ENABLED = False
+    # virtual users create requests far faster than real ones
+    RATE_LIMIT_ENABLED = False
+    LOG_LEVEL = 'WARNING'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API load test')
+    # relative SQLite paths resolve against the app's instance folder
+    parser.add_argument('--database-url', default='sqlite:///load.db',
+                        help='Database to seed (and to serve from, in-process)')
+    parser.add_argument('--base-url', help='Drive a running server over HTTP instead of in-process')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--providers', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of load')
+    parser.add_argument('--seed', type=int, default=471)
+    parser.add_argument('--no-seed', action='store_true', help='Reuse data already in the database')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed regression (0.2 = 20%%)')
+    parser.add_argument('--json', help='Write the summary to this file')
+    args = parser.parse_args(argv)
+
+    config = type('Config', (LoadConfig,), {'SQLALCHEMY_DATABASE_URI': args.database_url})
+    app = create_app(config)
+    scale = {'users': args.users, 'providers': args.providers}
+    if not args.no_seed:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed(users=args.users, providers=args.providers, requests=args.requests,
+                 rng=random.Random(args.seed))
+
+    if args.base_url:
+        make_client = lambda: HttpClient(args.base_url)
+    else:
+        make_client = lambda: InProcessClient(app)
+
+    summary = asyncio.run(run_load(make_client, scale, args.concurrency, args.duration, args.seed))
+    summary['database'] = make_url(args.database_url).get_backend_name()
+    print_summary(summary)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2))
+    path = baseline_path(summary['database'])
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path.write_text(json.dumps(summary, indent=2))
+        print(f'baseline saved to {path}')
+    if args.check_baseline:
+        if not path.exists():
+            print(f'no baseline at {path}; run with --save-baseline first')
+            return 2
+        problems = check_baseline(summary, json.loads(path.read_text()), args.tolerance)
+        for problem in problems:
+            print(f'REGRESSION: {problem}')
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+Rows are bulk-inserted with one precomputed password hash, so seeding
+100k users takes seconds rather than hours of hashing.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import User, ServiceRequest, Notification, Complaint, Warning
+
+CATEGORIES = ['electrician', 'barber', 'ac repair', 'plumber', 'fridge repair']
+LOCATIONS = ['Dhanmondi', 'Gulshan', 'Banani', 'Mirpur', 'Uttara', 'Mohammadpur', 'Motijheel', 'Badda']
+PASSWORD = 'bench-pw'
+BENCH_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+
+def _chunks(rows, size=5000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+DEFAULT_STATUSES = ['pending', 'pending', 'accepted', 'completed', 'rejected']
+
+
+def seed(users=200, providers=50, requests=1000, notifications_per_user=5, complaints=100, warnings=50, rng=None,
+         statuses=DEFAULT_STATUSES, premium_share=0.2):
+    """Insert synthetic rows into the current app's database; returns a summary dict."""
+    rng = rng or random.Random(471)
+    pw_hash = generate_password_hash(PASSWORD, method=BENCH_HASH_METHOD)
+    now = datetime.utcnow()
+    # accounts predate everything seeded for them (requests go back 30 days), as reads bound rows by it
+    joined = now - timedelta(days=31)
+
+    user_rows = [{
+        'username': f'user_{i}', 'password_hash': pw_hash, 'role': 'user',
+        'name': f'User {i}', 'email': f'user_{i}@example.com',
+        'location': rng.choice(LOCATIONS), 'created_at': joined,
+        'is_premium': rng.random() < premium_share,
+    } for i in range(users)]
+    provider_rows = [{
+        'username': f'provider_{i}', 'password_hash': pw_hash, 'role': 'provider',
+        'name': f'Provider {i}', 'email': f'provider_{i}@example.com',
+        'partner_category': CATEGORIES[i % len(CATEGORIES)],
+        'partner_locations': ','.join(rng.sample(LOCATIONS, 3)),
+        'provider_unique_id': f'PROV-{i + 1:03d}', 'created_at': joined,
+    } for i in range(providers)]
+    admin_row = {'username': 'bench_admin', 'password_hash': pw_hash, 'role': 'admin', 'created_at': joined}
+    for chunk in _chunks(user_rows + provider_rows + [admin_row]):
+        db.session.execute(insert(User), chunk)
+    db.session.commit()
+
+    user_rows_by_id = {uid: (location, premium) for uid, location, premium in db.session.query(
+        User.id, User.location, User.is_premium).filter(User.role == 'user')}
+    user_ids = list(user_rows_by_id)
+    provider_ids = [pid for (pid,) in db.session.query(User.id).filter(User.role == 'provider')]
+
+    request_rows = []
+    for i in range(requests):
+        status = rng.choice(statuses)
+        user_id = rng.choice(user_ids)
+        location, premium = user_rows_by_id[user_id]
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        request_rows.append({
+            'user_id': user_id,
+            'provider_id': rng.choice(provider_ids) if status in ('accepted', 'completed') and provider_ids else None,
+            'category': rng.choice(CATEGORIES), 'description': f'synthetic request {i}',
+            'status': status, 'created_at': created_at,
+            'location': location.lower(), 'is_priority': premium,
+            'dispatch_at': created_at - timedelta(hours=2) if premium else created_at,
+        })
+    for chunk in _chunks(request_rows):
+        db.session.execute(insert(ServiceRequest), chunk)
+
+    notification_rows = [{
+        'recipient_id': uid, 'message': f'synthetic notification {n} for {uid}',
+        'is_read': rng.random() < 0.5, 'created_at': now - timedelta(minutes=n),
+    } for uid in user_ids + provider_ids for n in range(notifications_per_user)]
+    for chunk in _chunks(notification_rows):
+        db.session.execute(insert(Notification), chunk)
+
+    complaint_rows = [{
+        'user_id': rng.choice(user_ids), 'provider_id': rng.choice(provider_ids) if provider_ids else None,
+        'title': f'complaint {i}', 'description': 'late and rude', 'status': 'pending', 'created_at': now,
+        'updated_at': now,
+    } for i in range(complaints)]
+    for chunk in _chunks(complaint_rows):
+        db.session.execute(insert(Complaint), chunk)
+
+    admin_id = db.session.query(User.id).filter_by(username='bench_admin').scalar()
+    complaint_refs = db.session.query(Complaint.id, Complaint.provider_id).filter(
+        Complaint.provider_id.isnot(None)).limit(warnings).all()
+    warning_rows = [{
+        'complaint_id': cid, 'provider_id': pid, 'admin_id': admin_id,
+        'message': 'please improve', 'created_at': now,
+    } for cid, pid in complaint_refs]
+    if warning_rows:
+        db.session.execute(insert(Warning), warning_rows)
+    db.session.commit()
+
+    return {'users': users, 'providers': providers, 'requests': requests,
+            'notifications': len(notification_rows), 'complaints': complaints, 'warnings': len(warning_rows)}
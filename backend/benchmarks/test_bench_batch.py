@@ -0,0 +1,48 @@
+"""
+50 actions as 50 HTTP requests versus one ``POST /batch`` (``BENCH_BATCH_SIZE``):
+marking notifications read, the most common multi-select action. Both go
+through the in-process test client, so the difference is the per-request
+overhead (auth, user load, commit) that the batch shares.
+"""
+import os
+
+import pytest
+
+from app import create_app, db
+from app.models import User, Notification
+
+from benchmarks.conftest import BenchConfig
+from benchmarks.seed import seed, PASSWORD
+
+ACTIONS = int(os.environ.get('BENCH_BATCH_SIZE', 50))
+
+
+@pytest.fixture(scope='module')
+def batch_ctx():
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(users=20, providers=5, requests=100, notifications_per_user=ACTIONS, complaints=0, warnings=0)
+        user = User.query.filter_by(username='user_0').one()
+        ids = [n.id for n in Notification.query.filter_by(recipient_id=user.id).limit(ACTIONS)]
+    client = app.test_client()
+    assert client.post('/api/v1/auth/login', json={'username': 'user_0', 'password': PASSWORD}).status_code == 200
+    yield client, ids
+    with app.app_context():
+        db.drop_all()
+
+
+def test_separate_requests(benchmark, batch_ctx):
+    client, ids = batch_ctx
+
+    def run():
+        return [client.post(f'/api/v1/notifications/{i}/mark_read').status_code for i in ids]
+    assert benchmark(run) == [200] * len(ids)
+
+
+def test_single_batch(benchmark, batch_ctx):
+    client, ids = batch_ctx
+    operations = [{'method': 'POST', 'path': f'/notifications/{i}/mark_read'} for i in ids]
+    res = benchmark(client.post, '/api/v1/batch', json={'operations': operations})
+    assert res.status_code == 200 and res.get_json()['committed']
@@ -0,0 +1,66 @@
+"""
+Chat throughput with synchronous commits versus ``CHAT_WRITE_BEHIND``:
+``BENCH_CHAT_MESSAGES`` POSTs to one service-request chat through the
+in-process test client, against a SQLite file (``BENCH_DATABASE_URL`` to use
+another database) so every synchronous commit pays its fsync. Messages per
+second is reported in each benchmark's ``extra_info``. The write-behind run
+flushes and counts the rows at the end, so it is measured with everything
+persisted.
+"""
+import os
+
+import pytest
+
+from app import create_app, db
+from app.chat_writer import flush_chat
+from app.models import User, ServiceRequest, ChatMessage
+
+from benchmarks.conftest import BenchConfig
+from benchmarks.seed import seed, PASSWORD
+
+MESSAGES = int(os.environ.get('BENCH_CHAT_MESSAGES', 200))
+
+
+@pytest.fixture(params=[False, True], ids=['sync', 'write_behind'])
+def chat_ctx(request, tmp_path):
+    config = type('ChatBenchConfig', (BenchConfig,), {
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('BENCH_DATABASE_URL') or f'sqlite:///{tmp_path}/chat.db',
+        'RATE_LIMIT_ENABLED': False,
+        'CHAT_WRITE_BEHIND': request.param,
+        'CHAT_JOURNAL_DIR': str(tmp_path / 'journal'),
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(users=2, providers=1, requests=0, notifications_per_user=0, complaints=0, warnings=0)
+        user = User.query.filter_by(username='user_0').one()
+        provider = User.query.filter_by(role='provider').first()
+        sr = ServiceRequest(user_id=user.id, provider_id=provider.id, category='barber', status='accepted')
+        db.session.add(sr)
+        db.session.commit()
+        sr_id = sr.id
+    client = app.test_client()
+    assert client.post('/api/v1/auth/login', json={'username': 'user_0', 'password': PASSWORD}).status_code == 200
+    yield app, client, f'/api/v1/service_requests/{sr_id}/messages'
+    with app.app_context():
+        db.drop_all()
+
+
+def test_chat_throughput(benchmark, chat_ctx):
+    app, client, url = chat_ctx
+    rounds = []
+
+    def run():
+        rounds.append(1)
+        statuses = [client.post(url, json={'message': f'message {i}'}).status_code for i in range(MESSAGES)]
+        with app.app_context():
+            flush_chat()
+        return statuses
+
+    assert benchmark.pedantic(run, rounds=5) == [201] * MESSAGES
+    # --benchmark-disable runs it once and collects no stats
+    if benchmark.stats:
+        benchmark.extra_info['messages_per_second'] = round(MESSAGES / benchmark.stats['mean'])
+    with app.app_context():
+        assert ChatMessage.query.count() == MESSAGES * len(rounds)
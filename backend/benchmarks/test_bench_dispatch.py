@@ -0,0 +1,55 @@
+"""
+Dispatch queue reads at 100k pending requests (``BENCH_DISPATCH_REQUESTS``):
+a provider's queue head, a deep keyset page, and the old created_at-ordered
+category scan the dashboard used before, for comparison.
+"""
+import os
+import random
+
+import pytest
+
+from app import create_app, db
+from app.dispatch import queue_query
+from app.models import User, ServiceRequest
+
+from benchmarks.conftest import BenchConfig
+from benchmarks.seed import seed
+
+PENDING = int(os.environ.get('BENCH_DISPATCH_REQUESTS', 100_000))
+
+
+@pytest.fixture(scope='module')
+def dispatch_ctx():
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(users=2000, providers=100, requests=PENDING, notifications_per_user=0, complaints=0,
+             warnings=0, statuses=['pending'], rng=random.Random(37))
+        db.session.execute(db.text('ANALYZE'))
+        yield app
+        db.session.rollback()
+        db.drop_all()
+
+
+@pytest.fixture
+def provider(dispatch_ctx):
+    return User.query.filter_by(role='provider').first()
+
+
+def test_queue_head(benchmark, provider):
+    rows = benchmark(lambda: queue_query(provider).limit(50).all())
+    assert len(rows) == 50
+
+
+def test_queue_deep_page(benchmark, provider):
+    cursor = queue_query(provider).offset(5000).first()
+    rows = benchmark(lambda: queue_query(provider, after=cursor).limit(50).all())
+    assert len(rows) == 50
+
+
+def test_category_scan_by_created_at(benchmark, provider):
+    # the pre-queue provider listing: every request in the category, newest first
+    rows = benchmark.pedantic(lambda: ServiceRequest.query.filter_by(category=provider.partner_category)
+                              .order_by(ServiceRequest.created_at.desc()).all(), rounds=3)
+    assert len(rows) > 50
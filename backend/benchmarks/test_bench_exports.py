@@ -0,0 +1,69 @@
+"""
+Streaming a ``BENCH_EXPORT_ROWS`` (default 1M) service-request CSV export
+from a SQLite file (``BENCH_DATABASE_URL`` for another database), with a
+fixed ceiling on the peak Python heap that does not depend on the row count.
+The rows are generated inside the database and not timed.
+"""
+import os
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.models import User
+
+from benchmarks.conftest import BenchConfig
+from benchmarks.seed import PASSWORD
+
+EXPORT_ROWS = int(os.environ.get('BENCH_EXPORT_ROWS', 1_000_000))
+# Peak Python heap allowed while streaming, independent of EXPORT_ROWS
+EXPORT_MEMORY_CEILING = 16 * 1024 * 1024
+
+
+def test_export_streams_large_table_under_memory_ceiling(benchmark, tmp_path):
+    config = type('ExportBenchConfig', (BenchConfig,), {
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('BENCH_DATABASE_URL') or f'sqlite:///{tmp_path}/export.db',
+        'RATE_LIMIT_ENABLED': False,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench_user')
+        admin = User(username='bench_admin', role='admin')
+        for u in (user, admin):
+            u.set_password(PASSWORD)
+        db.session.add_all([user, admin])
+        db.session.commit()
+        # generate the rows inside the database; building 1M dicts in Python would dwarf the export
+        db.session.execute(text(
+            'WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows) '
+            'INSERT INTO service_request (user_id, category, description, status, created_at) '
+            "SELECT :user_id, 'electrician', 'request ' || n, 'completed', :now FROM seq"
+        ), {'rows': EXPORT_ROWS, 'user_id': user.id, 'now': datetime.utcnow()})
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/api/v1/auth/login', json={'username': 'bench_admin', 'password': PASSWORD})
+
+    def export():
+        tracemalloc.start()
+        try:
+            res = client.get('/api/v1/admin/export/service_requests?format=csv', buffered=False)
+            assert res.status_code == 200
+            lines = sum(chunk.count(b'\n') for chunk in res.response)
+            res.close()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    lines, peak = benchmark.pedantic(export, rounds=1, iterations=1)
+    benchmark.extra_info['rows'] = EXPORT_ROWS
+    benchmark.extra_info['peak_heap_bytes'] = peak
+    with app.app_context():
+        db.drop_all()
+
+    assert lines == EXPORT_ROWS + 1  # header
+    assert peak < EXPORT_MEMORY_CEILING
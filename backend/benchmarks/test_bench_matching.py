@@ -0,0 +1,19 @@
+"""Micro-benchmarks of provider matching for new service requests."""
+from app.matching import filter_by_location, find_matching_providers
+from app.models import User
+
+
+def test_filter_by_location(benchmark, bench_ctx):
+    providers = User.query.filter_by(role='provider').all()
+    result = benchmark(filter_by_location, 'Gulshan', providers)
+    assert result
+
+
+def test_filter_without_location(benchmark, bench_ctx):
+    providers = User.query.filter_by(role='provider').all()
+    benchmark(filter_by_location, None, providers)
+
+
+def test_find_matching_providers_query(benchmark, bench_ctx):
+    user = User.query.filter_by(role='user').first()
+    benchmark(find_matching_providers, user, 'plumber')
@@ -0,0 +1,105 @@
+"""
+Near-duplicate lookups (``find_similar``) as the complaint table grows to
+``BENCH_SIMILAR_COMPLAINTS`` (default 1M). One SQLite file
+(``BENCH_DATABASE_URL`` for another database) is filled in stages of 10k,
+100k and 1M synthetic complaints. About one in ten re-files an earlier
+complaint with a few words changed. Each stage times the lookup for
+existing complaints, so the mean should stay roughly flat while the table
+grows a hundredfold. ``extra_info`` records the table size and the average
+number of near-duplicates found (the probe itself included). Filling 1M rows (signing,
+plus 16M bucket rows) takes a few minutes and is not timed.
+"""
+import itertools
+import os
+import random
+
+import pytest
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.models import User, Complaint, ComplaintBucket
+from app.near_duplicates import buckets, decode, encode, find_similar, signature
+
+from benchmarks.conftest import BenchConfig
+
+TOTAL = int(os.environ.get('BENCH_SIMILAR_COMPLAINTS', 1_000_000))
+STAGES = sorted({n for n in (10_000, 100_000, TOTAL) if n <= TOTAL})
+# a Zipf-distributed vocabulary, so a few words (and their shingles) are in most complaints
+_letters = random.Random(3)
+VOCABULARY = [''.join(_letters.choice('abcdefghijklmnoprstuvwy') for _ in range(_letters.randint(2, 9)))
+              for _ in range(20_000)]
+WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+
+
+def _texts(rng, count, start):
+    """Complaint texts start..start+count; about 10% re-file an earlier one with a few words changed."""
+    texts = []
+    for i in range(start, start + count):
+        if i and rng.random() < 0.1:
+            words = _texts.cache[rng.randrange(i)].split()
+            for _ in range(3):
+                words[rng.randrange(len(words))] = rng.choices(VOCABULARY, cum_weights=WEIGHTS)[0]
+        else:
+            words = rng.choices(VOCABULARY, cum_weights=WEIGHTS, k=rng.randint(12, 30))
+        text = ' '.join(words)
+        _texts.cache.append(text)
+        texts.append(text)
+    return texts
+
+
+_texts.cache = []
+
+
+def _fill(start, end, rng, user_id, provider_id):
+    for offset in range(start, end, 5000):
+        complaints, bucket_rows = [], []
+        for i, text in enumerate(_texts(rng, min(5000, end - offset), offset), start=offset + 1):
+            sig = signature(text)
+            complaints.append({'id': i, 'user_id': user_id, 'provider_id': provider_id, 'title': text[:40],
+                               'description': text, 'status': 'pending', 'minhash': encode(sig), 'cluster_id': i})
+            bucket_rows += [{'bucket': key, 'complaint_id': i} for key in buckets(sig)]
+        db.session.execute(insert(Complaint), complaints)
+        db.session.execute(insert(ComplaintBucket), bucket_rows)
+        db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def growing_app(tmp_path_factory):
+    config = type('NearDuplicateBenchConfig', (BenchConfig,), {
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('BENCH_DATABASE_URL')
+        or f"sqlite:///{tmp_path_factory.mktemp('near_duplicates')}/complaints.db",
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench_user', password_hash='x')
+        provider = User(username='bench_provider', password_hash='x', role='provider')
+        db.session.add_all([user, provider])
+        db.session.commit()
+        _texts.cache.clear()
+        state = {'size': 0, 'rng': random.Random(7), 'user_id': user.id, 'provider_id': provider.id}
+    yield app, state
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.mark.parametrize('size', STAGES)
+def test_find_similar_as_complaints_grow(benchmark, growing_app, size):
+    app, state = growing_app
+    with app.app_context():
+        _fill(state['size'], size, state['rng'], state['user_id'], state['provider_id'])
+        state['size'] = size
+        probes = random.Random(size).sample(range(1, size + 1), 200)
+        signatures = [decode(c.minhash) for c in Complaint.query.filter(Complaint.id.in_(probes))]
+        queries = itertools.cycle(signatures)
+        found = []
+
+        def lookup():
+            found.append(len(find_similar(next(queries))))
+            db.session.rollback()
+
+        benchmark.pedantic(lookup, rounds=200, iterations=1)
+        benchmark.extra_info['complaints'] = size
+        benchmark.extra_info['mean_similar_found'] = round(sum(found) / len(found), 2)
+    assert all(n >= 1 for n in found)   # every probe finds at least itself
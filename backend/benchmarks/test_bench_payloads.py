@@ -0,0 +1,33 @@
+"""
+Bandwidth and latency of GET /complaints (admin, every seeded complaint) with
+and without a sparse fieldset and per Content-Encoding. Response sizes are
+recorded as ``bytes`` in each benchmark's extra_info (shown with --benchmark-json
+or --benchmark-autosave).
+"""
+import pytest
+
+from benchmarks.seed import PASSWORD
+
+QUERIES = {
+    'full': '/api/v1/complaints',
+    'fields': '/api/v1/complaints?fields=id,title,status,created_at',
+}
+ENCODINGS = ['identity', 'gzip', 'br']
+
+
+@pytest.fixture(scope='module')
+def admin_client(bench_app):
+    client = bench_app.test_client()
+    res = client.post('/api/v1/auth/login', json={'username': 'bench_admin', 'password': PASSWORD})
+    assert res.status_code == 200
+    return client
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+@pytest.mark.parametrize('query', QUERIES)
+def test_complaints_payload(benchmark, admin_client, query, encoding):
+    headers = {'Accept-Encoding': encoding}
+    res = benchmark(admin_client.get, QUERIES[query], headers=headers)
+    assert res.status_code == 200
+    benchmark.extra_info['bytes'] = len(res.data)
+    benchmark.extra_info['content_encoding'] = res.headers.get('Content-Encoding', 'identity')
@@ -0,0 +1,49 @@
+"""
+Micro-benchmarks of per-model serialization (relationships preloaded).
+
+``dict`` variants time building the payload only; ``encode`` variants time the
+whole response body the way the list endpoints produce it: to_dict() + stdlib
+json (the old path) against as_json() + the configured provider.
+"""
+import json
+
+import pytest
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app.models import User, ServiceRequest, Notification, Complaint, Warning
+
+LOADERS = {
+    'user': lambda: User.query.limit(200).all(),
+    'service_request': lambda: ServiceRequest.query.options(joinedload(ServiceRequest.provider)).limit(500).all(),
+    'notification': lambda: Notification.query.limit(500).all(),
+    'complaint': lambda: Complaint.query.options(
+        joinedload(Complaint.user), joinedload(Complaint.provider)).limit(500).all(),
+    'warning': lambda: Warning.query.options(
+        joinedload(Warning.complaint), joinedload(Warning.provider), joinedload(Warning.admin)).all(),
+}
+
+
+@pytest.mark.parametrize('model', LOADERS)
+def test_to_dict(benchmark, bench_ctx, model):
+    rows = LOADERS[model]()
+    benchmark(lambda: [r.to_dict() for r in rows])
+
+
+@pytest.mark.parametrize('model', LOADERS)
+def test_as_json(benchmark, bench_ctx, model):
+    rows = LOADERS[model]()
+    benchmark(lambda: [r.as_json() for r in rows])
+
+
+@pytest.mark.parametrize('model', LOADERS)
+def test_encode_stdlib(benchmark, bench_ctx, model):
+    rows = LOADERS[model]()
+    benchmark(lambda: json.dumps([r.to_dict() for r in rows]))
+
+
+@pytest.mark.parametrize('model', LOADERS)
+def test_encode_provider(benchmark, bench_ctx, model):
+    rows = LOADERS[model]()
+    provider = current_app.json
+    benchmark(lambda: provider.response([r.as_json() for r in rows]).get_data())
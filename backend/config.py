@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 basedir = Path(__file__).resolve().parent
@@ -8,7 +9,106 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + str(basedir / 'instance' / 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Read replicas for GET requests (comma-separated DATABASE_REPLICA_URLS). A user's reads stay on
+    # the primary for REPLICA_STICKY_SECONDS after their own write; replicas are health-checked every
+    # REPLICA_CHECK_SECONDS, and PostgreSQL ones lagging more than REPLICA_MAX_LAG_SECONDS are skipped
+    SQLALCHEMY_REPLICA_URIS = [u.strip() for u in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if u.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 5)
+    REPLICA_CHECK_SECONDS = int(os.environ.get('REPLICA_CHECK_SECONDS') or 10)
+    REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS') or 5)
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-dev-secret'
+    # Optional bearer-token auth alongside the cookie session
+    JWT_AUTH_ENABLED = os.environ.get('JWT_AUTH_ENABLED') == 'True'
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES') or 15))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.environ.get('JWT_REFRESH_TOKEN_DAYS') or 30))
+    # How stale the per-process revocation list may get before it is reloaded
+    JWT_BLOCKLIST_CACHE_SECONDS = int(os.environ.get('JWT_BLOCKLIST_CACHE_SECONDS') or 5)
+    # Password hashing (Werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt'
+    # Create the demo users, providers and admin1 at startup (local development only)
+    SEED_DEMO_DATA = os.environ.get('SEED_DEMO_DATA') == 'True'
+    # Cheap profile for demo seeding; those hashes are upgraded on first login
+    PASSWORD_HASH_SEED_METHOD = os.environ.get('PASSWORD_HASH_SEED_METHOD') or 'pbkdf2:sha256:1000'
+    # Native threads used for hashing under eventlet/gevent
+    PASSWORD_HASH_THREADS = int(os.environ.get('PASSWORD_HASH_THREADS') or 4)
+    # Logging: level, 'json' or 'text' lines, and the fraction of high-volume events kept
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'json'
+    LOG_SAMPLE_RATES = {'socket.join': 0.1, 'socket.leave': 0.1}
+    # Request/SQL instrumentation served at GET /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+    # Log statements slower than this many seconds (unset disables the slow-query log)
+    SLOW_QUERY_SECONDS = float(os.environ['SLOW_QUERY_SECONDS']) if os.environ.get('SLOW_QUERY_SECONDS') else None
+    # JSON encoder for API responses: 'auto' (orjson when installed), 'orjson' or 'stdlib'
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER') or 'auto'
+    # gzip/brotli for API responses of at least COMPRESS_MIN_SIZE bytes
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True') == 'True'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL') or 6)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY') or 4)
+    # Premium entitlement cache and the expiry sweeper (interval 0 disables the background task)
+    PREMIUM_CACHE_SECONDS = int(os.environ.get('PREMIUM_CACHE_SECONDS') or 60)
+    PREMIUM_SWEEP_INTERVAL = int(os.environ.get('PREMIUM_SWEEP_INTERVAL') or 300)
+    PREMIUM_SWEEP_BATCH_SIZE = int(os.environ.get('PREMIUM_SWEEP_BATCH_SIZE') or 500)
+    PREMIUM_SWEEP_MAX_BATCHES = int(os.environ.get('PREMIUM_SWEEP_MAX_BATCHES') or 20)
+    # Dispatch queue: premium requests jump this far ahead; providers get this many per page
+    DISPATCH_PREMIUM_BOOST_MINUTES = int(os.environ.get('DISPATCH_PREMIUM_BOOST_MINUTES') or 120)
+    DISPATCH_QUEUE_PAGE_SIZE = int(os.environ.get('DISPATCH_QUEUE_PAGE_SIZE') or 50)
+    # Provider inbox: own accepted/completed jobs per page
+    PROVIDER_JOBS_PAGE_SIZE = int(os.environ.get('PROVIDER_JOBS_PAGE_SIZE') or 50)
+    # GET /dashboard: per-user cache, also dropped on socket pushes to the user and on their writes
+    DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS') or 30)
+    # POST /batch: most sub-operations accepted in one request
+    BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS') or 100)
+    # Token buckets per user and endpoint: (capacity, seconds to refill from empty). Creating a
+    # service request costs 1 + the providers it notifies. Backend 'memory' (per process) or 'database'
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND') or 'memory'
+    RATE_LIMITS = {
+        'create_service_request': (int(os.environ.get('RATE_LIMIT_SERVICE_REQUEST_TOKENS') or 500), 3600),
+        'send_service_request_message': (60, 60),
+        'create_complaint': (10, 3600),
+        'send_complaint_message': (60, 60),
+    }
+    # Idempotency-Key: how long responses are kept, the per-process LRU in front of the table,
+    # how long a concurrent duplicate waits for the first request before answering 409, and how
+    # long a claim is held for a request still running before another one may take the key over
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 24 * 3600)
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE') or 1024)
+    IDEMPOTENCY_WAIT_SECONDS = int(os.environ.get('IDEMPOTENCY_WAIT_SECONDS') or 10)
+    IDEMPOTENCY_CLAIM_SECONDS = int(os.environ.get('IDEMPOTENCY_CLAIM_SECONDS') or 15 * 60)
+    # Chat write-behind: messages are emitted at once with their final id, journaled locally and
+    # inserted in batches every CHAT_FLUSH_INTERVAL_MS (0 leaves flushing to readers of the chat)
+    CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND') == 'True'
+    CHAT_FLUSH_INTERVAL_MS = int(os.environ.get('CHAT_FLUSH_INTERVAL_MS') or 50)
+    CHAT_FLUSH_BATCH_SIZE = int(os.environ.get('CHAT_FLUSH_BATCH_SIZE') or 500)
+    CHAT_ID_BLOCK_SIZE = int(os.environ.get('CHAT_ID_BLOCK_SIZE') or 100)
+    CHAT_JOURNAL_DIR = os.environ.get('CHAT_JOURNAL_DIR') or str(basedir / 'instance' / 'chat_journal')
+    # Email digests for users with email_digest_minutes set: the sender runs every EMAIL_DIGEST_INTERVAL
+    # seconds (0 disables the background task) and mails up to EMAIL_DIGEST_BATCH_SIZE recipients per
+    # batch over one SMTP connection
+    EMAIL_DIGEST_INTERVAL = int(os.environ.get('EMAIL_DIGEST_INTERVAL') or 60)
+    EMAIL_DIGEST_BATCH_SIZE = int(os.environ.get('EMAIL_DIGEST_BATCH_SIZE') or 500)
+    EMAIL_DIGEST_MAX_BATCHES = int(os.environ.get('EMAIL_DIGEST_MAX_BATCHES') or 20)
+    # Monthly partitions of notification/chat_message: `flask maintain-partitions` creates this many
+    # months ahead and detaches months older than the retention (0 keeps everything)
+    PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD') or 3)
+    PARTITION_RETENTION_MONTHS = {
+        'notification': int(os.environ.get('NOTIFICATION_RETENTION_MONTHS') or 0),
+        'chat_message': int(os.environ.get('CHAT_MESSAGE_RETENTION_MONTHS') or 0),
+    }
+    # Near-duplicate complaints: estimated text similarity that makes two complaints duplicates, and
+    # how many LSH candidates a lookup scores at most
+    COMPLAINT_SIMILARITY_THRESHOLD = float(os.environ.get('COMPLAINT_SIMILARITY_THRESHOLD') or 0.5)
+    COMPLAINT_SIMILAR_CANDIDATES = int(os.environ.get('COMPLAINT_SIMILAR_CANDIDATES') or 200)
+    # Pending-request lifecycle: widen the offer to the whole category, then expire
+    REQUEST_ESCALATE_MINUTES = int(os.environ.get('REQUEST_ESCALATE_MINUTES') or 30)
+    REQUEST_EXPIRE_MINUTES = int(os.environ.get('REQUEST_EXPIRE_MINUTES') or 24 * 60)
+    # Leader-elected scheduler loop (interval 0 disables it)
+    SCHEDULER_INTERVAL = int(os.environ.get('SCHEDULER_INTERVAL') or 30)
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS') or 90)
+    SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE') or 200)
+    SCHEDULER_MAX_BATCHES = int(os.environ.get('SCHEDULER_MAX_BATCHES') or 10)
     # Mail configuration (Gmail SMTP for demo)
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
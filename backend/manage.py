@@ -1,24 +1,39 @@
-from app import create_app, db, socketio
-from flask.cli import FlaskGroup
-from flask_migrate import Migrate
+import os
 import sys
 
+from app import create_app, socketio
+from app.subscriptions import start_subscription_sweeper
+from app.scheduler import start_request_scheduler
+from app.email_digest import start_digest_sender
+from app.chat_writer import start_chat_writer
+from flask.cli import FlaskGroup
+
 app = create_app()
-migrate = Migrate(app, db)
 cli = FlaskGroup(create_app=lambda: app)
 
+
+def run_server(use_reloader=True):
+    """Serve with SocketIO support (debug mode), plus the background tasks."""
+    port = int(os.environ.get('FLASK_RUN_PORT', 1588))
+    # the reloader runs this module in a watcher process too; only the child it spawns serves
+    if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_subscription_sweeper(app)
+        start_request_scheduler(app)
+        start_digest_sender(app)
+        start_chat_writer(app)
+    socketio.run(app, host='0.0.0.0', port=port, debug=True, use_reloader=use_reloader,
+                 allow_unsafe_werkzeug=True)
+
+
 @cli.command()
 def run():
     """Run the application with SocketIO support"""
-    import os
-    port = int(os.environ.get('FLASK_RUN_PORT', 1588))
-    socketio.run(app, host='0.0.0.0', port=port, debug=True, allow_unsafe_werkzeug=True)
+    run_server()
+
 
 if __name__ == '__main__':
     # If 'run' command is provided, use socketio.run, otherwise use Flask CLI
     if len(sys.argv) > 1 and sys.argv[1] == 'run':
-        import os
-        port = int(os.environ.get('FLASK_RUN_PORT', 1588))
-        socketio.run(app, host='0.0.0.0', port=port, debug=True, allow_unsafe_werkzeug=True)
+        run_server()
     else:
         cli()
@@ -16,16 +16,23 @@ branch_labels = None
 depends_on = None
 
 
+def _create_table(name, *columns):
+    # only the tables that are actually missing: on a database built by the
+    # earlier revisions they all exist already
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    op.create_table('item',
+    _create_table('item',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('title', sa.String(length=200), nullable=False),
     sa.Column('description', sa.Text(), nullable=True),
     sa.Column('created_at', sa.DateTime(), nullable=True),
     sa.PrimaryKeyConstraint('id')
     )
-    op.create_table('user',
+    _create_table('user',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('username', sa.String(length=80), nullable=False),
     sa.Column('password_hash', sa.String(length=128), nullable=False),
@@ -47,7 +54,7 @@ def upgrade():
     sa.UniqueConstraint('provider_unique_id'),
     sa.UniqueConstraint('username')
     )
-    op.create_table('notification',
+    _create_table('notification',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('recipient_id', sa.Integer(), nullable=False),
     sa.Column('message', sa.Text(), nullable=False),
@@ -56,7 +63,7 @@ def upgrade():
     sa.ForeignKeyConstraint(['recipient_id'], ['user.id'], ),
     sa.PrimaryKeyConstraint('id')
     )
-    op.create_table('service',
+    _create_table('service',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('provider_id', sa.Integer(), nullable=False),
     sa.Column('title', sa.String(length=200), nullable=False),
@@ -67,7 +74,7 @@ def upgrade():
     sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
     sa.PrimaryKeyConstraint('id')
     )
-    op.create_table('service_request',
+    _create_table('service_request',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('user_id', sa.Integer(), nullable=False),
     sa.Column('provider_id', sa.Integer(), nullable=True),
@@ -79,7 +86,7 @@ def upgrade():
     sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
     sa.PrimaryKeyConstraint('id')
     )
-    op.create_table('complaint',
+    _create_table('complaint',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('user_id', sa.Integer(), nullable=False),
     sa.Column('provider_id', sa.Integer(), nullable=True),
@@ -95,7 +102,7 @@ def upgrade():
     sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
     sa.PrimaryKeyConstraint('id')
     )
-    op.create_table('warning',
+    _create_table('warning',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('complaint_id', sa.Integer(), nullable=False),
     sa.Column('provider_id', sa.Integer(), nullable=False),
@@ -0,0 +1,41 @@
+"""add dispatch queue columns to service_request
+
+Revision ID: a8d4f2c6e913
+Revises: e5a7c3b9d2f1
+Create Date: 2026-01-23 14:05:27.904416
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4f2c6e913'
+down_revision = 'e5a7c3b9d2f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('location', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('is_priority', sa.Boolean(), nullable=True))
+        batch_op.add_column(sa.Column('dispatch_at', sa.DateTime(), nullable=True))
+
+    # Existing requests keep their creation order and the requester's current location
+    op.execute(
+        'UPDATE service_request SET is_priority = false, dispatch_at = created_at, '
+        'location = (SELECT lower(trim(coalesce("user".location, \'\'))) FROM "user" '
+        'WHERE "user".id = service_request.user_id)'
+    )
+
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.create_index('ix_service_request_dispatch', ['category', 'status', 'dispatch_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_service_request_dispatch')
+        batch_op.drop_column('dispatch_at')
+        batch_op.drop_column('is_priority')
+        batch_op.drop_column('location')
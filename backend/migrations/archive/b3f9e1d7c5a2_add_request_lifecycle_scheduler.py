@@ -0,0 +1,50 @@
+"""add per-provider rejections, next_action_at and scheduler lease
+
+Revision ID: b3f9e1d7c5a2
+Revises: a8d4f2c6e913
+Create Date: 2026-01-27 16:48:10.271935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f9e1d7c5a2'
+down_revision = 'a8d4f2c6e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('service_request_rejection',
+    sa.Column('service_request_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['service_request_id'], ['service_request.id'], ),
+    sa.PrimaryKeyConstraint('service_request_id', 'provider_id')
+    )
+    op.create_table('scheduler_lease',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('holder', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('escalation_level', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('next_action_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_service_request_next_action', ['status', 'next_action_at'], unique=False)
+
+    # Requests left pending so far are due straight away: the scheduler escalates or expires them
+    op.execute("UPDATE service_request SET next_action_at = created_at WHERE status = 'pending'")
+
+
+def downgrade():
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_service_request_next_action')
+        batch_op.drop_column('next_action_at')
+        batch_op.drop_column('escalation_level')
+
+    op.drop_table('scheduler_lease')
+    op.drop_table('service_request_rejection')
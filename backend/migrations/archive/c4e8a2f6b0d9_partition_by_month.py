@@ -0,0 +1,103 @@
+"""partition notification and chat_message by month
+
+On PostgreSQL both tables are rebuilt as range-partitioned tables with one
+partition per month from the oldest row to three months ahead, plus a
+default partition; ``flask maintain-partitions`` keeps them going. The
+primary key becomes (id, created_at), as partitioning requires. Other
+databases only get the indexes (see app/partitions.py).
+
+Revision ID: c4e8a2f6b0d9
+Revises: a7e3c9f1b5d8
+Create Date: 2026-02-23 09:18:44.507126
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2f6b0d9'
+down_revision = 'a7e3c9f1b5d8'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+INDEXES = {
+    'notification': [('ix_notification_recipient_created', ['recipient_id', 'created_at'])],
+    'chat_message': [('ix_chat_message_service_request_created', ['service_request_id', 'created_at']),
+                     ('ix_chat_message_complaint_created', ['complaint_id', 'created_at'])],
+}
+FOREIGN_KEYS = {
+    'notification': [('recipient_id', 'user')],
+    'chat_message': [('complaint_id', 'complaint'), ('service_request_id', 'service_request'),
+                     ('sender_id', 'user')],
+}
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _rebuild(table, partitioned):
+    """Recreate `table` (partitioned by month or plain) with its rows, keys and id sequence."""
+    bind = op.get_bind()
+    old = f'{table}_old'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    if partitioned:
+        op.execute(f"UPDATE {old} SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)')
+    else:
+        for name, _ in INDEXES[table]:
+            op.execute(f'DROP INDEX {name}')
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+    for column, referenced in FOREIGN_KEYS[table]:
+        op.execute(f'ALTER TABLE {table} ADD FOREIGN KEY ({column}) REFERENCES "{referenced}" (id)')
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': old}).scalar()
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+
+    if partitioned:
+        current = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month = bind.execute(sa.text(f"SELECT date_trunc('month', min(created_at)) FROM {old}")).scalar() or current
+        while month <= _add_months(current, MONTHS_AHEAD):
+            end = _add_months(month, 1)
+            op.execute(f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                       f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')")
+            month = end
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    # on downgrade this also drops the attached partitions; detached ones stay as standalone tables
+    op.execute(f'DROP TABLE {old}')
+    if partitioned:
+        for name, columns in INDEXES[table]:
+            op.create_index(name, table, columns, unique=False)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in INDEXES:
+            _rebuild(table, partitioned=True)
+        return
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in INDEXES:
+            _rebuild(table, partitioned=False)
+        return
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in indexes:
+                batch_op.drop_index(name)
@@ -0,0 +1,72 @@
+"""unify provider unique ids
+
+Revision ID: c7f3a9d1e2b4
+Revises: 2d0118c73f12
+Create Date: 2026-01-08 14:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f3a9d1e2b4'
+down_revision = '2d0118c73f12'
+branch_labels = None
+depends_on = None
+
+COUNTER_NAME = 'provider_unique_id'
+SEQUENCE_NAME = 'provider_unique_id_seq'
+
+
+def _prov_number(value):
+    # Only PROV-<n> IDs are kept; PV-<user id> IDs from /auth/register are reissued
+    if not value or not value.startswith('PROV-'):
+        return None
+    try:
+        return int(value[len('PROV-'):])
+    except ValueError:
+        return None
+
+
+def upgrade():
+    op.create_table('id_counter',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    bind = op.get_bind()
+    user = sa.table('user',
+        sa.column('id', sa.Integer),
+        sa.column('role', sa.String),
+        sa.column('provider_unique_id', sa.String),
+    )
+    rows = bind.execute(
+        sa.select(user.c.id, user.c.role, user.c.provider_unique_id)
+        .where(sa.or_(user.c.role == 'provider', user.c.provider_unique_id.isnot(None)))
+        .order_by(user.c.id)
+    ).all()
+
+    last = max((_prov_number(r.provider_unique_id) or 0 for r in rows), default=0)
+    for r in rows:
+        if _prov_number(r.provider_unique_id) is not None:
+            continue
+        last += 1
+        bind.execute(
+            user.update().where(user.c.id == r.id).values(provider_unique_id=f'PROV-{last:03d}')
+        )
+
+    counter = sa.table('id_counter', sa.column('name', sa.String), sa.column('value', sa.Integer))
+    op.bulk_insert(counter, [{'name': COUNTER_NAME, 'value': last}])
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(sa.schema.CreateSequence(sa.Sequence(SEQUENCE_NAME)))
+        if last:
+            op.execute(f"SELECT setval('{SEQUENCE_NAME}', {last})")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.schema.DropSequence(sa.Sequence(SEQUENCE_NAME)))
+    op.drop_table('id_counter')
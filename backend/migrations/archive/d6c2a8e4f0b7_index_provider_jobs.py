@@ -0,0 +1,26 @@
+"""index service_request (provider_id, created_at, id) for the provider inbox
+
+Revision ID: d6c2a8e4f0b7
+Revises: b3f9e1d7c5a2
+Create Date: 2026-02-09 10:27:51.204638
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6c2a8e4f0b7'
+down_revision = 'b3f9e1d7c5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.create_index('ix_service_request_provider_jobs', ['provider_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_service_request_provider_jobs')
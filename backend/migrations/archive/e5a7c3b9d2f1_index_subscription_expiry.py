@@ -0,0 +1,26 @@
+"""index user.subscription_expiry for the premium expiry sweeper
+
+Revision ID: e5a7c3b9d2f1
+Revises: 4b8e2f6a9c1d
+Create Date: 2026-01-19 09:12:44.530117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c3b9d2f1'
+down_revision = '4b8e2f6a9c1d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_subscription_expiry'), ['subscription_expiry'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_subscription_expiry'))
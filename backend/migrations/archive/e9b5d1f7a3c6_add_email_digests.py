@@ -0,0 +1,44 @@
+"""add user.email_digest_minutes and pending_email for email digests
+
+Revision ID: e9b5d1f7a3c6
+Revises: c4e8a2f6b0d9
+Create Date: 2026-02-25 16:03:27.918345
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b5d1f7a3c6'
+down_revision = 'c4e8a2f6b0d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_digest_minutes', sa.Integer(), nullable=True))
+
+    op.create_table('pending_email',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('send_after', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['recipient_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('pending_email', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_pending_email_recipient_id'), ['recipient_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pending_email', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pending_email_recipient_id'))
+
+    op.drop_table('pending_email')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('email_digest_minutes')
@@ -0,0 +1,29 @@
+"""add rate_limit_bucket for the shared token-bucket backend
+
+Revision ID: f2b8d4a6c0e3
+Revises: d6c2a8e4f0b7
+Create Date: 2026-02-16 14:05:37.880412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4a6c0e3'
+down_revision = 'd6c2a8e4f0b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_bucket',
+    sa.Column('key', sa.String(length=150), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_bucket')
@@ -0,0 +1,263 @@
+"""baseline: the schema of the squashed revision chain
+
+Creates in one step the schema that the 27 revisions now in
+``migrations/archive`` (0e8aedb99139 ... e9b5d1f7a3c6) built, including the
+monthly partitions on PostgreSQL. The ``provider_unique_id`` counter row
+is left to app/provider_ids.py, which seeds it from the ids in use.
+
+It lives apart from ``versions`` and keeps the id of the last archived
+revision: a database still stamped at one of the archived revisions is
+upgraded with ``archive`` in its place (see ``migration_locations`` in
+app/schema.py), so the old chain leads it to this id and on to the revisions
+after it. ``tests/test_schema.py`` checks that both roads give the same
+schema.
+
+Revision ID: e9b5d1f7a3c6
+Revises:
+Create Date: 2026-03-16 10:02:31.418204
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b5d1f7a3c6'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+PARTITIONED = ('notification', 'chat_message')
+
+
+def _postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _primary_key(table):
+    # partitioning by created_at needs it in the primary key (see app/partitions.py); the id
+    # column says autoincrement=True, or a composite key would leave it without a sequence
+    if _postgresql():
+        return [sa.PrimaryKeyConstraint('id', 'created_at', name=f'{table}_pkey')]
+    return [sa.PrimaryKeyConstraint('id')]
+
+
+def _partition_options():
+    return {'postgresql_partition_by': 'RANGE (created_at)'} if _postgresql() else {}
+
+
+def _create_partitions(table):
+    """This month to MONTHS_AHEAD months ahead, plus the default partition."""
+    if not _postgresql():
+        return
+    month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD + 1):
+        end = _add_months(month, 1)
+        op.execute(f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                   f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')")
+        month = end
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+
+def upgrade():
+    op.create_table('id_counter',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('idempotency_record',
+    sa.Column('key', sa.String(length=250), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.LargeBinary(), nullable=True),
+    sa.Column('response_mimetype', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_idempotency_record_expires_at'), 'idempotency_record', ['expires_at'], unique=False)
+    op.create_table('item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('rate_limit_bucket',
+    sa.Column('key', sa.String(length=150), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_table('revoked_token',
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('token_type', sa.String(length=10), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_revoked_token_expires_at'), 'revoked_token', ['expires_at'], unique=False)
+    op.create_table('scheduler_lease',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('holder', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('password_hash', sa.String(length=128), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('role', sa.String(length=20), nullable=True),
+    sa.Column('name', sa.String(length=200), nullable=True),
+    sa.Column('location', sa.String(length=200), nullable=True),
+    sa.Column('skills', sa.Text(), nullable=True),
+    sa.Column('service_area', sa.String(length=200), nullable=True),
+    sa.Column('profile_photo', sa.String(length=500), nullable=True),
+    sa.Column('nid', sa.String(length=50), nullable=True),
+    sa.Column('partner_category', sa.String(length=100), nullable=True),
+    sa.Column('partner_locations', sa.Text(), nullable=True),
+    sa.Column('fee_min', sa.Integer(), nullable=True),
+    sa.Column('fee_max', sa.Integer(), nullable=True),
+    sa.Column('provider_unique_id', sa.String(length=50), nullable=True),
+    sa.Column('is_premium', sa.Boolean(), nullable=True),
+    sa.Column('subscription_expiry', sa.DateTime(), nullable=True),
+    sa.Column('rating_average', sa.Float(), nullable=True),
+    sa.Column('rating_count', sa.Integer(), nullable=True),
+    sa.Column('email_digest_minutes', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_index(op.f('ix_user_subscription_expiry'), 'user', ['subscription_expiry'], unique=False)
+    op.create_table('notification',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=not _postgresql()),
+    sa.ForeignKeyConstraint(['recipient_id'], ['user.id'], ),
+    *_primary_key('notification'),
+    **_partition_options()
+    )
+    op.create_index('ix_notification_recipient_created', 'notification', ['recipient_id', 'created_at'], unique=False)
+    _create_partitions('notification')
+    op.create_table('pending_email',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('send_after', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['recipient_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pending_email_recipient_id'), 'pending_email', ['recipient_id'], unique=False)
+    op.create_table('service',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('service_request',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=True),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('rating', sa.Integer(), nullable=True),
+    sa.Column('review', sa.Text(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('location', sa.String(length=200), nullable=True),
+    sa.Column('is_priority', sa.Boolean(), nullable=True),
+    sa.Column('dispatch_at', sa.DateTime(), nullable=True),
+    sa.Column('escalation_level', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_action_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_service_request_dispatch', 'service_request', ['category', 'status', 'dispatch_at'], unique=False)
+    op.create_index('ix_service_request_next_action', 'service_request', ['status', 'next_action_at'], unique=False)
+    op.create_index('ix_service_request_provider_jobs', 'service_request', ['provider_id', 'created_at', 'id'], unique=False)
+    op.create_table('complaint',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=True),
+    sa.Column('service_request_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('admin_response', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['service_request_id'], ['service_request.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('service_request_rejection',
+    sa.Column('service_request_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['service_request_id'], ['service_request.id'], ),
+    sa.PrimaryKeyConstraint('service_request_id', 'provider_id')
+    )
+    op.create_table('chat_message',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('complaint_id', sa.Integer(), nullable=True),
+    sa.Column('service_request_id', sa.Integer(), nullable=True),
+    sa.Column('sender_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=not _postgresql()),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ),
+    sa.ForeignKeyConstraint(['sender_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['service_request_id'], ['service_request.id'], name='fk_chat_message_service_request'),
+    *_primary_key('chat_message'),
+    **_partition_options()
+    )
+    op.create_index('ix_chat_message_complaint_created', 'chat_message', ['complaint_id', 'created_at'], unique=False)
+    op.create_index('ix_chat_message_service_request_created', 'chat_message', ['service_request_id', 'created_at'], unique=False)
+    _create_partitions('chat_message')
+    op.create_table('warning',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('complaint_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('admin_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['admin_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ),
+    sa.ForeignKeyConstraint(['provider_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    if _postgresql():
+        # provider ids come from this sequence there (app/provider_ids.py)
+        op.execute(sa.schema.CreateSequence(sa.Sequence('provider_unique_id_seq')))
+
+
+def downgrade():
+    if _postgresql():
+        op.execute(sa.schema.DropSequence(sa.Sequence('provider_unique_id_seq')))
+    # dropping a partitioned table drops its partitions; detached ones stay
+    for table in ('warning', 'chat_message', 'service_request_rejection', 'complaint', 'service_request',
+                  'service', 'pending_email', 'notification', 'user', 'scheduler_lease', 'revoked_token',
+                  'rate_limit_bucket', 'item', 'idempotency_record', 'id_counter'):
+        op.drop_table(table)
@@ -0,0 +1,208 @@
+BEGIN TRANSACTION;
+CREATE TABLE alembic_version (
+	version_num VARCHAR(32) NOT NULL, 
+	CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num)
+);
+INSERT INTO "alembic_version" VALUES('a6c1e8f3d2b7');
+CREATE TABLE chat_message (
+	id INTEGER NOT NULL, 
+	complaint_id INTEGER, 
+	service_request_id INTEGER, 
+	sender_id INTEGER NOT NULL, 
+	message TEXT NOT NULL, 
+	created_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(complaint_id) REFERENCES complaint (id), 
+	FOREIGN KEY(sender_id) REFERENCES user (id), 
+	CONSTRAINT fk_chat_message_service_request FOREIGN KEY(service_request_id) REFERENCES service_request (id)
+);
+CREATE TABLE "complaint" (
+	id INTEGER NOT NULL, 
+	user_id INTEGER NOT NULL, 
+	provider_id INTEGER, 
+	service_request_id INTEGER, 
+	title VARCHAR(200) NOT NULL, 
+	description TEXT NOT NULL, 
+	status VARCHAR(20), 
+	admin_response TEXT, 
+	created_at DATETIME, 
+	updated_at DATETIME, 
+	minhash BLOB, 
+	cluster_id INTEGER, 
+	PRIMARY KEY (id), 
+	CONSTRAINT fk_complaint_cluster FOREIGN KEY(cluster_id) REFERENCES complaint (id), 
+	FOREIGN KEY(service_request_id) REFERENCES service_request (id), 
+	FOREIGN KEY(provider_id) REFERENCES user (id), 
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE complaint_lsh_bucket (
+	bucket BIGINT NOT NULL, 
+	complaint_id INTEGER NOT NULL, 
+	PRIMARY KEY (bucket, complaint_id), 
+	FOREIGN KEY(complaint_id) REFERENCES complaint (id)
+);
+CREATE TABLE id_counter (
+	name VARCHAR(50) NOT NULL, 
+	value INTEGER NOT NULL, 
+	PRIMARY KEY (name)
+);
+CREATE TABLE idempotency_record (
+	"key" VARCHAR(250) NOT NULL, 
+	fingerprint VARCHAR(64) NOT NULL, 
+	status VARCHAR(10) NOT NULL, 
+	response_status INTEGER, 
+	response_body BLOB, 
+	response_mimetype VARCHAR(100), 
+	created_at DATETIME NOT NULL, 
+	expires_at DATETIME NOT NULL, 
+	PRIMARY KEY ("key")
+);
+CREATE TABLE item (
+	id INTEGER NOT NULL, 
+	title VARCHAR(200) NOT NULL, 
+	description TEXT, 
+	created_at DATETIME, 
+	PRIMARY KEY (id)
+);
+CREATE TABLE notification (
+	id INTEGER NOT NULL, 
+	recipient_id INTEGER NOT NULL, 
+	message TEXT NOT NULL, 
+	is_read BOOLEAN, 
+	created_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(recipient_id) REFERENCES user (id)
+);
+CREATE TABLE pending_email (
+	id INTEGER NOT NULL, 
+	recipient_id INTEGER NOT NULL, 
+	subject VARCHAR(200) NOT NULL, 
+	message TEXT NOT NULL, 
+	created_at DATETIME NOT NULL, 
+	send_after DATETIME NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(recipient_id) REFERENCES user (id)
+);
+CREATE TABLE rate_limit_bucket (
+	"key" VARCHAR(150) NOT NULL, 
+	tokens FLOAT NOT NULL, 
+	updated_at FLOAT NOT NULL, 
+	PRIMARY KEY ("key")
+);
+CREATE TABLE replica_write_stamp (
+	user_id INTEGER NOT NULL, 
+	wrote_at FLOAT NOT NULL, 
+	PRIMARY KEY (user_id), 
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE revoked_token (
+	jti VARCHAR(36) NOT NULL, 
+	token_type VARCHAR(10), 
+	expires_at DATETIME NOT NULL, 
+	created_at DATETIME, 
+	PRIMARY KEY (jti)
+);
+CREATE TABLE scheduler_lease (
+	name VARCHAR(50) NOT NULL, 
+	holder VARCHAR(100) NOT NULL, 
+	expires_at DATETIME NOT NULL, 
+	PRIMARY KEY (name)
+);
+CREATE TABLE service (
+	id INTEGER NOT NULL, 
+	provider_id INTEGER NOT NULL, 
+	title VARCHAR(200) NOT NULL, 
+	category VARCHAR(100) NOT NULL, 
+	description TEXT, 
+	price VARCHAR(50), 
+	created_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(provider_id) REFERENCES user (id)
+);
+CREATE TABLE service_request (
+	id INTEGER NOT NULL, 
+	user_id INTEGER NOT NULL, 
+	provider_id INTEGER, 
+	category VARCHAR(100) NOT NULL, 
+	description TEXT, 
+	status VARCHAR(20), 
+	rating INTEGER, 
+	review TEXT, 
+	completed_at DATETIME, 
+	created_at DATETIME, 
+	location VARCHAR(200), 
+	is_priority BOOLEAN, 
+	dispatch_at DATETIME, 
+	escalation_level INTEGER DEFAULT '0' NOT NULL, 
+	next_action_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(provider_id) REFERENCES user (id), 
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE service_request_rejection (
+	service_request_id INTEGER NOT NULL, 
+	provider_id INTEGER NOT NULL, 
+	created_at DATETIME, 
+	PRIMARY KEY (service_request_id, provider_id), 
+	FOREIGN KEY(provider_id) REFERENCES user (id), 
+	FOREIGN KEY(service_request_id) REFERENCES service_request (id)
+);
+CREATE TABLE "user" (
+	id INTEGER NOT NULL, 
+	username VARCHAR(80) NOT NULL, 
+	password_hash VARCHAR(128) NOT NULL, 
+	email VARCHAR(120), 
+	created_at DATETIME, 
+	role VARCHAR(20), 
+	name VARCHAR(200), 
+	location VARCHAR(200), 
+	skills TEXT, 
+	service_area VARCHAR(200), 
+	profile_photo VARCHAR(500), 
+	nid VARCHAR(50), 
+	partner_category VARCHAR(100), 
+	partner_locations TEXT, 
+	fee_min INTEGER, 
+	fee_max INTEGER, 
+	provider_unique_id VARCHAR(50), 
+	is_premium BOOLEAN, 
+	subscription_expiry DATETIME, 
+	rating_average FLOAT, 
+	rating_count INTEGER, 
+	email_digest_minutes INTEGER, 
+	PRIMARY KEY (id), 
+	CONSTRAINT uq_user_provider_unique_id UNIQUE (provider_unique_id), 
+	UNIQUE (username)
+);
+CREATE TABLE user_role_change (
+	user_id INTEGER NOT NULL, 
+	role VARCHAR(20) NOT NULL, 
+	expires_at DATETIME NOT NULL, partner_category VARCHAR(100), 
+	PRIMARY KEY (user_id), 
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE warning (
+	id INTEGER NOT NULL, 
+	complaint_id INTEGER NOT NULL, 
+	provider_id INTEGER NOT NULL, 
+	admin_id INTEGER NOT NULL, 
+	message TEXT NOT NULL, 
+	created_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(admin_id) REFERENCES user (id), 
+	FOREIGN KEY(complaint_id) REFERENCES complaint (id), 
+	FOREIGN KEY(provider_id) REFERENCES user (id)
+);
+CREATE INDEX ix_idempotency_record_expires_at ON idempotency_record (expires_at);
+CREATE INDEX ix_revoked_token_expires_at ON revoked_token (expires_at);
+CREATE INDEX ix_notification_recipient_created ON notification (recipient_id, created_at);
+CREATE INDEX ix_pending_email_recipient_id ON pending_email (recipient_id);
+CREATE INDEX ix_service_request_dispatch ON service_request (category, status, dispatch_at);
+CREATE INDEX ix_service_request_next_action ON service_request (status, next_action_at);
+CREATE INDEX ix_service_request_provider_jobs ON service_request (provider_id, created_at, id);
+CREATE INDEX ix_chat_message_complaint_created ON chat_message (complaint_id, created_at);
+CREATE INDEX ix_chat_message_service_request_created ON chat_message (service_request_id, created_at);
+CREATE INDEX ix_user_subscription_expiry ON user (subscription_expiry);
+CREATE INDEX ix_complaint_cluster_id ON complaint (cluster_id);
+CREATE INDEX ix_user_role_change_expires_at ON user_role_change (expires_at);
+COMMIT;
@@ -0,0 +1,26 @@
+"""add user_role_change.partner_category, so category changes reject older access tokens too
+
+Revision ID: a6c1e8f3d2b7
+Revises: d4a7f2c9e1b8
+Create Date: 2026-03-25 11:40:12.583019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c1e8f3d2b7'
+down_revision = 'd4a7f2c9e1b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_role_change', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('partner_category', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_role_change', schema=None) as batch_op:
+        batch_op.drop_column('partner_category')
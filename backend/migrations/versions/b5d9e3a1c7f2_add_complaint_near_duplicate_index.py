@@ -0,0 +1,43 @@
+"""add complaint MinHash signatures, clusters and the LSH bucket table
+
+Existing complaints are indexed by `flask index-complaints` afterwards.
+
+Revision ID: b5d9e3a1c7f2
+Revises: f7c1a3e9b2d4
+Create Date: 2026-03-18 14:41:26.370519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d9e3a1c7f2'
+down_revision = 'f7c1a3e9b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('minhash', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('cluster_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_complaint_cluster_id'), ['cluster_id'], unique=False)
+        batch_op.create_foreign_key('fk_complaint_cluster', 'complaint', ['cluster_id'], ['id'])
+
+    op.create_table('complaint_lsh_bucket',
+    sa.Column('bucket', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('complaint_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ),
+    sa.PrimaryKeyConstraint('bucket', 'complaint_id')
+    )
+
+
+def downgrade():
+    op.drop_table('complaint_lsh_bucket')
+
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_complaint_cluster', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_complaint_cluster_id'))
+        batch_op.drop_column('cluster_id')
+        batch_op.drop_column('minhash')
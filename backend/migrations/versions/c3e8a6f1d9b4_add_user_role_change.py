@@ -0,0 +1,35 @@
+"""add user_role_change, so role changes reject older access tokens
+
+Revision ID: c3e8a6f1d9b4
+Revises: b5d9e3a1c7f2
+Create Date: 2026-03-20 09:12:44.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a6f1d9b4'
+down_revision = 'b5d9e3a1c7f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_role_change',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_role_change', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_role_change_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_role_change', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_role_change_expires_at'))
+
+    op.drop_table('user_role_change')
@@ -0,0 +1,29 @@
+"""add replica_write_stamp, so read-your-writes covers every worker and bearer tokens
+
+Revision ID: d4a7f2c9e1b8
+Revises: c3e8a6f1d9b4
+Create Date: 2026-03-24 14:05:31.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7f2c9e1b8'
+down_revision = 'c3e8a6f1d9b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('replica_write_stamp',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('wrote_at', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('replica_write_stamp')
@@ -0,0 +1,39 @@
+"""make user.provider_unique_id unique
+
+The model has always declared it unique, but only databases whose user
+table came from restore_missing_tables (or create_all) got the constraint.
+
+Revision ID: f7c1a3e9b2d4
+Revises: e9b5d1f7a3c6
+Create Date: 2026-03-16 10:14:07.902351
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c1a3e9b2d4'
+down_revision = 'e9b5d1f7a3c6'
+branch_labels = None
+depends_on = None
+
+NAME = 'uq_user_provider_unique_id'
+
+
+def _unique_constraints():
+    return sa.inspect(op.get_bind()).get_unique_constraints('user')
+
+
+def upgrade():
+    if any(u['column_names'] == ['provider_unique_id'] for u in _unique_constraints()):
+        return
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_unique_constraint(NAME, ['provider_unique_id'])
+
+
+def downgrade():
+    if not any(u['name'] == NAME for u in _unique_constraints()):
+        return
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_constraint(NAME, type_='unique')
@@ -0,0 +1,118 @@
+"""
+Test fixtures.
+
+``app`` / ``client``: one app per test session (per worker under
+``pytest -n auto``, each worker being its own process with its own
+in-memory database), with the schema loaded once. Every test runs inside a
+transaction that is rolled back afterwards; the handlers' own commits only
+release SAVEPOINTs. Per-process state the app builds lazily in
+``app.extensions`` (caches, rate limit buckets, ...) is dropped after each
+test. Code that opens its own connections from ``db.engine`` (POST /batch,
+the chat writer, partition maintenance) cannot run inside that transaction:
+test it, and anything needing config overrides, with ``make_app``.
+
+``make_app(**overrides)``: a fresh app and database per call.
+
+``user_factory`` / ``login``: add users (password ``pw``) and get a test
+client signed in as one of them, for either kind of app.
+"""
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User
+from app.schema import load_snapshot
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SECRET_KEY = 'test-secret'
+    # cheap hashes: tests create users by the dozen
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture(scope='session')
+def session_app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        load_snapshot()
+        # pysqlite defers BEGIN to the first write, so a SAVEPOINT would open the transaction
+        # itself and its RELEASE would commit it; issue BEGIN explicitly (as app/batch.py does)
+        event.listen(db.engine, 'begin', lambda conn: conn.exec_driver_sql('BEGIN'))
+        db.session.configure(join_transaction_mode='create_savepoint')
+    built = set(app.extensions)
+    yield app, built
+    with app.app_context():
+        db.session.configure(join_transaction_mode='conservative_savepoint')
+
+
+@pytest.fixture
+def app(session_app):
+    """The session's app, with everything the test writes rolled back afterwards."""
+    app, built = session_app
+    with app.app_context():
+        engines = db.engines
+        engine = engines[None]
+        connection = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        transaction = connection.begin()
+        # sessions bind to the connection and join its transaction with a SAVEPOINT
+        engines[None] = connection
+    try:
+        yield app
+    finally:
+        with app.app_context():
+            db.session.remove()
+            engines[None] = engine
+            transaction.rollback()
+            connection.close()
+        for name in set(app.extensions) - built:
+            del app.extensions[name]
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_app():
+    """Build an app with a fresh schema (the migrations' snapshot); keyword args override TestConfig."""
+    apps = []
+
+    def _make(**overrides):
+        config = type('Config', (TestConfig,), overrides)
+        app = create_app(config)
+        with app.app_context():
+            load_snapshot()
+        apps.append(app)
+        return app
+
+    yield _make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+@pytest.fixture
+def user_factory():
+    """``user_factory(username, **fields)``: add a User with password 'pw' and flush it (in an app context)."""
+    def create(username, **fields):
+        user = User(username=username, **fields)
+        user.set_password('pw')
+        db.session.add(user)
+        db.session.flush()
+        return user
+    return create
+
+
+@pytest.fixture
+def login():
+    """``login(app, username)``: a new test client of `app`, signed in as `username`."""
+    def sign_in(app, username):
+        client = app.test_client()
+        assert client.post('/api/v1/auth/login', json={'username': username, 'password': 'pw'}).status_code == 200
+        return client
+    return sign_in
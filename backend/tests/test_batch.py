@@ -0,0 +1,85 @@
+from app import db, mail, socketio
+from app.models import ServiceRequest, Notification
+
+
+def _setup(app, user_factory, requests=3):
+    with app.app_context():
+        u = user_factory('u', location='Gulshan', email='u@example.com')
+        user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan')
+        ids = []
+        for _ in range(requests):
+            sr = ServiceRequest(user_id=u.id, category='barber', status='pending', location='gulshan')
+            db.session.add(sr)
+            db.session.flush()
+            ids.append(sr.id)
+        db.session.commit()
+        return ids
+
+
+def _statuses(app):
+    with app.app_context():
+        return {sr.id: sr.status for sr in ServiceRequest.query}
+
+
+def _accept(request_id):
+    return {'method': 'POST', 'path': f'/service_requests/{request_id}/accept'}
+
+
+def test_batch_runs_operations_and_emits_after_commit(make_app, user_factory, login):
+    app = make_app()
+    ids = _setup(app, user_factory)
+    prov = login(app, 'prov')
+    socket = socketio.test_client(app, flask_test_client=prov)
+    socket.get_received()
+
+    with mail.record_messages() as outbox:
+        res = prov.post('/api/v1/batch', json={'operations': [_accept(i) for i in ids] + [
+            {'method': 'GET', 'path': '/service_requests'},
+        ]})
+    assert [m.subject for m in outbox] == ['Service Request Accepted'] * 3
+    body = res.get_json()
+    assert res.status_code == 200 and body['committed'] is True
+    assert [r['status'] for r in body['results']] == [200, 200, 200, 200]
+    assert [r['status'] for r in body['results'][-1]['body']] == ['accepted'] * 3
+    assert set(_statuses(app).values()) == {'accepted'}
+    with app.app_context():
+        assert Notification.query.count() == 3
+
+    updates = [e['args'][0] for e in socket.get_received() if e['name'] == 'inbox_update']
+    assert sorted(u['request']['id'] for u in updates) == ids
+
+
+def test_atomic_batch_rolls_back_on_first_failure(make_app, user_factory, login):
+    app = make_app()
+    ids = _setup(app, user_factory)
+    prov = login(app, 'prov')
+    socket = socketio.test_client(app, flask_test_client=prov)
+    socket.get_received()
+
+    with mail.record_messages() as outbox:
+        body = prov.post('/api/v1/batch', json={'operations': [
+            _accept(ids[0]), _accept(ids[0]), _accept(ids[1]),
+        ]}).get_json()
+    assert outbox == []      # the requester was not told about the rolled-back accept
+    assert body['committed'] is False
+    assert [r['status'] for r in body['results']] == [200, 400, 424]
+    assert set(_statuses(app).values()) == {'pending'}
+    with app.app_context():
+        assert Notification.query.count() == 0
+    assert [e for e in socket.get_received() if e['name'] == 'inbox_update'] == []
+
+
+def test_non_atomic_batch_isolates_failures(make_app, user_factory, login):
+    app = make_app()
+    ids = _setup(app, user_factory)
+    prov = login(app, 'prov')
+
+    body = prov.post('/api/v1/batch', json={'atomic': False, 'operations': [
+        _accept(ids[0]), _accept(ids[0]), {'method': 'POST', 'path': '/batch'},
+        {'method': 'GET', 'path': '/no/such/route'}, _accept(ids[2]),
+    ]}).get_json()
+    assert body['committed'] is True
+    assert [r['status'] for r in body['results']] == [200, 400, 400, 404, 200]
+    assert _statuses(app) == {ids[0]: 'accepted', ids[1]: 'pending', ids[2]: 'accepted'}
+
+    assert prov.post('/api/v1/batch', json={'operations': []}).status_code == 400
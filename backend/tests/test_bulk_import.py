@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from app import db
+from app.models import User, Service
+
+
+@pytest.fixture(autouse=True)
+def existing_provider(app, user_factory):
+    with app.app_context():
+        user_factory('existing_provider', role='provider', partner_category='plumber', provider_unique_id='PROV-007')
+        db.session.commit()
+
+
+def test_import_providers_from_csv(app, tmp_path):
+    path = tmp_path / 'providers.csv'
+    path.write_text(
+        'username,password,name,partner_category,partner_locations,fee_min,service_title,service_price\n'
+        'new_electrician,secret1,Ele,electrician,"Dhanmondi,Gulshan",500,Wiring check,800\n'
+        'existing_provider,secret2,Dup,plumber,,,,\n'
+        'new_barber,secret3,Bar,barber,Banani,,,\n'
+        'no_password,,Bad,barber,,,,\n'
+        'bad_fee,secret4,Fee,barber,,cheap,,\n'
+    )
+    result = app.test_cli_runner().invoke(args=['import-providers', str(path), '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 2 providers (1 services), skipped 1 existing, 2 invalid' in result.output
+    assert 'rows/s' in result.output
+
+    with app.app_context():
+        ele = User.query.filter_by(username='new_electrician').first()
+        barber = User.query.filter_by(username='new_barber').first()
+        assert ele.role == 'provider'
+        assert ele.check_password('secret1')
+        assert ele.partner_locations == 'Dhanmondi,Gulshan'
+        assert ele.fee_min == 500
+        assert User.query.filter_by(username='bad_fee').first() is None
+        # IDs continue after the highest one already issued
+        assert {ele.provider_unique_id, barber.provider_unique_id} == {'PROV-008', 'PROV-009'}
+        service = Service.query.filter_by(provider_id=ele.id).one()
+        assert service.title == 'Wiring check'
+        assert service.category == 'electrician'
+
+
+def test_import_providers_from_jsonl_with_process_pool(app, tmp_path):
+    path = tmp_path / 'providers.jsonl'
+    with open(path, 'w') as f:
+        for i in range(6):
+            f.write(json.dumps({
+                'username': f'agency_{i}',
+                'password': f'pw{i}',
+                'partner_category': 'ac repair',
+                'partner_locations': ['Mirpur'],
+                'services': [{'title': 'AC servicing', 'price': '1200'}, {'title': 'Gas refill'}],
+            }) + '\n')
+    result = app.test_cli_runner().invoke(
+        args=['import-providers', str(path), '--workers', '2', '--batch-size', '4'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        imported = User.query.filter(User.username.like('agency_%')).all()
+        assert len(imported) == 6
+        assert all(u.check_password(f'pw{u.username[-1]}') for u in imported)
+        assert len({u.provider_unique_id for u in imported}) == 6
+        assert Service.query.count() == 12
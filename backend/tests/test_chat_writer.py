@@ -0,0 +1,99 @@
+import json
+
+from sqlalchemy import insert
+
+from app import db, socketio
+from app.chat_writer import insert_missing
+from app.models import ServiceRequest, ChatMessage
+
+
+def _setup(app, user_factory, login):
+    with app.app_context():
+        u = user_factory('u', role='user')
+        prov = user_factory('prov', role='provider')
+        sr = ServiceRequest(user_id=u.id, provider_id=prov.id, category='barber', status='accepted')
+        db.session.add(sr)
+        db.session.commit()
+        sr_id = sr.id
+    return login(app, 'u'), sr_id
+
+
+def test_messages_are_emitted_first_and_survive_a_crash(make_app, tmp_path, user_factory, login):
+    journals = tmp_path / 'journal'
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/chat.db', CHAT_WRITE_BEHIND=True,
+                   CHAT_FLUSH_INTERVAL_MS=0, CHAT_ID_BLOCK_SIZE=2, CHAT_JOURNAL_DIR=str(journals))
+    client, sr_id = _setup(app, user_factory, login)
+    socket = socketio.test_client(app, flask_test_client=client)
+    socket.emit('join_service_request', {'request_id': sr_id})
+    socket.get_received()
+
+    url = f'/api/v1/service_requests/{sr_id}/messages'
+    sent = [client.post(url, json={'message': f'hi {i}'}).get_json() for i in range(3)]
+    ids = [m['id'] for m in sent]
+    assert ids == sorted(ids) and len(set(ids)) == 3
+    assert [e['args'][0] for e in socket.get_received() if e['name'] == 'new_message'] == sent
+    with app.app_context():
+        assert ChatMessage.query.count() == 0        # not flushed yet
+    assert len(list(journals.glob('*.jsonl'))) == 1
+
+    # the process dies: its journal is unlocked and nothing was flushed
+    writer = app.extensions.pop('chat_writer')
+    writer._journal[1].close()
+    res = client.get(url)
+    assert [m['id'] for m in res.get_json()] == ids
+    assert [m['message'] for m in res.get_json()] == ['hi 0', 'hi 1', 'hi 2']
+
+    later = client.post(url, json={'message': 'again'}).get_json()
+    assert later['id'] > ids[-1]
+    assert [m['id'] for m in client.get(url).get_json()] == ids + [later['id']]
+    assert list(journals.glob('*.jsonl')) == []
+
+
+def test_batch_messages_do_not_collide_with_reserved_ids(make_app, tmp_path, user_factory, login):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/chat.db', CHAT_WRITE_BEHIND=True,
+                   CHAT_FLUSH_INTERVAL_MS=0, CHAT_JOURNAL_DIR=str(tmp_path / 'journal'))
+    client, sr_id = _setup(app, user_factory, login)
+    url = f'/api/v1/service_requests/{sr_id}/messages'
+
+    buffered = client.post(url, json={'message': 'write-behind'}).get_json()
+    res = client.post('/api/v1/batch', json={'operations': [
+        {'method': 'POST', 'path': f'/service_requests/{sr_id}/messages', 'body': {'message': 'in a batch'}}]})
+    batched = res.get_json()['results'][0]['body']
+    assert batched['id'] != buffered['id']
+    assert [m['message'] for m in client.get(url).get_json()] == ['write-behind', 'in a batch']
+
+
+def test_messages_whose_id_was_taken_are_set_aside(make_app, tmp_path, user_factory, login):
+    journals = tmp_path / 'journal'
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/chat.db', CHAT_WRITE_BEHIND=True,
+                   CHAT_FLUSH_INTERVAL_MS=0, CHAT_JOURNAL_DIR=str(journals))
+    client, sr_id = _setup(app, user_factory, login)
+    url = f'/api/v1/service_requests/{sr_id}/messages'
+    lost, kept = [client.post(url, json={'message': m}).get_json() for m in ('lost', 'kept')]
+    with app.app_context():
+        # a row written behind the writer's back took the first reserved id
+        db.session.execute(insert(ChatMessage), [{'id': lost['id'], 'service_request_id': sr_id,
+                                                  'sender_id': 2, 'message': 'intruder'}])
+        db.session.commit()
+
+    assert sorted(m['message'] for m in client.get(url).get_json()) == ['intruder', 'kept']
+    dead = (journals / 'dead-letter' / 'chat_message.jsonl').read_text().splitlines()
+    assert [json.loads(line)['message'] for line in dead] == ['lost']
+    # later messages are not held up by it
+    client.post(url, json={'message': 'later'})
+    assert sorted(m['message'] for m in client.get(url).get_json()) == ['intruder', 'kept', 'later']
+    assert list(journals.glob('*.jsonl')) == []
+
+
+def test_rows_already_written_are_skipped(make_app, tmp_path, user_factory, login):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/chat.db')
+    _, sr_id = _setup(app, user_factory, login)
+    with app.app_context():
+        msg = ChatMessage(service_request_id=sr_id, sender_id=1, message='direct')
+        db.session.add(msg)
+        db.session.commit()
+        row = {'id': msg.id, 'complaint_id': None, 'service_request_id': sr_id, 'sender_id': 1,
+               'message': 'direct', 'created_at': msg.created_at}
+        conflicts = []
+        assert insert_missing([row], 10, conflicts) == 0
+        assert conflicts == []
@@ -1,18 +1,11 @@
 import pytest
-from app import create_app, db
+from app import db
 from app.models import User, Complaint, Warning
 
 
-@pytest.fixture
-def app():
-    app = create_app('config.Config')
-    app.config.update(
-        TESTING=True,
-        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
-        SECRET_KEY='test-secret',
-    )
+@pytest.fixture(autouse=True)
+def users(app):
     with app.app_context():
-        db.create_all()
         # seed users - use different usernames than demo data
         u = User(username='test_user', role='user')
         u.set_password('pw')
@@ -22,14 +15,6 @@ def app():
         admin.set_password('admin123')
         db.session.add_all([u, p, admin])
         db.session.commit()
-    yield app
-    with app.app_context():
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
 
 
 def login(client, username, password):
@@ -0,0 +1,38 @@
+import gzip
+
+import brotli
+
+from app import db
+from app.models import Notification
+
+
+def _app_with_notifications(make_app, user_factory, login, count, **overrides):
+    app = make_app(**overrides)
+    with app.app_context():
+        u = user_factory('u')
+        db.session.add_all(Notification(recipient_id=u.id, message=f'notification {i}') for i in range(count))
+        db.session.commit()
+    return app, login(app, 'u')
+
+
+def test_large_responses_are_compressed(make_app, user_factory, login):
+    app, client = _app_with_notifications(make_app, user_factory, login, 50)
+    plain = client.get('/api/v1/notifications')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    res = client.get('/api/v1/notifications', headers={'Accept-Encoding': 'gzip'})
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert int(res.headers['Content-Length']) < len(plain.data)
+    assert gzip.decompress(res.data) == plain.data
+
+    res = client.get('/api/v1/notifications', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert res.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(res.data) == plain.data
+
+
+def test_small_responses_stay_uncompressed(make_app, user_factory, login):
+    app, client = _app_with_notifications(make_app, user_factory, login, 1, COMPRESS_MIN_SIZE=4096)
+    res = client.get('/api/v1/notifications', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in res.headers
+    assert res.get_json()[0]['message'] == 'notification 0'
@@ -0,0 +1,95 @@
+import threading
+from datetime import datetime
+
+from app import db, socketio
+from app.models import ServiceRequest, Notification, Complaint, Warning
+
+
+def _setup(app, user_factory):
+    with app.app_context():
+        u = user_factory('u', location='Gulshan')
+        admin = user_factory('admin', role='admin')
+        prov = user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan')
+        db.session.add(ServiceRequest(user_id=u.id, category='barber', status='pending',
+                                      location='gulshan', dispatch_at=datetime.utcnow()))
+        db.session.add(Notification(recipient_id=u.id, message='hello'))
+        complaint = Complaint(user_id=u.id, provider_id=prov.id, title='late', description='very late')
+        db.session.add(complaint)
+        db.session.flush()
+        db.session.add(Warning(provider_id=prov.id, complaint_id=complaint.id, admin_id=admin.id, message='be on time'))
+        db.session.commit()
+
+
+def test_dashboard_matches_the_individual_endpoints(app, user_factory, login):
+    _setup(app, user_factory)
+    for username in ('u', 'prov'):
+        client = login(app, username)
+        dashboard = client.get('/api/v1/dashboard').get_json()
+        assert dashboard['user'] == client.get('/api/v1/profile').get_json()
+        assert dashboard['service_requests'] == client.get('/api/v1/service_requests').get_json()
+        assert dashboard['notifications'] == client.get('/api/v1/notifications').get_json()
+        assert dashboard['complaints'] == client.get('/api/v1/complaints').get_json()
+        assert len(dashboard['complaints']) == 1
+        if username == 'prov':
+            assert dashboard['warnings'] == client.get('/api/v1/warnings').get_json()
+            assert len(dashboard['warnings']) == 1
+        else:
+            assert dashboard['warnings'] == []
+
+
+def test_dashboard_cache_is_invalidated_by_pushes_and_writes(make_app, user_factory, login):
+    app = make_app(DASHBOARD_CACHE_SECONDS=3600)
+    _setup(app, user_factory)
+    client = login(app, 'u')
+
+    def messages():
+        return [n['message'] for n in client.get('/api/v1/dashboard').get_json()['notifications']]
+
+    assert messages() == ['hello']
+    with app.app_context():
+        # written behind the API's back: nobody was told, so the cached view stands
+        db.session.add(Notification(recipient_id=1, message='silent'))
+        db.session.commit()
+    assert messages() == ['hello']
+
+    with app.app_context():
+        from app.notifications import notify_users
+        notify_users([1], 'pushed')
+        db.session.commit()
+    assert set(messages()) == {'hello', 'silent', 'pushed'}
+
+    notif_id = client.get('/api/v1/notifications').get_json()[0]['id']
+    client.post(f'/api/v1/notifications/{notif_id}/mark_read')
+    read = {n['id']: n['is_read'] for n in client.get('/api/v1/dashboard').get_json()['notifications']}
+    assert read[notif_id] is True
+
+
+def test_notification_events_follow_the_commit(make_app, tmp_path, user_factory, login, monkeypatch):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/dash.db', DASHBOARD_CACHE_SECONDS=3600)
+    with app.app_context():
+        user_factory('u', location='Gulshan')
+        user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan')
+        db.session.commit()
+    prov = login(app, 'prov')
+    assert prov.get('/api/v1/dashboard').get_json()['notifications'] == []
+
+    # the provider's client refetches its dashboard as soon as the event arrives
+    seen = []
+    emit = socketio.emit
+
+    def refetch():
+        seen.append(len(prov.get('/api/v1/dashboard').get_json()['notifications']))
+
+    def refetching_emit(event_name, *args, **kwargs):
+        result = emit(event_name, *args, **kwargs)
+        if event_name == 'notification':
+            # its own request, on its own connection: it only sees what is committed
+            worker = threading.Thread(target=refetch)
+            worker.start()
+            worker.join()
+        return result
+    monkeypatch.setattr(socketio, 'emit', refetching_emit)
+
+    assert login(app, 'u').post('/api/v1/service_requests', json={'category': 'barber'}).status_code == 201
+    assert seen == [1]
+    assert len(prov.get('/api/v1/dashboard').get_json()['notifications']) == 1
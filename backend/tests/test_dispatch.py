@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import ServiceRequest
+
+
+def _request(user, minutes_ago, now, **fields):
+    created = now - timedelta(minutes=minutes_ago)
+    boost = timedelta(minutes=120) if fields.get('is_priority') else timedelta()
+    sr = ServiceRequest(user_id=user.id, category='barber', status='pending', created_at=created,
+                        dispatch_at=created - boost, location=(user.location or '').lower(), **fields)
+    db.session.add(sr)
+    db.session.flush()
+    return sr.id
+
+
+def test_queue_orders_premium_first_with_aging_and_location(make_app, user_factory, login):
+    app = make_app(DISPATCH_PREMIUM_BOOST_MINUTES=120)
+    now = datetime.utcnow()
+    with app.app_context():
+        user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan,Banani')
+        free = user_factory('free', location='Gulshan')
+        rich = user_factory('rich', location='gulshan 2', is_premium=True)
+        far = user_factory('far', location='Uttara')
+        anywhere = user_factory('anywhere')
+        old_free = _request(free, 300, now)        # waited longer than the boost
+        new_premium = _request(rich, 5, now, is_priority=True)
+        mid_free = _request(free, 60, now)
+        _request(far, 500, now)                    # other location: never listed
+        _request(user_factory('wild', location='%_'), 400, now)  # LIKE wildcards match nothing
+        no_location = _request(anywhere, 30, now)
+        db.session.commit()
+
+    client = login(app, 'prov')
+    ids = [r['id'] for r in client.get('/api/v1/service_requests/queue').get_json()]
+    assert ids == [old_free, new_premium, mid_free, no_location]
+
+    page = client.get(f'/api/v1/service_requests/queue?after={new_premium}&limit=1').get_json()
+    assert [r['id'] for r in page] == [mid_free]
+
+    # the dashboard list starts with the same queue head
+    listed = [r['id'] for r in client.get('/api/v1/service_requests').get_json() if r['status'] == 'pending']
+    assert listed == ids
+
+
+def test_new_requests_and_subscribing_set_priority(app, user_factory, login):
+    with app.app_context():
+        user_factory('u', location='Dhanmondi')
+        db.session.commit()
+
+    client = login(app, 'u')
+    first = client.post('/api/v1/service_requests', json={'category': 'barber'}).get_json()
+    assert first['is_priority'] is False
+    client.post('/api/v1/subscribe')
+    second = client.post('/api/v1/service_requests', json={'category': 'barber'}).get_json()
+    assert second['is_priority'] is True
+
+    with app.app_context():
+        rows = {sr.id: sr for sr in ServiceRequest.query}
+        for sr in rows.values():
+            assert sr.location == 'dhanmondi'
+            assert sr.is_priority
+            assert sr.dispatch_at == sr.created_at - timedelta(minutes=120)
+
+
+def test_queue_query_uses_dispatch_index(app, user_factory):
+    with app.app_context():
+        provider = user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan')
+        from app.dispatch import queue_query
+        stmt = queue_query(provider).limit(50).statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {stmt}')).all()
+        details = ' '.join(row[-1] for row in plan)
+        assert 'ix_service_request_dispatch' in details
+        assert 'TEMP B-TREE' not in details
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from app import db, mail
+from app.email_digest import send_digests
+from app.models import PendingEmail
+
+
+def test_digest_providers_get_one_summary_per_window(app, user_factory, monkeypatch):
+    with app.app_context():
+        user_factory('u', email='u@example.com', location='Gulshan')
+        user_factory('instant', email='instant@example.com', role='provider', partner_category='barber',
+                     partner_locations='Gulshan')
+        for i in range(3):
+            user_factory(f'busy{i}', email=f'busy{i}@example.com', role='provider', partner_category='barber',
+                         partner_locations='Gulshan')
+        db.session.commit()
+    client = app.test_client()
+    client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'})
+    for i in range(3):
+        assert client.post('/api/v1/auth/login', json={'username': f'busy{i}', 'password': 'pw'}).status_code == 200
+        assert client.patch('/api/v1/profile', json={'email_digest_minutes': 15}).get_json()['email_digest_minutes'] == 15
+    assert client.patch('/api/v1/profile', json={'email_digest_minutes': 'soon'}).status_code == 400
+    client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'})
+
+    with mail.record_messages() as outbox:
+        for i in range(4):
+            assert client.post('/api/v1/service_requests', json={'category': 'barber',
+                                                                 'description': f'job {i}'}).status_code == 201
+    assert [m.recipients for m in outbox] == [['instant@example.com']] * 4
+
+    connections = []
+    connect = mail.connect
+    monkeypatch.setattr(mail, 'connect', lambda: connections.append(1) or connect())
+    with app.app_context(), mail.record_messages() as outbox:
+        assert PendingEmail.query.count() == 12
+        assert send_digests() == 0                                   # window still open
+        later = datetime.utcnow() + timedelta(minutes=16)
+        assert send_digests(now=later, batch_size=2) == 3
+        assert PendingEmail.query.count() == 0
+    assert len(connections) == 2                                     # one per batch of recipients
+    assert sorted(m.recipients[0] for m in outbox) == [f'busy{i}@example.com' for i in range(3)]
+    assert outbox[0].subject == 'ServiceHub: 4 new updates'
+    assert all(f'job {i}' in outbox[0].body for i in range(4))
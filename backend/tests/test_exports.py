@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from app import db
+from app.exports import EXPORT_BATCH_SIZE
+from app.models import User, Complaint, Warning, ServiceRequest
+
+
+def seed_users():
+    u = User(username='test_user', role='user')
+    u.set_password('pw')
+    p = User(username='test_provider', role='provider', partner_category='electrician', provider_unique_id='PROV-001')
+    p.set_password('pw')
+    admin = User(username='test_admin', role='admin')
+    admin.set_password('admin123')
+    db.session.add_all([u, p, admin])
+    db.session.commit()
+    return u, p, admin
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        u, p, admin = seed_users()
+        c = Complaint(user_id=u.id, provider_id=p.id, title='Late, again', description='said "soon"', status='pending')
+        db.session.add(c)
+        db.session.add(ServiceRequest(user_id=u.id, provider_id=p.id, category='electrician', status='accepted'))
+        db.session.commit()
+        db.session.add(Warning(complaint_id=c.id, provider_id=p.id, admin_id=admin.id, message='m'))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username, password):
+    return client.post('/api/v1/auth/login', json={'username': username, 'password': password})
+
+
+def test_admin_can_export_complaints_csv(client):
+    login(client, 'test_admin', 'admin123')
+    res = client.get('/api/v1/admin/export/complaints')
+    assert res.status_code == 200
+    assert res.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert len(rows) == 1
+    assert rows[0]['title'] == 'Late, again'
+    assert rows[0]['description'] == 'said "soon"'
+    assert rows[0]['user_username'] == 'test_user'
+    assert rows[0]['provider_unique_id'] == 'PROV-001'
+
+
+def test_admin_can_export_ndjson(client):
+    login(client, 'test_admin', 'admin123')
+    res = client.get('/api/v1/admin/export/service_requests?format=ndjson')
+    assert res.status_code == 200
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert rows[0]['status'] == 'accepted'
+    assert rows[0]['provider_unique_id'] == 'PROV-001'
+    assert rows[0]['completed_at'] is None
+
+    res = client.get('/api/v1/admin/export/warnings?format=ndjson')
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert rows[0]['admin_username'] == 'test_admin'
+    assert rows[0]['complaint_title'] == 'Late, again'
+
+
+def test_export_requires_admin(client):
+    login(client, 'test_user', 'pw')
+    assert client.get('/api/v1/admin/export/complaints').status_code == 403
+    login(client, 'test_admin', 'admin123')
+    assert client.get('/api/v1/admin/export/complaints?format=xml').status_code == 400
+
+
+def test_export_streams_one_chunk_per_batch(app):
+    rows = 10 * EXPORT_BATCH_SIZE
+    with app.app_context():
+        u = User.query.filter_by(username='test_user').one()
+        db.session.execute(text(
+            'WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows) '
+            'INSERT INTO service_request (user_id, category, description, status, created_at) '
+            "SELECT :user_id, 'electrician', 'request ' || n, 'completed', :now FROM seq"
+        ), {'rows': rows - 1, 'user_id': u.id, 'now': datetime.utcnow()})
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, 'test_admin', 'admin123')
+    res = client.get('/api/v1/admin/export/service_requests?format=csv', buffered=False)
+    assert res.status_code == 200
+    chunks = list(res.response)
+    res.close()
+
+    # the 1M-row memory ceiling is benchmarks/test_bench_exports.py
+    assert len(chunks) == 10
+    assert sum(chunk.count(b'\n') for chunk in chunks) == rows + 1  # header
+    assert max(map(len, chunks)) < 2 * sum(map(len, chunks)) / len(chunks)
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import User
+
+
+@pytest.mark.parametrize('run', [1, 2])
+def test_each_test_starts_from_the_empty_schema(app, run):
+    with app.app_context():
+        assert User.query.count() == 0
+        db.session.add(User(username='same_name', password_hash='x'))
+        db.session.commit()   # only releases a savepoint; rolled back after the test
+        assert User.query.count() == 1
+        assert app.extensions.setdefault('premium_cache', {}).setdefault('run', run) == run
+
+
+def test_session_rollback_keeps_earlier_commits(app, client):
+    with app.app_context():
+        db.session.add(User(username='kept', password_hash='x'))
+        db.session.commit()
+        db.session.add(User(username='kept', password_hash='y'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+        assert [u.username for u in User.query.all()] == ['kept']
+
+    res = client.post('/api/v1/auth/register', json={'username': 'new_user', 'password': 'pw123456'})
+    assert res.status_code == 201
+    with app.app_context():
+        assert User.query.count() == 2
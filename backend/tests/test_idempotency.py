@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import db
+from app.models import ServiceRequest, Notification, IdempotencyRecord
+
+
+def _setup(app, user_factory, login):
+    with app.app_context():
+        user_factory('u', location='Gulshan')
+        user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan')
+        db.session.commit()
+    return login(app, 'u')
+
+
+def _post(client, key, **body):
+    return client.post('/api/v1/service_requests', json={'category': 'barber', **body},
+                       headers={'Idempotency-Key': key})
+
+
+def test_retries_replay_the_first_response(app, user_factory, login):
+    client = _setup(app, user_factory, login)
+
+    first = _post(client, 'k1', description='fix my hair')
+    again = _post(client, 'k1', description='fix my hair')
+    assert first.status_code == again.status_code == 201
+    assert again.get_json() == first.get_json()
+    assert again.headers['Idempotent-Replayed'] == 'true'
+
+    # from the table once the per-process cache is gone
+    app.extensions.pop('idempotency_cache')
+    assert _post(client, 'k1', description='fix my hair').get_json() == first.get_json()
+
+    assert _post(client, 'k1', description='something else').status_code == 422
+    assert _post(client, 'k2', description='fix my hair').status_code == 201
+    with app.app_context():
+        assert ServiceRequest.query.count() == 2
+        assert Notification.query.count() == 2
+
+
+def test_concurrent_duplicate_waits_for_the_first(make_app, tmp_path, user_factory, login):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/idem.db', IDEMPOTENCY_WAIT_SECONDS=1)
+    client = _setup(app, user_factory, login)
+    body = b'{"category": "barber"}'
+    # the same request has already been claimed by another worker
+    with app.test_request_context('/api/v1/service_requests', method='POST', data=body,
+                                  content_type='application/json'):
+        from app.idempotency import _fingerprint
+        fingerprint = _fingerprint()
+        now = datetime.utcnow()
+        for key in ('slow', 'stuck'):
+            db.session.add(IdempotencyRecord(key=f'1:create_service_request:{key}', fingerprint=fingerprint,
+                                             status='pending', created_at=now, expires_at=now + timedelta(seconds=1)))
+        db.session.commit()
+
+    def finish():
+        time.sleep(0.2)
+        with app.app_context():
+            record = db.session.get(IdempotencyRecord, '1:create_service_request:slow')
+            record.status, record.response_status = 'done', 201
+            record.response_body, record.response_mimetype = b'{"id": 99}', 'application/json'
+            record.expires_at = datetime.utcnow() + timedelta(hours=1)
+            db.session.commit()
+
+    worker = threading.Thread(target=finish)
+    worker.start()
+    res = client.post('/api/v1/service_requests', data=body, content_type='application/json',
+                      headers={'Idempotency-Key': 'slow'})
+    worker.join()
+    assert (res.status_code, res.get_json()) == (201, {'id': 99})
+
+    res = client.post('/api/v1/service_requests', data=body, content_type='application/json',
+                      headers={'Idempotency-Key': 'stuck'})
+    assert res.status_code == 409 and res.headers['Retry-After'] == '1'
+    with app.app_context():
+        assert ServiceRequest.query.count() == 0
+
+
+def test_a_running_claim_outlives_the_wait(make_app, user_factory, login):
+    app = make_app(IDEMPOTENCY_WAIT_SECONDS=0)
+    client = _setup(app, user_factory, login)
+    body = b'{"category": "barber"}'
+    with app.test_request_context('/api/v1/service_requests', method='POST', data=body,
+                                  content_type='application/json'):
+        from app.idempotency import _fingerprint
+        # claimed a while ago by a request that is still fanning out
+        started = datetime.utcnow() - timedelta(seconds=30)
+        db.session.add(IdempotencyRecord(key='1:create_service_request:busy', fingerprint=_fingerprint(),
+                                         status='pending', created_at=started,
+                                         expires_at=started + timedelta(seconds=app.config['IDEMPOTENCY_CLAIM_SECONDS'])))
+        db.session.commit()
+
+    res = client.post('/api/v1/service_requests', data=body, content_type='application/json',
+                      headers={'Idempotency-Key': 'busy'})
+    assert res.status_code == 409
+    with app.app_context():
+        assert ServiceRequest.query.count() == 0
+
+
+def test_only_the_claim_owner_stores_its_response(app):
+    from flask import jsonify
+    from app.idempotency import idempotent_call
+
+    def view():
+        # meanwhile another worker took the key over
+        db.session.execute(update(IdempotencyRecord).where(IdempotencyRecord.key == '7:create_service_request:k')
+                           .values(created_at=datetime.utcnow() + timedelta(seconds=1)))
+        db.session.commit()
+        return jsonify({'id': 1}), 201
+
+    with app.test_request_context('/api/v1/service_requests', method='POST', json={},
+                                  headers={'Idempotency-Key': 'k'}):
+        assert idempotent_call(7, 'create_service_request', view).status_code == 201
+        record = db.session.get(IdempotencyRecord, '7:create_service_request:k')
+        assert record.status == 'pending' and record.response_body is None
+    assert app.extensions['idempotency_cache'].get('7:create_service_request:k', datetime.utcnow()) is None
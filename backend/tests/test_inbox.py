@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from app import db, socketio
+from app.models import User, ServiceRequest
+
+
+def _socket(app, client):
+    socket = socketio.test_client(app, flask_test_client=client)
+    socket.get_received()
+    return socket
+
+
+def _deltas(socket):
+    return [event['args'][0] for event in socket.get_received() if event['name'] == 'inbox_update']
+
+
+def test_inbox_lists_actionable_requests_and_own_jobs(make_app, user_factory, login):
+    app = make_app(PROVIDER_JOBS_PAGE_SIZE=2)
+    now = datetime.utcnow()
+    with app.app_context():
+        prov = user_factory('prov', role='provider', partner_category='barber', partner_locations='Gulshan')
+        other = user_factory('other', role='provider', partner_category='barber', partner_locations='Gulshan')
+        u = user_factory('u', location='Gulshan')
+
+        def add(minutes_ago, **fields):
+            created = now - timedelta(minutes=minutes_ago)
+            fields = {'category': 'barber', 'location': 'gulshan', **fields}
+            sr = ServiceRequest(user_id=u.id, created_at=created, dispatch_at=created, **fields)
+            db.session.add(sr)
+            db.session.flush()
+            return sr.id
+
+        pending = add(5, status='pending')
+        add(6, status='pending', location='uttara')                    # other location
+        add(7, status='accepted', provider_id=other.id)                # someone else's job
+        add(8, status='pending', category='plumber')                   # other category
+        jobs = [add(10 * i, status=status, provider_id=prov.id)
+                for i, status in enumerate(['accepted', 'completed', 'completed'], start=1)]
+        db.session.commit()
+
+    client = login(app, 'prov')
+    assert [r['id'] for r in client.get('/api/v1/service_requests').get_json()] == [pending] + jobs[:2]
+    page = client.get(f'/api/v1/service_requests/jobs?before={jobs[1]}').get_json()
+    assert [r['id'] for r in page] == jobs[2:]
+    assert client.get(f'/api/v1/service_requests/jobs?before={pending}').status_code == 400
+
+    with app.app_context():
+        from app.inbox import jobs_query
+        prov = User.query.filter_by(username='prov').one()
+        stmt = jobs_query(prov).limit(50).statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        details = ' '.join(row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {stmt}')))
+        assert 'ix_service_request_provider_jobs' in details
+        assert 'TEMP B-TREE' not in details
+
+
+def test_inbox_changes_are_pushed_over_the_socket(app, user_factory, login):
+    with app.app_context():
+        user_factory('u', location='Gulshan')
+        user_factory('near1', role='provider', partner_category='barber', partner_locations='Gulshan')
+        user_factory('near2', role='provider', partner_category='barber', partner_locations='Gulshan')
+        user_factory('far', role='provider', partner_category='barber', partner_locations='Uttara')
+        db.session.commit()
+
+    clients = {name: login(app, name) for name in ('u', 'near1', 'near2', 'far')}
+    sockets = {name: _socket(app, clients[name]) for name in ('near1', 'near2', 'far')}
+
+    created = clients['u'].post('/api/v1/service_requests', json={'category': 'barber'}).get_json()
+    for name in ('near1', 'near2'):
+        assert _deltas(sockets[name]) == [{'op': 'upsert', 'request': created}]
+    assert _deltas(sockets['far']) == []
+
+    clients['near1'].post(f"/api/v1/service_requests/{created['id']}/reject")
+    assert _deltas(sockets['near1']) == [{'op': 'remove', 'id': created['id']}]
+    assert _deltas(sockets['near2']) == []
+
+    accepted = clients['near2'].post(f"/api/v1/service_requests/{created['id']}/accept").get_json()
+    assert _deltas(sockets['near2']) == [{'op': 'upsert', 'request': accepted}]
+    assert _deltas(sockets['near1']) == []
+
+    clients['near2'].post(f"/api/v1/service_requests/{created['id']}/complete")
+    assert [d['request']['status'] for d in _deltas(sockets['near2'])] == ['completed']
@@ -0,0 +1,115 @@
+import pytest
+from flask_jwt_extended import decode_token
+
+from app import db, socketio
+from app.models import User
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(JWT_AUTH_ENABLED=True, JWT_BLOCKLIST_CACHE_SECONDS=0)
+    with app.app_context():
+        u = User(username='test_user', role='user')
+        u.set_password('pw')
+        p = User(username='test_provider', role='provider', partner_category='electrician', provider_unique_id='PROV-001')
+        p.set_password('pw')
+        db.session.add_all([u, p])
+        db.session.commit()
+    return app
+
+
+def get_tokens(app, username):
+    # a fresh client per login so no session cookie is involved
+    res = app.test_client().post('/api/v1/auth/login', json={'username': username, 'password': 'pw'})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_role_checks_use_claims_without_loading_user(app):
+    tokens = get_tokens(app, 'test_provider')
+    client = app.test_client()
+    res = client.get('/api/v1/warnings', headers=bearer(tokens['access_token']))
+    assert res.status_code == 200
+
+    res = client.get('/api/v1/auth/me', headers=bearer(tokens['access_token']))
+    assert res.get_json()['user']['username'] == 'test_provider'
+
+
+def test_role_change_rejects_older_access_tokens(app):
+    tokens = get_tokens(app, 'test_provider')
+    client = app.test_client()
+    with app.app_context():
+        db.session.get(User, 2).role = 'user'
+        db.session.commit()
+    assert client.get('/api/v1/warnings', headers=bearer(tokens['access_token'])).status_code == 401
+
+    # the refreshed token carries the role from the database
+    res = client.post('/api/v1/auth/refresh', headers=bearer(tokens['refresh_token']))
+    access = res.get_json()['access_token']
+    assert client.get('/api/v1/warnings', headers=bearer(access)).status_code == 403
+    assert client.get('/api/v1/profile', headers=bearer(access)).status_code == 200
+
+
+def test_login_sets_no_session_cookie(app):
+    res = app.test_client().post('/api/v1/auth/login', json={'username': 'test_user', 'password': 'pw'})
+    assert res.status_code == 200
+    assert 'Set-Cookie' not in res.headers
+
+
+def test_refresh_and_revocation(app):
+    tokens = get_tokens(app, 'test_user')
+    client = app.test_client()
+
+    # access tokens are not accepted for refresh
+    assert client.post('/api/v1/auth/refresh', headers=bearer(tokens['access_token'])).status_code == 422
+    res = client.post('/api/v1/auth/refresh', headers=bearer(tokens['refresh_token']))
+    assert res.status_code == 200
+    new_access = res.get_json()['access_token']
+    assert client.get('/api/v1/profile', headers=bearer(new_access)).status_code == 200
+
+    res = client.post('/api/v1/auth/logout', headers=bearer(new_access),
+                      json={'refresh_token': tokens['refresh_token']})
+    assert res.status_code == 200
+    assert client.get('/api/v1/profile', headers=bearer(new_access)).status_code == 401
+    assert client.post('/api/v1/auth/refresh', headers=bearer(tokens['refresh_token'])).status_code == 401
+    # the other access token from login is still valid until it expires
+    assert client.get('/api/v1/profile', headers=bearer(tokens['access_token'])).status_code == 200
+
+
+def test_socket_connect_with_token(app):
+    tokens = get_tokens(app, 'test_user')
+    client = socketio.test_client(app, auth={'token': tokens['access_token']})
+    received = client.get_received()
+    assert received[0]['name'] == 'connected'
+    assert received[0]['args'][0]['user_id'] == 1
+    client.disconnect()
+
+    anonymous = socketio.test_client(app, auth={'token': 'garbage'})
+    assert anonymous.get_received()[0]['name'] == 'error'
+
+
+def test_tokens_not_issued_in_session_mode(make_app):
+    app = make_app()
+    with app.app_context():
+        u = User(username='test_user', role='user')
+        u.set_password('pw')
+        db.session.add(u)
+        db.session.commit()
+    assert 'access_token' not in get_tokens(app, 'test_user')
+
+
+def test_category_change_rejects_older_access_tokens(app):
+    tokens = get_tokens(app, 'test_provider')
+    client = app.test_client()
+    with app.app_context():
+        db.session.get(User, 2).partner_category = 'plumber'
+        db.session.commit()
+    assert client.get('/api/v1/warnings', headers=bearer(tokens['access_token'])).status_code == 401
+
+    res = client.post('/api/v1/auth/refresh', headers=bearer(tokens['refresh_token']))
+    with app.app_context():
+        assert decode_token(res.get_json()['access_token'])['partner_category'] == 'plumber'
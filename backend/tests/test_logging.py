@@ -0,0 +1,65 @@
+import io
+import json
+import logging
+
+from app import create_app
+from app.logging_setup import flush_logs
+from app.models import User
+from tests.conftest import TestConfig
+
+
+def read_lines(stream):
+    flush_logs()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_lines_with_structured_fields_and_traceback(make_app):
+    stream = io.StringIO()
+    make_app(LOG_STREAM=stream)
+    log = logging.getLogger('app.api')
+    log.info('email sent', extra={'event': 'email.sent', 'recipient_id': 7})
+    try:
+        raise RuntimeError('smtp down')
+    except RuntimeError:
+        log.warning('email send failed', exc_info=True, extra={'event': 'email.failed'})
+
+    sent, failed = read_lines(stream)
+    assert sent['level'] == 'INFO'
+    assert sent['logger'] == 'app.api'
+    assert sent['msg'] == 'email sent'
+    assert sent['event'] == 'email.sent'
+    assert sent['recipient_id'] == 7
+    assert 'RuntimeError: smtp down' in failed['exc']
+
+
+def test_level_and_sampling_are_configurable(make_app):
+    stream = io.StringIO()
+    make_app(LOG_STREAM=stream, LOG_LEVEL='WARNING', LOG_SAMPLE_RATES={'socket.join': 0.25})
+    log = logging.getLogger('app.api')
+    log.info('dropped by level')
+    for _ in range(8):
+        log.warning('joined room', extra={'event': 'socket.join'})
+    log.warning('kept')
+
+    lines = read_lines(stream)
+    assert [l['msg'] for l in lines].count('joined room') == 2
+    assert lines[-1]['msg'] == 'kept'
+    assert all(l['msg'] != 'dropped by level' for l in lines)
+
+
+def test_text_format(make_app):
+    stream = io.StringIO()
+    make_app(LOG_STREAM=stream, LOG_FORMAT='text')
+    logging.getLogger('app.api').info('socket connected', extra={'event': 'socket.connect', 'user_id': 3})
+    flush_logs()
+    assert 'INFO app.api: socket connected event=socket.connect user_id=3' in stream.getvalue()
+
+
+def test_demo_accounts_only_seeded_when_enabled(make_app, tmp_path):
+    uri = f'sqlite:///{tmp_path / "boot.db"}'
+    make_app(SQLALCHEMY_DATABASE_URI=uri)  # loads the schema
+    for seed, users in ((False, 0), (True, 10)):
+        config = type('BootConfig', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': uri, 'TESTING': False,
+                                                    'SEED_DEMO_DATA': seed, 'LOG_STREAM': io.StringIO()})
+        with create_app(config).app_context():
+            assert User.query.count() == users
@@ -0,0 +1,59 @@
+import io
+import json
+
+from app import db
+from app.logging_setup import flush_logs
+
+
+def seed(app, user_factory):
+    with app.app_context():
+        user_factory('test_user', role='user')
+        db.session.commit()
+
+
+def test_metrics_record_latency_sql_and_status(make_app, user_factory, login):
+    app = make_app()
+    seed(app, user_factory)
+    client = login(app, 'test_user')
+    client.post('/api/v1/auth/login', json={'username': 'test_user', 'password': 'wrong'})
+    client.get('/api/v1/notifications')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{endpoint="api.login",method="POST",status="200"} 1' in body
+    assert 'http_requests_total{endpoint="api.login",method="POST",status="401"} 1' in body
+    assert 'http_request_duration_seconds_count{endpoint="api.get_notifications",method="GET"} 1' in body
+    # session lookup + notifications query
+    assert 'http_request_sql_statements_bucket{endpoint="api.get_notifications",method="GET",le="2"} 1' in body
+    assert 'http_request_sql_seconds_sum{endpoint="api.login",method="POST"}' in body
+    # /metrics itself is not part of the API blueprint
+    assert 'endpoint="metrics"' not in body
+
+
+def test_mail_and_emit_time_are_recorded(make_app, user_factory, login):
+    app = make_app()
+    seed(app, user_factory)
+    with app.app_context():
+        user_factory('test_provider', role='provider', partner_category='plumber', email='p@example.com')
+        db.session.commit()
+    client = login(app, 'test_user')
+    client.post('/api/v1/service_requests', json={'category': 'plumber', 'description': 'leak'})
+    body = client.get('/metrics').get_data(as_text=True)
+    # TESTING suppresses delivery, but the mail.send call is still timed
+    assert 'http_request_mail_seconds_count{endpoint="api.create_service_request",method="POST"} 1' in body
+    assert 'http_request_emit_seconds_count{endpoint="api.create_service_request",method="POST"} 1' in body
+
+
+def test_slow_query_log(make_app, user_factory):
+    stream = io.StringIO()
+    app = make_app(SLOW_QUERY_SECONDS=0.0000001, LOG_STREAM=stream)
+    seed(app, user_factory)
+    app.test_client().post('/api/v1/auth/login', json={'username': 'test_user', 'password': 'pw'})
+    flush_logs()
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert any(e.get('event') == 'sql.slow' and e['endpoint'] == 'api.login' for e in entries)
+    assert 'sql_slow_queries_total' in app.test_client().get('/metrics').get_data(as_text=True)
+
+
+def test_metrics_can_be_disabled(make_app):
+    app = make_app(METRICS_ENABLED=False)
+    assert app.test_client().get('/metrics').status_code == 404
@@ -0,0 +1,73 @@
+import pytest
+
+from app import db
+from app.models import User, Complaint, ComplaintBucket
+from app.near_duplicates import BANDS, index_complaints, signature, similarity
+
+INCIDENT = ('Electrician never showed up',
+            'Booked the electrician for Tuesday morning, waited all day and he never came or called back.')
+REFILED = ('Electrician never showed up!!',
+           'Booked the electrician for tuesday morning, waited the whole day and he never came or called back')
+OTHER = ('Overcharged for AC repair', 'The AC technician charged twice the quoted price for a gas refill.')
+
+
+@pytest.fixture(autouse=True)
+def users(app, user_factory):
+    with app.app_context():
+        user_factory('test_user', role='user')
+        user_factory('test_provider', role='provider', provider_unique_id='PROV-001')
+        user_factory('test_admin', role='admin')
+        db.session.commit()
+
+
+def file_complaint(client, text, provider='PROV-001'):
+    title, description = text
+    res = client.post('/api/v1/complaints', json={'title': title, 'description': description,
+                                                   'provider_unique_id': provider})
+    assert res.status_code == 201
+    return res.get_json()
+
+
+def test_signatures_estimate_text_similarity():
+    assert similarity(signature(' '.join(INCIDENT)), signature(' '.join(INCIDENT))) == 1.0
+    assert similarity(signature(' '.join(INCIDENT)), signature(' '.join(REFILED))) >= 0.6
+    assert similarity(signature(' '.join(INCIDENT)), signature(' '.join(OTHER))) < 0.2
+    assert signature(' !? ') is None
+
+
+def test_refiled_complaints_cluster_and_show_as_similar(app, login):
+    client = login(app, 'test_user')
+    first = file_complaint(client, INCIDENT)
+    again = file_complaint(client, REFILED)
+    other = file_complaint(client, OTHER)
+    elsewhere = file_complaint(client, REFILED, provider=None)
+
+    assert first['cluster_id'] == first['id']
+    assert again['cluster_id'] == first['id']
+    assert other['cluster_id'] == other['id']
+    # same text, but not about the same provider: its own cluster
+    assert elsewhere['cluster_id'] == elsewhere['id']
+    with app.app_context():
+        assert ComplaintBucket.query.count() == 4 * BANDS
+
+    assert client.get(f"/api/v1/complaints/{first['id']}/similar").status_code == 403
+    client = login(app, 'test_admin')
+    similar = client.get(f"/api/v1/complaints/{first['id']}/similar").get_json()
+    assert {c['id'] for c in similar} == {again['id'], elsewhere['id']}
+    assert all(c['similarity'] >= 0.5 for c in similar)
+    listed = client.get('/api/v1/complaints').get_json()
+    assert sorted(c['cluster_id'] for c in listed) == sorted([first['id']] * 2 + [other['id'], elsewhere['id']])
+
+
+def test_backfill_indexes_existing_complaints_oldest_first(app):
+    with app.app_context():
+        user = User.query.filter_by(username='test_user').one()
+        provider = User.query.filter_by(username='test_provider').one()
+        old = [Complaint(user_id=user.id, provider_id=provider.id, title=title, description=description)
+               for title, description in (INCIDENT, OTHER, REFILED)]
+        db.session.add_all(old)
+        db.session.commit()
+
+        assert index_complaints(batch_size=2) == 3
+        assert [c.cluster_id for c in old] == [old[0].id, old[1].id, old[0].id]
+        assert index_complaints() == 0
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import db
+from app.models import Notification
+from app.partitions import add_months, maintain_partitions, month_start
+
+
+def test_old_months_are_detached_and_reads_are_bounded(make_app, user_factory, login):
+    app = make_app(PARTITION_RETENTION_MONTHS={'notification': 12})
+    this_month = month_start(datetime.utcnow())
+    old, older = add_months(this_month, -13), add_months(this_month, -14)
+    kept = add_months(this_month, -12) + timedelta(days=2)
+    with app.app_context():
+        u = user_factory('u', created_at=older)
+        for when in (older, older + timedelta(days=20), old + timedelta(days=3), kept, datetime.utcnow()):
+            db.session.add(Notification(recipient_id=u.id, message=f'{when:%Y-%m-%d}', created_at=when))
+        db.session.commit()
+
+        result = maintain_partitions()
+        assert result['notification'] == ([], [f'notification_p{older:%Y%m}', f'notification_p{old:%Y%m}'])
+        assert result['chat_message'] == ([], [])                 # kept forever by default
+        assert maintain_partitions()['notification'] == ([], [])
+        assert db.session.execute(text(f'SELECT count(*) FROM notification_p{older:%Y%m}')).scalar() == 2
+        assert Notification.query.count() == 2
+
+    assert [n['message'] for n in login(app, 'u').get('/api/v1/notifications').get_json()] == [
+        f'{datetime.utcnow():%Y-%m-%d}', f'{kept:%Y-%m-%d}']
@@ -0,0 +1,52 @@
+from app import db
+from app.models import User
+from app.passwords import needs_rehash
+
+
+def test_login_rehashes_when_parameters_change(app):
+    with app.app_context():
+        u = User(username='legacy', role='user')
+        u.set_password('pw', method='pbkdf2:sha256:500')
+        db.session.add(u)
+        db.session.commit()
+        old_hash = u.password_hash
+        assert u.password_needs_rehash()
+
+    client = app.test_client()
+    assert client.post('/api/v1/auth/login', json={'username': 'legacy', 'password': 'pw'}).status_code == 200
+
+    with app.app_context():
+        u = User.query.filter_by(username='legacy').one()
+        assert u.password_hash != old_hash
+        assert u.password_hash.startswith('pbkdf2:sha256:1000$')
+        assert not u.password_needs_rehash()
+        rehashed = u.password_hash
+
+    # Already current: logging in again leaves the hash alone
+    client.post('/api/v1/auth/login', json={'username': 'legacy', 'password': 'pw'})
+    with app.app_context():
+        assert User.query.filter_by(username='legacy').one().password_hash == rehashed
+
+
+def test_failed_login_does_not_rehash(app):
+    with app.app_context():
+        u = User(username='legacy', role='user')
+        u.set_password('pw', method='pbkdf2:sha256:500')
+        db.session.add(u)
+        db.session.commit()
+        old_hash = u.password_hash
+
+    res = app.test_client().post('/api/v1/auth/login', json={'username': 'legacy', 'password': 'nope'})
+    assert res.status_code == 401
+    with app.app_context():
+        assert User.query.filter_by(username='legacy').one().password_hash == old_hash
+
+
+def test_needs_rehash_normalizes_default_parameters(make_app):
+    app = make_app(PASSWORD_HASH_METHOD='scrypt')
+    with app.app_context():
+        u = User(username='x')
+        u.set_password('pw')
+        assert u.password_hash.startswith('scrypt:32768:8:1$')
+        assert not needs_rehash(u.password_hash)
+        assert needs_rehash(u.password_hash, method='pbkdf2:sha256:1000')
@@ -0,0 +1,54 @@
+import threading
+
+from app import db
+from app.models import User
+from app.provider_ids import allocate_provider_ids
+
+
+def test_allocator_continues_after_existing_ids(app):
+    with app.app_context():
+        db.session.add(User(username='legacy', password_hash='x', role='provider', provider_unique_id='PROV-041'))
+        db.session.commit()
+        assert allocate_provider_ids(2) == ['PROV-042', 'PROV-043']
+        db.session.commit()
+        assert allocate_provider_ids(1) == ['PROV-044']
+
+
+def test_register_and_profile_upgrade_use_the_allocator(app, client):
+    res = client.post('/api/v1/auth/register', json={'username': 'p1', 'password': 'pw', 'role': 'provider'})
+    assert res.status_code == 201
+    client.post('/api/v1/auth/register', json={'username': 'u1', 'password': 'pw'})
+    client.post('/api/v1/auth/login', json={'username': 'u1', 'password': 'pw'})
+    res = client.put('/api/v1/profile', json={'partner_category': 'plumber'})
+    assert res.get_json()['provider_unique_id'] == 'PROV-002'
+    with app.app_context():
+        assert User.query.filter_by(username='p1').one().provider_unique_id == 'PROV-001'
+
+
+def test_concurrent_registrations_get_unique_ids(make_app, tmp_path):
+    # each thread needs its own connection, so the database is a file rather than :memory:
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "ids.db"}')
+    threads, per_thread = 8, 6
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def register_many(t):
+        client = app.test_client()
+        barrier.wait()
+        for i in range(per_thread):
+            res = client.post('/api/v1/auth/register', json={
+                'username': f'prov_{t}_{i}', 'password': 'pw', 'role': 'provider'})
+            if res.status_code != 201:
+                errors.append(res.status_code)
+
+    workers = [threading.Thread(target=register_many, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert errors == []
+    with app.app_context():
+        ids = [u.provider_unique_id for u in User.query.filter_by(role='provider')]
+    # the id_counter row is only advanced by committed transactions, so the ids are gapless too
+    assert sorted(ids) == [f'PROV-{n:03d}' for n in range(1, threads * per_thread + 1)]
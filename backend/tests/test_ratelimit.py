@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import event
+
+from app import db, mail
+from app.models import RateLimitBucket
+from app.ratelimit import check_rate_limit
+
+
+@pytest.mark.parametrize('backend', ['memory', 'database'])
+def test_bucket_refills_over_time(make_app, backend):
+    # 10 tokens, refilled at one per second
+    app = make_app(RATE_LIMIT_BACKEND=backend, RATE_LIMITS={'op': (10, 10)})
+    with app.app_context():
+        assert check_rate_limit('op', 1, cost=6, now=1000.0) == 0
+        assert check_rate_limit('op', 1, cost=6, now=1000.0) == pytest.approx(2.0)
+        assert check_rate_limit('op', 2, cost=6, now=1000.0) == 0      # buckets are per user
+        assert check_rate_limit('op', 1, cost=6, now=1002.0) == 0
+        assert check_rate_limit('op', 1, cost=50, now=1002.0) == pytest.approx(10.0)  # capped at capacity
+        assert check_rate_limit('other', 1, cost=1000, now=1002.0) == 0                # no limit configured
+        if backend == 'database':
+            assert db.session.get(RateLimitBucket, 'op:1').tokens == pytest.approx(0.0)
+
+
+def test_service_requests_are_charged_by_fan_out(make_app, user_factory, login):
+    app = make_app(RATE_LIMITS={'create_service_request': (10, 3600)})
+    with app.app_context():
+        user_factory('u', location='Gulshan')
+        for i in range(4):
+            user_factory(f'prov{i}', role='provider', partner_category='barber', partner_locations='Gulshan')
+        db.session.commit()
+    client = login(app, 'u')
+
+    # 1 + 4 providers notified: two requests empty the bucket
+    for _ in range(2):
+        assert client.post('/api/v1/service_requests', json={'category': 'barber'}).status_code == 201
+    res = client.post('/api/v1/service_requests', json={'category': 'barber'})
+    assert res.status_code == 429
+    assert int(res.headers['Retry-After']) == res.get_json()['retry_after'] > 0
+    # a category nobody serves costs a single token, but there is not even that left
+    assert client.post('/api/v1/service_requests', json={'category': 'plumber'}).status_code == 429
+
+
+def test_fan_out_loads_each_provider_once(app, user_factory, login):
+    with app.app_context():
+        user_factory('u', location='Gulshan')
+        for i in range(20):
+            user_factory(f'prov{i}', role='provider', partner_category='barber', partner_locations='Gulshan',
+                         email=f'prov{i}@example.com')
+        db.session.commit()
+    client = login(app, 'u')
+
+    statements = []
+    with app.app_context():
+        listen = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listen)
+        try:
+            with mail.record_messages() as outbox:
+                assert client.post('/api/v1/service_requests', json={'category': 'barber'}).status_code == 201
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listen)
+    assert len(outbox) == 20
+    # by-id user lookups are for the requester only (load, premium check, reload), not per provider
+    by_id = [s for s in statements if 'FROM user WHERE user.id = ?' in ' '.join(s.split())]
+    assert len(by_id) <= 3
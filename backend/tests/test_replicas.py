@@ -0,0 +1,118 @@
+from sqlalchemy import delete, insert, select, update
+
+from app import db
+from app.models import User, Notification, ReplicaWriteStamp
+
+
+def _make(make_app, tmp_path, **overrides):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db',
+                   SQLALCHEMY_REPLICA_URIS=[f'sqlite:///{tmp_path}/replica.db'], **overrides)
+    with app.app_context():
+        db.metadata.create_all(_replica(app))
+        u = User(username='u')
+        u.set_password('pw')
+        db.session.add(u)
+        db.session.commit()
+        _replicate(app)
+    return app
+
+
+def _replica(app):
+    return app.extensions['replicas'].engines[0]
+
+
+def _replicate(app):
+    """Copy every row from the primary to the replica, as streaming replication would."""
+    with _replica(app).begin() as replica:
+        for table in reversed(db.metadata.sorted_tables):
+            replica.execute(delete(table))
+        for table in db.metadata.sorted_tables:
+            rows = [row._asdict() for row in db.session.execute(select(table))]
+            if rows:
+                replica.execute(insert(table), rows)
+
+
+def _notify(app, message):
+    with app.app_context():
+        user = User.query.filter_by(username='u').one()
+        db.session.add(Notification(recipient_id=user.id, message=message))
+        db.session.commit()
+
+
+def _messages(client):
+    res = client.get('/api/v1/notifications')
+    assert res.status_code == 200
+    return [n['message'] for n in res.get_json()]
+
+
+def _expire_stickiness(app):
+    with app.app_context():
+        db.session.execute(update(ReplicaWriteStamp).values(wrote_at=ReplicaWriteStamp.wrote_at - 60))
+        db.session.commit()
+
+
+def test_reads_use_the_replica_except_right_after_a_write(make_app, tmp_path):
+    app = _make(make_app, tmp_path)
+    client = app.test_client()
+    assert client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'}).status_code == 200
+    _notify(app, 'hello')
+
+    # the login was a write: read it back from the primary
+    assert _messages(client) == ['hello']
+    _expire_stickiness(app)
+    assert _messages(client) == []           # replica has not caught up
+    with app.app_context():
+        _replicate(app)
+    assert _messages(client) == ['hello']
+
+    _notify(app, 'again')
+    notif_id = client.get('/api/v1/notifications').get_json()[0]['id']
+    assert client.post(f'/api/v1/notifications/{notif_id}/mark_read').status_code == 200
+    assert _messages(client) == ['again', 'hello']
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(make_app, tmp_path):
+    app = _make(make_app, tmp_path, REPLICA_CHECK_SECONDS=0)
+    client = app.test_client()
+    client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'})
+    _expire_stickiness(app)
+    _notify(app, 'hello')
+    assert _messages(client) == []
+
+    with app.app_context():
+        db.metadata.drop_all(_replica(app))
+    assert _messages(client) == ['hello']
+    assert app.extensions['replicas'].pick() is None
+
+
+def test_bearer_token_writes_keep_reads_on_the_primary(make_app, tmp_path):
+    app = _make(make_app, tmp_path, JWT_AUTH_ENABLED=True)
+    client = app.test_client()
+    token = client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'}).get_json()['access_token']
+    client.delete_cookie('session')
+    auth = {'Authorization': f'Bearer {token}'}
+    _notify(app, 'hello')
+    with app.app_context():
+        _replicate(app)
+    notif_id = client.get('/api/v1/notifications', headers=auth).get_json()[0]['id']
+
+    res = client.post(f'/api/v1/notifications/{notif_id}/mark_read', headers=auth)
+    assert res.status_code == 200
+    assert 'Set-Cookie' not in res.headers
+    # the replica still has it unread; the primary does not
+    assert client.get('/api/v1/notifications', headers=auth).get_json()[0]['is_read'] is True
+    _expire_stickiness(app)
+    assert client.get('/api/v1/notifications', headers=auth).get_json()[0]['is_read'] is False
+
+
+def test_dashboards_read_from_a_replica_are_not_cached(make_app, tmp_path):
+    app = _make(make_app, tmp_path)
+    client = app.test_client()
+    client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'})
+    _expire_stickiness(app)
+    _notify(app, 'hello')
+
+    assert client.get('/api/v1/dashboard').get_json()['notifications'] == []
+    with app.app_context():
+        _replicate(app)
+    assert [n['message'] for n in client.get('/api/v1/dashboard').get_json()['notifications']] == ['hello']
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import User, ServiceRequest, Notification, SchedulerLease
+from app.scheduler import RequestScheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **delta):
+        self.now += timedelta(**delta)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(datetime(2026, 2, 1, 9, 0))
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(REQUEST_ESCALATE_MINUTES=30, REQUEST_EXPIRE_MINUTES=120)
+
+
+@pytest.fixture
+def ids(app, user_factory):
+    """The users' ids by username."""
+    with app.app_context():
+        user_factory('u', location='Gulshan')
+        user_factory('near1', role='provider', partner_category='barber', partner_locations='Gulshan')
+        user_factory('near2', role='provider', partner_category='barber', partner_locations='Gulshan,Banani')
+        user_factory('far', role='provider', partner_category='barber', partner_locations='Uttara')
+        db.session.commit()
+        return {u.username: u.id for u in User.query}
+
+
+def _create_request(app, clock):
+    with app.app_context():
+        user = User.query.filter_by(username='u').one()
+        sr = ServiceRequest(user_id=user.id, category='barber', status='pending', created_at=clock())
+        from app.dispatch import enqueue
+        from app.request_lifecycle import schedule_new
+        enqueue(sr, user)
+        schedule_new(sr)
+        db.session.add(sr)
+        db.session.commit()
+        return sr.id
+
+
+def _notified(app, request_id):
+    with app.app_context():
+        return {n.recipient_id for n in Notification.query if f'#{request_id} ' in n.message}
+
+
+def _state(app, request_id):
+    with app.app_context():
+        sr = db.session.get(ServiceRequest, request_id)
+        return sr.status, sr.escalation_level, sr.next_action_at
+
+
+def _queue_ids(client):
+    return [r['id'] for r in client.get('/api/v1/service_requests/queue').get_json()]
+
+
+def test_rejection_is_per_provider(app, clock, ids, login):
+    request_id = _create_request(app, clock)
+
+    res = login(app, 'near1').post(f'/api/v1/service_requests/{request_id}/reject')
+    assert res.status_code == 200 and res.get_json()['status'] == 'pending'
+    assert _queue_ids(login(app, 'near1')) == []
+    assert _queue_ids(login(app, 'near2')) == [request_id]
+
+    res = login(app, 'near2').post(f'/api/v1/service_requests/{request_id}/accept')
+    assert res.get_json()['status'] == 'accepted'
+    assert _state(app, request_id)[2] is None
+    assert ids['near2'] == res.get_json()['provider_id']
+
+
+def test_escalates_then_expires_on_schedule(app, clock, ids, login):
+    request_id = _create_request(app, clock)
+    scheduler = RequestScheduler(app, clock=clock, holder='w1')
+    assert _queue_ids(login(app, 'far')) == []
+
+    clock.advance(minutes=29)
+    assert scheduler.tick() == 0
+    assert _state(app, request_id)[:2] == ('pending', 0)
+
+    clock.advance(minutes=1)
+    assert scheduler.tick() == 1
+    status, level, next_action_at = _state(app, request_id)
+    assert (status, level, next_action_at) == ('pending', 1, datetime(2026, 2, 1, 11, 0))
+    # only the provider outside the original location match gets the widened offer
+    assert _notified(app, request_id) == {ids['far']}
+    assert _queue_ids(login(app, 'far')) == [request_id]
+
+    clock.advance(minutes=90)
+    assert scheduler.tick() == 1
+    assert _state(app, request_id) == ('expired', 1, None)
+    assert ids['u'] in _notified(app, request_id)
+
+
+def test_all_offered_providers_declining_escalates_immediately(app, clock, ids):
+    request_id = _create_request(app, clock)
+    scheduler = RequestScheduler(app, clock=clock, holder='w1')
+
+    with app.app_context():
+        from app.request_lifecycle import record_rejection
+        sr = db.session.get(ServiceRequest, request_id)
+        for name in ('near1', 'near2'):
+            record_rejection(sr, db.session.get(User, ids[name]), clock())
+        db.session.commit()
+
+    clock.advance(minutes=1)
+    assert scheduler.tick() == 1
+    assert _state(app, request_id)[:2] == ('pending', 1)
+
+    with app.app_context():
+        sr = db.session.get(ServiceRequest, request_id)
+        record_rejection(sr, db.session.get(User, ids['far']), clock())
+        db.session.commit()
+    clock.advance(minutes=1)
+    assert scheduler.tick() == 1
+    assert _state(app, request_id)[0] == 'expired'
+
+
+def test_only_the_lease_holder_runs(app, clock, ids):
+    request_id = _create_request(app, clock)
+    w1 = RequestScheduler(app, clock=clock, holder='w1')
+    w2 = RequestScheduler(app, clock=clock, holder='w2')
+
+    assert w1.tick() == 0
+    clock.advance(seconds=60)
+    assert w2.tick() is None
+
+    # w1 stops renewing; w2 takes over once the lease runs out
+    clock.advance(seconds=31)
+    assert w2.tick() == 0
+    assert w1.tick() is None
+    with app.app_context():
+        assert db.session.get(SchedulerLease, 'request_scheduler').holder == 'w2'
+
+    # renewing keeps it even after the original expiry
+    clock.advance(seconds=60)
+    assert w2.tick() == 0
+    clock.advance(minutes=29)
+    assert w2.tick() == 1
+    assert w1.tick() is None
+    assert _state(app, request_id)[1] == 1
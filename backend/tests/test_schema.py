@@ -0,0 +1,85 @@
+import io
+import re
+
+from alembic import command
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade
+from sqlalchemy import MetaData, create_engine, text
+
+from app import db, migrate
+
+# where deployed databases stood when the chain was squashed
+PRE_SQUASH_HEAD = '2d0118c73f12'
+from app.schema import ARCHIVE_DIR, BASELINE_DIR, MIGRATIONS_DIR, describe_schema, load_snapshot
+
+
+def _head():
+    return ScriptDirectory.from_config(migrate.get_config(str(MIGRATIONS_DIR))).get_current_head()
+
+
+def _version(engine):
+    with engine.connect() as conn:
+        return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def _empty(app):
+    """Drop the snapshot make_app loaded, alembic_version included."""
+    with app.app_context():
+        tables = MetaData()
+        tables.reflect(db.engine)
+        tables.drop_all(db.engine)
+    return app
+
+
+def test_databases_from_before_the_squash_upgrade_to_head(make_app, tmp_path):
+    chain = _empty(make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/chain.db'))
+    baseline = _empty(make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/baseline.db'))
+
+    with chain.app_context():
+        config = migrate.get_config(str(MIGRATIONS_DIR))
+        config.set_main_option('version_locations', str(ARCHIVE_DIR))
+        command.upgrade(config, PRE_SQUASH_HEAD)
+        # a plain `flask db upgrade` takes it the rest of the way, through the archive
+        upgrade(directory=str(MIGRATIONS_DIR))
+        assert _version(db.engine) == _head()
+        replayed = describe_schema(db.engine)
+
+    with baseline.app_context():
+        upgrade(directory=str(MIGRATIONS_DIR))
+        assert _version(db.engine) == _head()
+        squashed = describe_schema(db.engine)
+
+    assert squashed == replayed
+    models = _empty(make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/models.db'))
+    with models.app_context():
+        db.create_all()
+        assert describe_schema(db.engine) == {k: v for k, v in squashed.items() if k != 'alembic_version'}
+
+
+def test_baseline_keeps_id_sequences_on_postgresql():
+    # the archived chain kept the serial ids when it made (id, created_at) the key of the partitioned tables
+    baseline = ScriptDirectory(str(MIGRATIONS_DIR), version_locations=[str(BASELINE_DIR)]).get_revision('heads')
+    ddl = io.StringIO()
+    context = MigrationContext.configure(dialect_name='postgresql', opts={'as_sql': True, 'output_buffer': ddl})
+    with Operations.context(context):
+        baseline.module.upgrade()
+    for table in ('notification', 'chat_message'):
+        create = re.search(rf'CREATE TABLE {table} \((.*?)\)\s*PARTITION BY', ddl.getvalue(), re.S).group(1)
+        assert re.search(r'\bid SERIAL NOT NULL', create)
+        assert f'CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)' in create
+
+
+def test_snapshot_matches_migrations(make_app, tmp_path):
+    app = _empty(make_app())
+    with app.app_context():
+        load_snapshot()
+        loaded = describe_schema(db.engine)
+        assert _version(db.engine) == _head(), 'stale snapshot: run flask dump-schema'
+
+    engine = create_engine(f'sqlite:///{tmp_path}/upgraded.db')
+    migrated = _empty(make_app(SQLALCHEMY_DATABASE_URI=str(engine.url)))
+    with migrated.app_context():
+        upgrade(directory=str(MIGRATIONS_DIR))
+    assert loaded == describe_schema(engine), 'stale snapshot: run flask dump-schema'
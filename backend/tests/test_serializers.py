@@ -0,0 +1,109 @@
+import itertools
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.serializers import FIELDSET_CACHE_SIZE
+from app.models import User, Complaint, Notification, ChatMessage
+
+
+def test_to_dict_output_unchanged(app, user_factory):
+    with app.app_context():
+        created = datetime(2024, 5, 1, 9, 30, 15, 120000)
+        u = user_factory('p', role='provider', skills='wiring,lights', partner_locations='Gulshan',
+                  created_at=created, provider_unique_id='PROV-001')
+        db.session.commit()
+
+        data = u.to_dict()
+        assert data['created_at'] == '2024-05-01T09:30:15.120000'
+        assert data['skills'] == ['wiring', 'lights']
+        assert data['partner_locations'] == ['Gulshan']
+        assert data['subscription_expiry'] is None
+
+        native = u.as_json()
+        assert native['created_at'] == created
+        assert native['skills'] == ('wiring', 'lights')
+
+        msg = ChatMessage(sender_id=999, message='hi', created_at=created)
+        assert msg.to_dict()['sender_username'] == 'Unknown'
+        assert msg.to_dict()['sender_role'] == 'unknown'
+
+
+def test_serializer_loads_expired_columns_and_leaves_pending_state_alone(app, user_factory):
+    with app.app_context():
+        u = user_factory('u', location='Banani')
+        db.session.commit()
+        db.session.expire(u)
+        assert u.to_dict()['location'] == 'Banani'
+
+        # Unset columns on a pending object must not be written as explicit NULLs,
+        # or the column defaults would be skipped on INSERT
+        n = Notification(recipient_id=u.id, message='x')
+        assert n.to_dict()['is_read'] is None
+        db.session.add(n)
+        db.session.commit()
+        assert n.is_read is False and n.created_at is not None
+
+
+@pytest.mark.parametrize('provider', ['orjson', 'stdlib'])
+def test_list_responses_match_to_dict(make_app, user_factory, login, provider):
+    app = make_app(JSON_PROVIDER=provider)
+    with app.app_context():
+        u = user_factory('u')
+        p = user_factory('p', role='provider', provider_unique_id='PROV-001')
+        db.session.flush()
+        db.session.add(Complaint(user_id=u.id, provider_id=p.id, title='late', description='very'))
+        db.session.add(Notification(recipient_id=u.id, message='hello'))
+        db.session.commit()
+        expected_complaints = [c.to_dict() for c in Complaint.query.all()]
+        expected_notifications = [n.to_dict() for n in Notification.query.all()]
+
+    client = login(app, 'u')
+    assert client.get('/api/v1/complaints').get_json() == expected_complaints
+    assert client.get('/api/v1/notifications').get_json() == expected_notifications
+
+
+def test_sparse_fieldset_skips_unrequested_columns_and_joins(app, user_factory, login):
+    with app.app_context():
+        u = user_factory('u')
+        p = user_factory('p', role='provider', provider_unique_id='PROV-001')
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Complaint(user_id=u.id, provider_id=p.id, title=f't{i}', description='d'))
+        db.session.commit()
+
+    client = login(app, 'u')
+    statements = []
+    with app.app_context():
+        listen = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listen)
+        try:
+            res = client.get('/api/v1/complaints?fields=id,title')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listen)
+
+    assert res.status_code == 200
+    assert [sorted(c) for c in res.get_json()] == [['id', 'title']] * 3
+    selects = [s for s in statements if 'FROM complaint' in s]
+    assert len(selects) == 1
+    assert 'JOIN' not in selects[0] and 'description' not in selects[0]
+
+    res = client.get('/api/v1/complaints?fields=title,provider_username')
+    assert {c['provider_username'] for c in res.get_json()} == {'p'}
+
+    res = client.get('/api/v1/complaints?fields=id,nope')
+    assert res.status_code == 400
+    assert 'nope' in res.get_json()['msg']
+
+
+def test_fieldset_cache_is_keyed_by_spec_order_and_bounded():
+    serializer = User.serializer
+    keys = serializer.parse_fields('username,id')
+    assert keys == serializer.parse_fields(' id,username,id ') == ('id', 'username')
+    assert serializer.fieldset(keys) is serializer.fieldset(serializer.parse_fields('id,username'))
+
+    for pair in itertools.combinations(serializer.keys, 2):
+        serializer.fieldset(serializer.parse_fields(','.join(pair)))
+    assert serializer._fieldset.cache_info().currsize == FIELDSET_CACHE_SIZE
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from app import db
+from app.models import User, Notification
+from app.subscriptions import expire_subscriptions, is_premium_active
+
+
+def _premium(username, expiry):
+    u = User(username=username, password_hash='x', is_premium=True, subscription_expiry=expiry)
+    db.session.add(u)
+    return u
+
+
+def test_sweeper_expires_in_bounded_batches_and_notifies(app):
+    now = datetime(2026, 3, 1)
+    with app.app_context():
+        lapsed = [_premium(f'lapsed{i}', now - timedelta(days=i + 1)) for i in range(5)]
+        current = _premium('current', now + timedelta(days=3))
+        db.session.add(User(username='free', password_hash='x'))
+        db.session.commit()
+        lapsed_ids = {u.id for u in lapsed}
+
+        assert expire_subscriptions(now=now, batch_size=2, max_batches=2) == 4
+        assert expire_subscriptions(now=now, batch_size=2, max_batches=2) == 1
+        assert expire_subscriptions(now=now, batch_size=2, max_batches=2) == 0
+
+        assert {u.id for u in User.query.filter_by(is_premium=True)} == {current.id}
+        assert {n.recipient_id for n in Notification.query} == lapsed_ids
+
+
+def test_sweeper_query_uses_expiry_index(app):
+    with app.app_context():
+        plan = db.session.execute(text(
+            'EXPLAIN QUERY PLAN SELECT id FROM user WHERE is_premium = 1 AND subscription_expiry <= :now '
+            'ORDER BY subscription_expiry LIMIT 10'), {'now': datetime.utcnow()}).all()
+        assert any('ix_user_subscription_expiry' in row[-1] for row in plan)
+
+
+def test_is_premium_active_is_cached_and_time_aware(make_app):
+    app = make_app(PREMIUM_CACHE_SECONDS=3600)
+    with app.app_context():
+        u = User(username='u', password_hash='x')
+        u.set_password('pw')
+        db.session.add(u)
+        db.session.commit()
+        user_id = u.id
+        assert not is_premium_active(user_id)
+
+    client = app.test_client()
+    client.post('/api/v1/auth/login', json={'username': 'u', 'password': 'pw'})
+    assert client.post('/api/v1/subscribe').status_code == 200
+
+    with app.app_context():
+        # subscribe invalidated the cached "not premium" answer
+        assert is_premium_active(user_id)
+        statements = []
+        listen = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listen)
+        try:
+            assert is_premium_active(user_id)
+            # the cached expiry is still compared against the clock
+            assert not is_premium_active(user_id, now=datetime.utcnow() + timedelta(days=31))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listen)
+        assert statements == []
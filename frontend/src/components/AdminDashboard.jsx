@@ -3,6 +3,18 @@ import api from '../services/api'
 import { getSocket } from '../services/socket'
 import ChatComponent from './ChatComponent'
 
+const clusterOf = c => c.cluster_id ?? c.id
+
+// near-duplicates share a cluster_id: one group per cluster, in list order, led by its first complaint
+function groupByCluster(complaints) {
+  const groups = new Map()
+  for (const c of complaints) {
+    if (!groups.has(clusterOf(c))) groups.set(clusterOf(c), [])
+    groups.get(clusterOf(c)).push(c)
+  }
+  return [...groups.values()]
+}
+
 export default function AdminDashboard() {
   const [complaints, setComplaints] = useState([])
   const [statusFilter, setStatusFilter] = useState('')
@@ -11,6 +23,7 @@ export default function AdminDashboard() {
   const [message, setMessage] = useState('')
   const [activeChatId, setActiveChatId] = useState(null)
   const [user, setUser] = useState(null)
+  const [openClusters, setOpenClusters] = useState({})
 
   useEffect(() => {
     api.get('/auth/me').then(res => setUser(res.data.user)).catch(e => { })
@@ -77,6 +90,14 @@ export default function AdminDashboard() {
     }
   }
 
+  function toggleCluster(cluster) {
+    setOpenClusters(prev => ({ ...prev, [cluster]: !prev[cluster] }))
+  }
+
+  const clusters = groupByCluster(complaints)
+  const leads = new Map(clusters.map(group => [group[0].id, group.length - 1]))
+  const visible = clusters.flatMap(group => openClusters[clusterOf(group[0])] ? group : [group[0]])
+
   return (
     <div className="grid">
       <div className="card">
@@ -96,11 +117,19 @@ export default function AdminDashboard() {
 
       {complaints.length === 0 && <div className="card"><p className="muted">No complaints.</p></div>}
 
-      {complaints.map(c => (
-        <div key={c.id} className="card" style={{ borderColor: c.status === 'pending' ? '#ff9800' : '#ccc' }}>
+      {visible.map(c => (
+        <div key={c.id} className="card" style={{ borderColor: c.status === 'pending' ? '#ff9800' : '#ccc', marginLeft: leads.has(c.id) ? 0 : 24 }}>
           <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
             <div>
-              <h3 style={{ margin: '0 0 4px 0' }}>{c.title}</h3>
+              <h3 style={{ margin: '0 0 4px 0' }}>
+                {c.title}
+                {leads.get(c.id) > 0 && (
+                  <span className="badge yellow" style={{ marginLeft: 8, cursor: 'pointer' }} onClick={() => toggleCluster(clusterOf(c))}>
+                    {openClusters[clusterOf(c)] ? 'Hide' : 'Show'} {leads.get(c.id)} similar
+                  </span>
+                )}
+              </h3>
+              {!leads.has(c.id) && <div className="small muted">Near-duplicate of #{clusterOf(c)}</div>}
               <div className="small muted">ID #{c.id} • {new Date(c.created_at).toLocaleString()}</div>
               <div className="small muted">ID #{c.id} • {new Date(c.created_at).toLocaleString()}</div>
               <div className="small" style={{ marginTop: 4 }}>
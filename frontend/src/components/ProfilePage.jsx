@@ -11,7 +11,7 @@ export default function ProfilePage() {
   const [profile, setProfile] = useState({
     name: '', location: '', skills: '', service_area: '', profile_photo: '',
     nid: '', partner_category: '', partner_locations: [], fee_min: '', fee_max: '', provider_unique_id: '', role: '',
-    is_premium: false, subscription_expiry: null
+    is_premium: false, subscription_expiry: null, email_digest_minutes: null
   })
   const [message, setMessage] = useState('')
   const [loading, setLoading] = useState(true)
@@ -23,31 +23,20 @@ export default function ProfilePage() {
   useEffect(() => {
     async function load() {
       try {
-        const res = await api.get('/profile')
-        const data = res.data
+        const data = (await loadDashboard()).user
         data.partner_locations = data.partner_locations || []
         setProfile(prev => ({ ...prev, ...data }))
         setLoading(false)
-
-        if (data.role === 'provider') {
-          loadWarnings()
-          loadComplaints()
-        }
       } catch (e) {
         // if 401, redirect to login?
       }
     }
-    loadNotifications()
     load()
 
     const socket = getSocket()
     socket.on('connect', () => console.log('SocketIO connected'))
     socket.on('notification', () => {
-      loadNotifications()
-      if (profile.role === 'provider') {
-        loadWarnings()
-        loadComplaints()
-      }
+      loadDashboard().catch(() => { })
     })
     return () => {
       socket.off('connect')
@@ -55,10 +44,17 @@ export default function ProfilePage() {
     }
   }, [])
 
-  async function loadWarnings() { try { const res = await api.get('/warnings'); setWarnings(res.data || []) } catch (e) { } }
-  async function loadComplaints() { try { const res = await api.get('/complaints'); setComplaints(res.data || []) } catch (e) { } }
-  async function loadNotifications() { try { const res = await api.get('/notifications'); setNotifications(res.data || []) } catch (e) { } }
-  async function markAsRead(notifId) { try { await api.post(`/notifications/${notifId}/mark_read`); loadNotifications() } catch (e) { } }
+  // profile, notifications, complaints and warnings in one round trip
+  async function loadDashboard() {
+    const res = await api.get('/dashboard')
+    setNotifications(res.data.notifications || [])
+    if (res.data.user.role === 'provider') {
+      setWarnings(res.data.warnings || [])
+      setComplaints(res.data.complaints || [])
+    }
+    return res.data
+  }
+  async function markAsRead(notifId) { try { await api.post(`/notifications/${notifId}/mark_read`); loadDashboard() } catch (e) { } }
 
   function toggleLocation(loc) {
     setProfile(prev => {
@@ -86,7 +82,8 @@ export default function ProfilePage() {
         partner_category: profile.partner_category,
         partner_locations: profile.partner_locations,
         fee_min: profile.fee_min,
-        fee_max: profile.fee_max
+        fee_max: profile.fee_max,
+        email_digest_minutes: profile.email_digest_minutes || 0
       }
 
       const res = await api.put('/profile', payload)
@@ -208,6 +205,16 @@ export default function ProfilePage() {
             </div>
           )}
 
+          <div className="form-row">
+            <label>Email Notifications</label>
+            <select value={profile.email_digest_minutes || 0} onChange={e => setProfile({ ...profile, email_digest_minutes: Number(e.target.value) })}>
+              <option value={0}>Send each email right away</option>
+              <option value={15}>Digest every 15 minutes</option>
+              <option value={60}>Hourly digest</option>
+              <option value={1440}>Daily digest</option>
+            </select>
+          </div>
+
           <div className="form-row" style={{ marginTop: 24 }}>
             <button className="btn" type="submit" style={{ width: '100%', padding: 12, fontSize: '1rem' }}>Update Profile</button>
           </div>
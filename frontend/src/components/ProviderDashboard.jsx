@@ -4,6 +4,12 @@ import { Link } from 'react-router-dom'
 import { getSocket } from '../services/socket'
 import ServiceChat from './ServiceChat'
 
+function applyInboxUpdate(requests, delta) {
+  if (delta.op === 'remove') return requests.filter(r => r.id !== delta.id)
+  const rest = requests.filter(r => r.id !== delta.request.id)
+  return [delta.request, ...rest]
+}
+
 export default function ProviderDashboard() {
   const [requests, setRequests] = useState([])
   const [notifications, setNotifications] = useState([])
@@ -13,34 +19,32 @@ export default function ProviderDashboard() {
   const [currentUser, setCurrentUser] = useState(null)
 
   useEffect(() => {
-    loadUser()
-    loadRequests()
-    loadNotifications()
+    loadDashboard()
 
     const socket = getSocket()
     socket.on('connect', () => console.log('Socket connected'))
     socket.on('notification', () => {
       loadNotifications()
-      loadRequests()
+    })
+    // the server pushes inbox changes, so the list is never reloaded
+    socket.on('inbox_update', delta => {
+      setRequests(prev => applyInboxUpdate(prev, delta))
     })
 
     return () => {
       socket.off('connect')
       socket.off('notification')
+      socket.off('inbox_update')
     }
   }, [])
 
-  async function loadUser() {
+  // user, inbox and notifications in one round trip; the inbox then follows inbox_update
+  async function loadDashboard() {
     try {
-      const res = await api.get('/auth/me')
+      const res = await api.get('/dashboard')
       setCurrentUser(res.data.user)
-    } catch (e) { }
-  }
-
-  async function loadRequests() {
-    try {
-      const res = await api.get('/service_requests')
-      setRequests(res.data)
+      setRequests(res.data.service_requests)
+      setNotifications(res.data.notifications || [])
     } catch (e) {
       console.error(e)
     }
@@ -57,7 +61,6 @@ export default function ProviderDashboard() {
     try {
       await api.post(`/service_requests/${requestId}/${action}`)
       setMessage(`Request ${action}ed`)
-      loadRequests()
     } catch (err) {
       setMessage('Error performing action')
     }
@@ -120,6 +123,7 @@ export default function ProviderDashboard() {
                 <div className="small muted">Created: {new Date(r.created_at).toLocaleString()}</div>
               </div>
               <div>
+                {r.is_priority && r.status === 'pending' && <span className="badge green" style={{ marginRight: 6 }}>Premium</span>}
                 <span className={`badge ${r.status === 'accepted' ? 'green' : 'yellow'}`}>{r.status}</span>
               </div>
             </div>
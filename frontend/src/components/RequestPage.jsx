@@ -26,7 +26,12 @@ export default function RequestPage() {
       // Optional: redirect to dashboard after delay
       setTimeout(() => navigate('/profile'), 2000)
     } catch (err) {
-      setMessage('Error submitting request. Please try again.')
+      if (err.response && err.response.status === 429) {
+        const minutes = Math.ceil(err.response.data.retry_after / 60)
+        setMessage(`You are sending requests too quickly. Please try again in ${minutes} minute${minutes === 1 ? '' : 's'}.`)
+      } else {
+        setMessage('Error submitting request. Please try again.')
+      }
     } finally {
       setLoading(false)
     }
@@ -11,15 +11,12 @@ export default function UserDashboard() {
   const [rating, setRating] = useState({ id: null, sc: 5, review: '' })
 
   useEffect(() => {
-    loadUser()
-    loadRequests()
-    loadNotifications()
+    loadDashboard()
 
     const socket = getSocket()
     socket.on('connect', () => console.log('Socket connected'))
     socket.on('notification', () => {
-      loadNotifications()
-      loadRequests()
+      loadDashboard()
     })
 
     return () => {
@@ -28,29 +25,18 @@ export default function UserDashboard() {
     }
   }, [])
 
-  async function loadUser() {
+  // user, requests and notifications in one round trip
+  async function loadDashboard() {
     try {
-      const res = await api.get('/auth/me')
+      const res = await api.get('/dashboard')
       setCurrentUser(res.data.user)
-    } catch (e) { }
-  }
-
-  async function loadRequests() {
-    try {
-      const res = await api.get('/service_requests')
-      setRequests(res.data)
+      setRequests(res.data.service_requests)
+      setNotifications(res.data.notifications || [])
     } catch (e) {
       console.error(e)
     }
   }
 
-  async function loadNotifications() {
-    try {
-      const res = await api.get('/notifications')
-      setNotifications(res.data || [])
-    } catch (e) { }
-  }
-
   async function submitRating(requestId) {
     try {
       await api.post(`/service_requests/${requestId}/rate`, {
@@ -58,7 +44,7 @@ export default function UserDashboard() {
         review: rating.review
       })
       setRating({ id: null, sc: 5, review: '' })
-      loadRequests()
+      loadDashboard()
     } catch (e) {
       alert('Error submitting rating')
     }
@@ -5,4 +5,67 @@ const api = axios.create({
   withCredentials: true, // send cookies for session auth
 })
 
+// Optional JWT mode: the backend only returns tokens when JWT_AUTH_ENABLED is set
+export function getAccessToken() {
+  return localStorage.getItem('access_token')
+}
+
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost)
+function idempotencyKey() {
+  if (globalThis.crypto?.randomUUID) {
+    return crypto.randomUUID()
+  }
+  const bytes = new Uint8Array(16)
+  if (globalThis.crypto?.getRandomValues) {
+    crypto.getRandomValues(bytes)
+  } else {
+    for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256)
+  }
+  return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('')
+}
+
+api.interceptors.request.use(config => {
+  const token = getAccessToken()
+  if (token && !config.headers.Authorization) {
+    config.headers.Authorization = `Bearer ${token}`
+  }
+  // one key per logical POST; a retry of the same config replays instead of repeating it
+  if (config.method === 'post' && !config.headers['Idempotency-Key']) {
+    config.headers['Idempotency-Key'] = idempotencyKey()
+  }
+  return config
+})
+
+api.interceptors.response.use(
+  res => {
+    if (res.config.url === '/auth/login' && res.data && res.data.access_token) {
+      localStorage.setItem('access_token', res.data.access_token)
+      localStorage.setItem('refresh_token', res.data.refresh_token)
+    }
+    if (res.config.url === '/auth/logout') {
+      localStorage.removeItem('access_token')
+      localStorage.removeItem('refresh_token')
+    }
+    return res
+  },
+  async err => {
+    const original = err.config
+    const refreshToken = localStorage.getItem('refresh_token')
+    // access token expired: refresh once and retry
+    if (err.response && err.response.status === 401 && refreshToken && original && !original._retried && original.url !== '/auth/refresh') {
+      original._retried = true
+      try {
+        const res = await api.post('/auth/refresh', null, { headers: { Authorization: `Bearer ${refreshToken}` } })
+        localStorage.setItem('access_token', res.data.access_token)
+        original.headers.Authorization = `Bearer ${res.data.access_token}`
+        return api(original)
+      } catch (e) {
+        localStorage.removeItem('access_token')
+        localStorage.removeItem('refresh_token')
+      }
+    }
+    return Promise.reject(err)
+  }
+)
+
 export default api
@@ -1,4 +1,5 @@
 import { io } from 'socket.io-client'
+import { getAccessToken } from './api'
 
 // Use the same base URL as the API
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:1588/api/v1'
@@ -10,7 +11,9 @@ export function getSocket() {
   if (!socket) {
     socket = io(SOCKET_URL, {
       withCredentials: true,
-      transports: ['websocket', 'polling']
+      transports: ['websocket', 'polling'],
+      // JWT mode: the server accepts { token } when there is no session cookie
+      auth: cb => cb({ token: getAccessToken() })
     })
   }
   return socket